@@ -0,0 +1,32 @@
+# Diseño compacto de los nodos de los árboles B, B+ y B*.
+# En lugar de un objeto (Node o tupla) por clave, el nodo guarda los ids en un
+# buffer contiguo array('q') de enteros de 64 bits y los nombres en una lista paralela.
+# Las divisiones, fusiones y préstamos siguen operando con rebanadas, ya que
+# array('q') admite insert, pop, append, extend y slicing igual que una lista.
+
+from array import array
+from operator import attrgetter, itemgetter
+
+
+def ids_compactos():
+    # Buffer vacío para los ids de un nodo compacto
+    return array('q')
+
+
+# Lectura del nombre en el diseño por objetos (tuplas en TreeB, Node en B+ y B*)
+nombre_de_par = itemgetter(1)
+nombre_de_node = attrgetter('name')
+
+
+def registro_par(id, nombre):
+    # Registro de TreeB en el diseño por objetos
+    return (id, nombre)
+
+
+def registro_compacto(id, nombre):
+    # En el diseño compacto el registro es solo el nombre; el id vive en el array del nodo
+    return nombre
+
+
+def nombre_compacto(registro):
+    return registro
@@ -1,57 +1,124 @@
+from carga_masiva import validar_orden, capacidad_por_llenado, construir_niveles, repartir
+from metricas import estadisticas_nodos
+from busqueda_nodo import buscar_slot, buscar_slot_derecha
+from almacenamiento import ids_compactos, registro_par, nombre_de_par, registro_compacto, nombre_compacto
+from protocolo import Resultado, NO_ENCONTRADO
+from operaciones_lote import LOTE_MINIMO, ordenar_lote, fin_tramo
+from instantanea import TIPO_B, volcar_niveles, leer_instantanea, construir_desde_niveles
+
 class BNode:
+    __slots__ = ('d', 'leaf', 'pairs', 'ids', 'children')  # Sin __dict__ por instancia
+
     def __init__(self, d, leaf=False):
         self.d = d  # Grado mínimo del árbol B
         self.leaf = leaf  # Indica si el nodo es una hoja
         self.pairs = []  # Lista de pares (id, nombre)
+        self.ids = []  # Lista paralela con los ids de 'pairs', usada para buscar con bisect
         self.children = []  # Lista de hijos del nodo
 
+class BNodeCompacto(BNode):
+    # Nodo del diseño compacto: ids en array('q') y 'pairs' guarda solo los nombres
+    __slots__ = ()
+
+    def __init__(self, d, leaf=False):
+        super().__init__(d, leaf)
+        self.ids = ids_compactos()
+
 class TreeB:
+    # Búsqueda del slot dentro de un nodo (ver busqueda_nodo)
+    _slot = staticmethod(buscar_slot)
+    _slot_derecha = staticmethod(buscar_slot_derecha)
+
+    # Diseño de los nodos: clase del nodo y forma de crear y leer cada registro
+    _node_cls = BNode
+    _registro = staticmethod(registro_par)
+    _nombre = staticmethod(nombre_de_par)
+
     def __init__(self, d):
-        self.root = BNode(d, leaf=True)  # Inicializa la raíz del árbol como un nodo hoja
+        self.root = self._node_cls(d, leaf=True)  # Inicializa la raíz del árbol como un nodo hoja
         self.d = d  # Grado mínimo del árbol B
     
     def insert(self, id, nombre):
         root = self.root
         # Si la raíz está llena, se divide
         if len(root.pairs) == (2 * self.d - 1):
-            s = BNode(self.d, leaf=False)  # Nuevo nodo no hoja
+            s = self._node_cls(self.d, leaf=False)  # Nuevo nodo no hoja
             self.root = s
             s.children.append(root)
             self._split_child(s, 0)  # Divide el hijo de la raíz
             self._insert_non_full(s, id, nombre)  # Inserta en el nuevo nodo raíz
         else:
             self._insert_non_full(root, id, nombre)  # Inserta en la raíz
+        return Resultado((True, nombre))
+
+    @classmethod
+    def bulk_load(cls, sorted_pairs, d, fill_factor=1.0):
+        # Construye el árbol en O(n) a partir de pares (id, nombre) ya ordenados,
+        # llenando cada nodo hasta fill_factor * (2d - 1) claves
+        pares = validar_orden(sorted_pairs)
+        arbol = cls(d)
+        capacidad = capacidad_por_llenado(2 * d - 1, d - 1, fill_factor)
+
+        def nuevo_nodo(es_hoja, registros, hijos):
+            nodo = cls._node_cls(d, leaf=es_hoja)
+            nodo.pairs = [cls._registro(id, nombre) for id, nombre in registros]
+            nodo.ids.extend(id for id, _ in registros)
+            nodo.children = hijos
+            return nodo
+
+        arbol.root, _ = construir_niveles(pares, capacidad, d - 1, nuevo_nodo)
+        return arbol
+
+    def dump(self, ruta):
+        # Guarda el árbol en una instantánea binaria por niveles (ver instantanea)
+        volcar_niveles(ruta, TIPO_B, self.d, self.root, lambda nodo: nodo.pairs, self._nombre)
+
+    @classmethod
+    def load(cls, ruta):
+        # Reconstruye un árbol guardado con dump con una sola lectura del archivo
+        d, forma, ids, nombres, primera_hoja = leer_instantanea(ruta, TIPO_B)
+        arbol = cls(d)
+
+        def nuevo_nodo(es_hoja, ids_nodo, nombres_nodo):
+            nodo = cls._node_cls(d, leaf=es_hoja)
+            nodo.pairs = [cls._registro(id, nombre) for id, nombre in zip(ids_nodo, nombres_nodo)]
+            nodo.ids.extend(ids_nodo)
+            return nodo
+
+        arbol.root, _ = construir_desde_niveles(forma, ids, nombres, primera_hoja, True, nuevo_nodo)
+        return arbol
     
+    def structure_stats(self):
+        # Altura, cantidad de nodos y llenado promedio respecto de 2 * d - 1 claves por nodo
+        return estadisticas_nodos(self.root, 2 * self.d - 1)
+
     def _insert_non_full(self, nodo, id, nombre):
-        i = len(nodo.pairs) - 1
-        nuevo_par = (id, nombre)
+        # Los ids repetidos se ubican a la derecha de los existentes
+        i = self._slot_derecha(nodo.ids, id)
         if nodo.leaf:
             # Inserta en un nodo hoja
-            nodo.pairs.append(None)
-            while i >= 0 and nuevo_par < nodo.pairs[i]:
-                nodo.pairs[i + 1] = nodo.pairs[i]
-                i -= 1
-            nodo.pairs[i + 1] = nuevo_par
+            nodo.pairs.insert(i, self._registro(id, nombre))
+            nodo.ids.insert(i, id)
         else:
             # Inserta en un nodo interno
-            while i >= 0 and nuevo_par < nodo.pairs[i]:
-                i -= 1
-            i += 1
             # Si el hijo está lleno, se divide
             if len(nodo.children[i].pairs) == (2 * self.d - 1):
                 self._split_child(nodo, i)
-                if nuevo_par > nodo.pairs[i]:
+                if id >= nodo.ids[i]:
                     i += 1
             self._insert_non_full(nodo.children[i], id, nombre)
     
     def _split_child(self, nodo, i):
         d = self.d
         y = nodo.children[i]
-        z = BNode(d, leaf=y.leaf)  # Nuevo nodo para la división
+        z = self._node_cls(d, leaf=y.leaf)  # Nuevo nodo para la división
         nodo.children.insert(i + 1, z)  # Inserta el nuevo hijo
         nodo.pairs.insert(i, y.pairs[d - 1])  # Mueve la clave del medio al nodo padre
+        nodo.ids.insert(i, y.ids[d - 1])
         z.pairs = y.pairs[d:(2 * d - 1)]  # Asigna los pares al nuevo nodo
+        z.ids = y.ids[d:(2 * d - 1)]
         y.pairs = y.pairs[0:(d - 1)]  # Ajusta los pares del nodo original
+        y.ids = y.ids[0:(d - 1)]
         if not y.leaf:
             z.children = y.children[d:(2 * d)]  # Mueve los hijos al nuevo nodo
             y.children = y.children[0:d]
@@ -60,17 +127,16 @@ class TreeB:
         return self._search(self.root, id)
     
     def _search(self, nodo, id):
-        i = 0
         # Busca el índice donde podría estar el id
-        while i < len(nodo.pairs) and id > nodo.pairs[i][0]:
-            i += 1
-        if i < len(nodo.pairs) and id == nodo.pairs[i][0]:
-            return nodo.pairs[i][1]  # Retorna el nombre si se encuentra el id
+        i = self._slot(nodo.ids, id)
+        if i < len(nodo.ids) and id == nodo.ids[i]:
+            return Resultado((True, self._nombre(nodo.pairs[i])))  # Retorna el nombre si se encuentra el id
         if nodo.leaf:
-            return None  # Retorna None si no se encontró la id
+            return NO_ENCONTRADO  # No se encontró la id
         return self._search(nodo.children[i], id)
     
     def delete(self, id):
+        # Retorna el Resultado con el nombre eliminado, o NO_ENCONTRADO si el id no estaba
         eliminado, self.root = self._delete(self.root, id)
         # Si la raíz quedó vacía, se actualiza la raíz
         if len(self.root.pairs) == 0 and not self.root.leaf:
@@ -80,36 +146,34 @@ class TreeB:
     def _delete(self, nodo, id):
         if nodo.leaf:
             # Eliminar un par de un nodo hoja
-            for i, par in enumerate(nodo.pairs):
-                if par[0] == id:
-                    nombre = par[1]
-                    nodo.pairs.pop(i)
-                    return nombre, nodo
-            return None, nodo
+            i = self._slot(nodo.ids, id)
+            if i < len(nodo.ids) and nodo.ids[i] == id:
+                nombre = self._nombre(nodo.pairs[i])
+                nodo.pairs.pop(i)
+                nodo.ids.pop(i)
+                return Resultado((True, nombre)), nodo
+            return NO_ENCONTRADO, nodo
         
         # Buscar el índice del hijo donde se debería eliminar el id
-        i = 0
-        while i < len(nodo.pairs) and id > nodo.pairs[i][0]:
-            i += 1
+        i = self._slot(nodo.ids, id)
         
-        if i < len(nodo.pairs) and id == nodo.pairs[i][0]:
+        if i < len(nodo.ids) and id == nodo.ids[i]:
             # Eliminar un par de un nodo no hoja
+            eliminado = Resultado((True, self._nombre(nodo.pairs[i])))
             if len(nodo.children[i].pairs) >= self.d:
-                pred = self._get_predecesor(nodo.children[i])
-                pred_id = pred[0]
-                pred_nombre = pred[1]
+                pred_id, pred = self._get_predecesor(nodo.children[i])
                 self._delete(nodo.children[i], pred_id)
-                nodo.pairs[i] = (pred_id, pred_nombre)
+                nodo.pairs[i] = pred
+                nodo.ids[i] = pred_id
             elif len(nodo.children[i + 1].pairs) >= self.d:
-                succ = self._get_sucesor(nodo.children[i + 1])
-                succ_id = succ[0]
-                succ_nombre = succ[1]
+                succ_id, succ = self._get_sucesor(nodo.children[i + 1])
                 self._delete(nodo.children[i + 1], succ_id)
-                nodo.pairs[i] = (succ_id, succ_nombre)
+                nodo.pairs[i] = succ
+                nodo.ids[i] = succ_id
             else:
                 # Fusión de los hijos y eliminación el id
                 self._merge_children(nodo, i)
-                self._delete(nodo.children[i], id)
+                eliminado, _ = self._delete(nodo.children[i], id)
         else:
             # Verificacion de que el hijo tenga suficientes pares antes de eliminar
             if len(nodo.children[i].pairs) == self.d - 1:
@@ -123,25 +187,25 @@ class TreeB:
                     else:
                         self._merge_children(nodo, i - 1)
                         i -= 1
-            self._delete(nodo.children[i], id)
+            eliminado, _ = self._delete(nodo.children[i], id)
         
         # Si la raíz quedó vacía, se actualiza la raíz
         if len(self.root.pairs) == 0:
-            self.root = self.root.children[0] if self.root.children else BNode(self.d, leaf=True)
+            self.root = self.root.children[0] if self.root.children else self._node_cls(self.d, leaf=True)
         
-        return None, nodo
+        return eliminado, nodo
     
     def _get_predecesor(self, nodo):
-        # Encuentra el predecesor (el par más grande en el subárbol)
+        # Encuentra el predecesor (el par más grande en el subárbol) y retorna su id y registro
         while not nodo.leaf:
             nodo = nodo.children[-1]
-        return nodo.pairs[-1]
+        return nodo.ids[-1], nodo.pairs[-1]
     
     def _get_sucesor(self, nodo):
-        # Encuentra el sucesor (el par más pequeño en el subárbol)
+        # Encuentra el sucesor (el par más pequeño en el subárbol) y retorna su id y registro
         while not nodo.leaf:
             nodo = nodo.children[0]
-        return nodo.pairs[0]
+        return nodo.ids[0], nodo.pairs[0]
     
     def _merge_children(self, nodo, i):
         # Fusiona el hijo en la posición i con el hermano derecho
@@ -149,9 +213,12 @@ class TreeB:
         sibling = nodo.children[i + 1]
         child.pairs.append(nodo.pairs[i])
         child.pairs.extend(sibling.pairs)
+        child.ids.append(nodo.ids[i])
+        child.ids.extend(sibling.ids)
         if not child.leaf:
             child.children.extend(sibling.children)
         nodo.pairs.pop(i)
+        nodo.ids.pop(i)
         nodo.children.pop(i + 1)
     
     def _borrow_from_prev(self, nodo, i):
@@ -159,15 +226,181 @@ class TreeB:
         child = nodo.children[i]
         sibling = nodo.children[i - 1]
         child.pairs.insert(0, nodo.pairs[i - 1])
+        child.ids.insert(0, nodo.ids[i - 1])
         if not child.leaf:
             child.children.insert(0, sibling.children.pop())
         nodo.pairs[i - 1] = sibling.pairs.pop()
+        nodo.ids[i - 1] = sibling.ids.pop()
     
     def _borrow_from_next(self, nodo, i):
         # Pide prestado un par del hermano derecho
         child = nodo.children[i]
         sibling = nodo.children[i + 1]
         child.pairs.append(nodo.pairs[i])
+        child.ids.append(nodo.ids[i])
         if not child.leaf:
             child.children.append(sibling.children.pop(0))
         nodo.pairs[i] = sibling.pairs.pop(0)
+        nodo.ids[i] = sibling.ids.pop(0)
+
+    # Operaciones en lote: el lote se ordena una vez y se recorre con un descenso compartido.
+    # Cada nodo reparte entre sus hijos el tramo de ids que les corresponde; los hijos que
+    # desbordan o quedan con menos de d - 1 claves se reparan al volver de la recursión.
+
+    def search_many(self, ids):
+        # Retorna el Resultado de cada id, en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.search(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        self._search_many(self.root, ordenados, 0, len(ordenados), orden, resultados)
+        return resultados
+
+    def _search_many(self, nodo, ids, inicio, fin, orden, resultados):
+        claves = nodo.ids
+        i = 0
+        j = inicio
+        while j < fin:
+            id = ids[j]
+            i = self._slot(claves, id, i)
+            if i < len(claves) and claves[i] == id:
+                resultados[orden[j]] = Resultado((True, self._nombre(nodo.pairs[i])))
+                j += 1
+            elif nodo.leaf:
+                j += 1
+            else:
+                # Los ids menores que la clave i continúan juntos en el hijo i
+                k = fin_tramo(ids, claves[i], j, fin) if i < len(claves) else fin
+                self._search_many(nodo.children[i], ids, j, k, orden, resultados)
+                j = k
+
+    def insert_many(self, pares):
+        # Inserta un lote de pares (id, nombre) y retorna sus Resultado en el orden del lote
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        orden, ids = ordenar_lote([id for id, _ in pares])
+        nombres = [pares[p][1] for p in orden]
+        self._insert_many(self.root, ids, nombres, 0, len(ids))
+        self._ajustar_raiz()
+        return [Resultado((True, nombre)) for _, nombre in pares]
+
+    def _insert_many(self, nodo, ids, nombres, inicio, fin):
+        # Inserta ids[inicio:fin] en el subárbol; el nodo puede quedar desbordado y es su
+        # padre quien lo divide. Los ids repetidos se ubican a la derecha de los existentes
+        if nodo.leaf:
+            i = 0
+            for j in range(inicio, fin):
+                i = self._slot_derecha(nodo.ids, ids[j], i)
+                nodo.pairs.insert(i, self._registro(ids[j], nombres[j]))
+                nodo.ids.insert(i, ids[j])
+                i += 1
+            return
+        j = inicio
+        while j < fin:
+            i = self._slot_derecha(nodo.ids, ids[j])
+            k = fin_tramo(ids, nodo.ids[i], j, fin) if i < len(nodo.ids) else fin
+            hijo = nodo.children[i]
+            self._insert_many(hijo, ids, nombres, j, k)
+            if len(hijo.pairs) > 2 * self.d - 1:
+                self._dividir(nodo, i)
+            j = k
+
+    def delete_many(self, ids):
+        # Elimina un lote de ids y retorna sus Resultado en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.delete(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        self._delete_many(self.root, ordenados, 0, len(ordenados), orden, resultados)
+        self._ajustar_raiz()
+        return resultados
+
+    def _delete_many(self, nodo, ids, inicio, fin, orden, resultados):
+        if nodo.leaf:
+            i = 0
+            for j in range(inicio, fin):
+                id = ids[j]
+                i = self._slot(nodo.ids, id, i)
+                if i < len(nodo.ids) and nodo.ids[i] == id:
+                    nodo.ids.pop(i)
+                    resultados[orden[j]] = Resultado((True, self._nombre(nodo.pairs.pop(i))))
+            return
+        j = inicio
+        while j < fin:
+            i = self._slot(nodo.ids, ids[j])
+            if i < len(nodo.ids) and nodo.ids[i] == ids[j]:
+                # La clave está en este nodo: se fusionan los dos hijos que separa y se
+                # elimina dentro del hijo fusionado junto con el resto de su tramo
+                self._merge_children(nodo, i)
+                continue
+            k = fin_tramo(ids, nodo.ids[i], j, fin) if i < len(nodo.ids) else fin
+            hijo = nodo.children[i]
+            self._delete_many(hijo, ids, j, k, orden, resultados)
+            if len(hijo.pairs) > 2 * self.d - 1:
+                self._dividir(nodo, i)
+            elif len(hijo.pairs) < self.d - 1:
+                self._reparar(nodo, i)
+            j = k
+
+    def _dividir(self, nodo, i):
+        # Divide el hijo i desbordado en los nodos necesarios para que ninguno supere 2 * d - 1
+        # claves, con el mismo reparto que bulk_load; las claves intermedias suben a nodo
+        d = self.d
+        hijo = nodo.children[i]
+        pairs, ids, children = hijo.pairs, hijo.ids, hijo.children
+        separadores = []
+        separadores_ids = ids[:0]  # Mismo tipo que los ids del nodo (lista o array)
+        nuevos = []
+        pos = 0
+        for n, cantidad in enumerate(repartir(len(ids), 2 * d - 1, d - 1)):
+            if n:
+                separadores.append(pairs[pos])
+                separadores_ids.append(ids[pos])
+                pos += 1
+            parte = hijo if n == 0 else self._node_cls(d, leaf=hijo.leaf)
+            parte.pairs = pairs[pos:pos + cantidad]
+            parte.ids = ids[pos:pos + cantidad]
+            if not hijo.leaf:
+                parte.children = children[pos:pos + cantidad + 1]
+            if n:
+                nuevos.append(parte)
+            pos += cantidad
+        nodo.pairs[i:i] = separadores
+        nodo.ids[i:i] = separadores_ids
+        nodo.children[i + 1:i + 1] = nuevos
+
+    def _reparar(self, nodo, i):
+        # Fusiona el hijo i, que quedó con menos de d - 1 claves, con un hermano y vuelve a
+        # dividir el resultado si supera el máximo. Un nodo interno que quedó sin claves (con un
+        # solo hijo) no puede reparar a ese hijo: lo hace su padre al fusionarlo, en la unión
+        if len(nodo.children) == 1:
+            return
+        if i == len(nodo.children) - 1:
+            i -= 1
+        hijo = nodo.children[i]
+        union = len(hijo.children)  # Primer hijo que viene del hermano derecho
+        self._merge_children(nodo, i)
+        if not hijo.leaf:
+            for j in (union - 1, union):
+                if len(hijo.children[j].pairs) < self.d - 1:
+                    self._reparar(hijo, j)
+                    break
+        if len(hijo.pairs) > 2 * self.d - 1:
+            self._dividir(nodo, i)
+
+    def _ajustar_raiz(self):
+        # Tras un lote la raíz puede quedar desbordada (se divide hacia arriba) o vacía (baja un nivel)
+        while len(self.root.pairs) > 2 * self.d - 1:
+            raiz = self._node_cls(self.d, leaf=False)
+            raiz.children.append(self.root)
+            self._dividir(raiz, 0)
+            self.root = raiz
+        while len(self.root.pairs) == 0 and not self.root.leaf:
+            self.root = self.root.children[0]
+
+
+class TreeBCompacto(TreeB):
+    # Árbol B con el diseño compacto de nodos (ver almacenamiento)
+    _node_cls = BNodeCompacto
+    _registro = staticmethod(registro_compacto)
+    _nombre = staticmethod(nombre_compacto)
@@ -0,0 +1,264 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from operator import itemgetter
+
+import numpy as np
+
+from instantanea import TIPO_ARREGLO, escribir_instantanea, leer_instantanea
+from operaciones_lote import LOTE_MINIMO
+from protocolo import Resultado, NO_ENCONTRADO
+
+
+# Estructuras de referencia sin punteros, optimizadas para lectura: un arreglo ordenado de
+# claves int64 (búsqueda con np.searchsorted) y su variante con disposición de Eytzinger.
+# Permiten comparar los árboles con un índice plano.
+#
+# La base es inmutable entre reconstrucciones. Las inserciones esperan en una lista ordenada
+# de pendientes y las eliminaciones de la base se marcan como borradas; cuando los cambios
+# acumulados superan REBUILD_MINIMO o la fracción REBUILD_FRACCION de la base, se reconstruye
+# con una sola mezcla lineal. search_many y delete_many buscan todo el lote en la base de una
+# vez (vectorizado con NumPy).
+
+REBUILD_MINIMO = 1024
+REBUILD_FRACCION = 1 / 16
+SIN_CLAVE = np.iinfo(np.int64).max  # Relleno de las posiciones vacías del arreglo de Eytzinger
+
+
+class ArregloOrdenado:
+
+    def __init__(self):
+        self.claves = np.empty(0, dtype=np.int64)  # Base ordenada
+        self.nombres = np.empty(0, dtype=object)  # Nombre de cada clave de la base
+        self.borrados = set()  # Posiciones de la base eliminadas desde la última reconstrucción
+        self.ids_pendientes = []  # Inserciones desde la última reconstrucción, ordenadas
+        self.nombres_pendientes = []
+        self.reconstrucciones = 0
+
+    def __len__(self):
+        return len(self.claves) - len(self.borrados) + len(self.ids_pendientes)
+
+    def _rango_inferior(self, id):
+        # Primera posición de la base con clave >= id
+        return int(np.searchsorted(self.claves, id))
+
+    def _rangos_inferiores(self, ids):
+        # _rango_inferior de cada id de un arreglo int64, vectorizado
+        return np.searchsorted(self.claves, ids)
+
+    def _posicion(self, id, inicio):
+        # Primera posición viva de la base con clave id, a partir de su rango inferior
+        claves = self.claves
+        for i in range(inicio, len(claves)):
+            if claves[i] != id:
+                break
+            if i not in self.borrados:
+                return i
+        return None
+
+    def _pendiente(self, id):
+        i = bisect_left(self.ids_pendientes, id)
+        if i < len(self.ids_pendientes) and self.ids_pendientes[i] == id:
+            return i
+        return None
+
+    def search(self, id):
+        i = self._pendiente(id)
+        if i is not None:
+            return Resultado((True, self.nombres_pendientes[i]))
+        i = self._posicion(id, self._rango_inferior(id))
+        if i is not None:
+            return Resultado((True, self.nombres[i]))
+        return NO_ENCONTRADO
+
+    def insert(self, id, nombre):
+        i = bisect_right(self.ids_pendientes, id)
+        self.ids_pendientes.insert(i, id)
+        self.nombres_pendientes.insert(i, nombre)
+        self._quizas_reconstruir()
+        return Resultado((True, nombre))
+
+    def delete(self, id):
+        resultado = self._eliminar(id, None)
+        self._quizas_reconstruir()
+        return resultado
+
+    def _eliminar(self, id, inicio):
+        # Elimina una aparición de id (primero entre las pendientes); inicio es su rango
+        # inferior en la base si ya se calculó
+        i = self._pendiente(id)
+        if i is not None:
+            del self.ids_pendientes[i]
+            return Resultado((True, self.nombres_pendientes.pop(i)))
+        i = self._posicion(id, self._rango_inferior(id) if inicio is None else inicio)
+        if i is None:
+            return NO_ENCONTRADO
+        self.borrados.add(i)
+        return Resultado((True, self.nombres[i]))
+
+    def range(self, lo, hi):
+        # Genera los pares (id, nombre) con lo <= id <= hi en orden ascendente
+        inicio = self._rango_inferior(lo)
+        fin = int(np.searchsorted(self.claves, hi, side='right'))
+        base = ((id, self.nombres[i]) for i, id in enumerate(self.claves[inicio:fin].tolist(), inicio)
+                if i not in self.borrados)
+        p = bisect_left(self.ids_pendientes, lo)
+        q = bisect_right(self.ids_pendientes, hi)
+        yield from merge(base, zip(self.ids_pendientes[p:q], self.nombres_pendientes[p:q]), key=itemgetter(0))
+
+    def search_many(self, ids):
+        # Retorna el Resultado de cada id, en el orden del lote, con una sola búsqueda vectorizada
+        if len(ids) < LOTE_MINIMO:
+            return [self.search(id) for id in ids]
+        consultas = np.asarray(ids, dtype=np.int64)
+        posiciones = self._rangos_inferiores(consultas)
+        encontrados = posiciones < len(self.claves)
+        encontrados[encontrados] = self.claves[posiciones[encontrados]] == consultas[encontrados]
+        resultados = [NO_ENCONTRADO] * len(ids)
+        aciertos = np.flatnonzero(encontrados)
+        for j, i, nombre in zip(aciertos.tolist(), posiciones[aciertos].tolist(),
+                                self.nombres[posiciones[aciertos]].tolist()):
+            if i in self.borrados:
+                # Clave repetida o borrada: sigue con las siguientes apariciones
+                i = self._posicion(ids[j], i)
+                if i is None:
+                    continue
+                nombre = self.nombres[i]
+            resultados[j] = Resultado((True, nombre))
+        if self.ids_pendientes:
+            for j, id in enumerate(ids):
+                i = self._pendiente(id)
+                if i is not None:
+                    resultados[j] = Resultado((True, self.nombres_pendientes[i]))
+        return resultados
+
+    def insert_many(self, pares):
+        # Inserta un lote de pares (id, nombre) y retorna sus Resultado en el orden del lote
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        # El ordenamiento es estable: las nuevas quedan después de las pendientes con la misma clave
+        pendientes = list(zip(self.ids_pendientes, self.nombres_pendientes))
+        pendientes.extend(pares)
+        pendientes.sort(key=itemgetter(0))
+        self.ids_pendientes = [id for id, _ in pendientes]
+        self.nombres_pendientes = [nombre for _, nombre in pendientes]
+        self._quizas_reconstruir()
+        return [Resultado((True, nombre)) for _, nombre in pares]
+
+    def delete_many(self, ids):
+        # Elimina un lote de ids y retorna sus Resultado en el orden del lote. Los rangos
+        # inferiores se calculan juntos; la base no cambia hasta la reconstrucción del final
+        if len(ids) < LOTE_MINIMO:
+            return [self.delete(id) for id in ids]
+        posiciones = self._rangos_inferiores(np.asarray(ids, dtype=np.int64)).tolist()
+        resultados = [self._eliminar(id, inicio) for id, inicio in zip(ids, posiciones)]
+        self._quizas_reconstruir()
+        return resultados
+
+    def _quizas_reconstruir(self):
+        cambios = len(self.ids_pendientes) + len(self.borrados)
+        if cambios > REBUILD_MINIMO and cambios > REBUILD_FRACCION * len(self.claves):
+            self.reconstruir()
+
+    def reconstruir(self):
+        # Mezcla la base viva con las pendientes (ambas ordenadas) en O(n)
+        claves, nombres = self.claves, self.nombres
+        if self.borrados:
+            vivos = np.ones(len(claves), dtype=bool)
+            vivos[np.fromiter(self.borrados, dtype=np.int64, count=len(self.borrados))] = False
+            claves, nombres = claves[vivos], nombres[vivos]
+        pendientes = np.array(self.ids_pendientes, dtype=np.int64)
+        # Cada pendiente va después de las claves iguales de la base y de las pendientes anteriores
+        destino = np.searchsorted(claves, pendientes, side='right') + np.arange(len(pendientes))
+        de_base = np.ones(len(claves) + len(pendientes), dtype=bool)
+        de_base[destino] = False
+        self.claves = np.empty(len(de_base), dtype=np.int64)
+        self.claves[destino] = pendientes
+        self.claves[de_base] = claves
+        self.nombres = np.empty(len(de_base), dtype=object)
+        self.nombres[destino] = self.nombres_pendientes
+        self.nombres[de_base] = nombres
+        self.borrados = set()
+        self.ids_pendientes = []
+        self.nombres_pendientes = []
+        self.reconstrucciones += 1
+        self._indexar()
+
+    def _indexar(self):
+        # Estructura auxiliar de búsqueda sobre la base recién reconstruida (ninguna en el arreglo ordenado)
+        pass
+
+    def rebuild_stats(self):
+        # Estado de la base y de los cambios que esperan la próxima reconstrucción
+        return {
+            'Claves': len(self),
+            'Base': len(self.claves),
+            'Pendientes': len(self.ids_pendientes),
+            'Borrados': len(self.borrados),
+            'Reconstrucciones': self.reconstrucciones,
+        }
+
+    def dump(self, ruta):
+        # Guarda la base reconstruida como instantánea sin nodos (ver instantanea)
+        if self.ids_pendientes or self.borrados:
+            self.reconstruir()
+        escribir_instantanea(ruta, TIPO_ARREGLO, 0, array('I'), array('q', self.claves.tobytes()),
+                             self.nombres.tolist())
+
+    @classmethod
+    def load(cls, ruta):
+        _, _, ids, nombres, _ = leer_instantanea(ruta, TIPO_ARREGLO)
+        estructura = cls()
+        estructura.claves = np.array(ids, dtype=np.int64)
+        estructura.nombres = np.empty(len(nombres), dtype=object)
+        estructura.nombres[:] = nombres
+        estructura._indexar()
+        return estructura
+
+
+class ArregloEytzinger(ArregloOrdenado):
+    # Las claves de la base además se copian en orden por niveles de un árbol binario
+    # completo (disposición de Eytzinger, raíz en la posición 1, hijos de k en 2k y 2k + 1).
+    # Cada descenso recorre posiciones que crecen siempre, y las primeras quedan juntas en caché.
+    # El árbol se completa con SIN_CLAVE hasta 2^altura - 1 posiciones, así que todos los
+    # descensos tienen la misma cantidad de pasos y el lote entero baja a la vez.
+
+    def __init__(self):
+        super().__init__()
+        self._indexar()
+
+    def _indexar(self):
+        n = len(self.claves)
+        self.altura = n.bit_length()  # Menor altura con 2^altura - 1 >= n
+        self.eytzinger = np.full(1 << self.altura, SIN_CLAVE, dtype=np.int64)
+        posiciones = np.arange(1, 1 << self.altura, dtype=np.int64)
+        rangos = self._rangos(posiciones)
+        reales = rangos < n
+        self.eytzinger[posiciones[reales]] = self.claves[rangos[reales]]
+
+    def _rangos(self, posiciones):
+        # Posición en la base ordenada (recorrido inorder) de cada posición del árbol;
+        # len(claves) para el relleno y para la posición 0 (todas las claves menores)
+        nivel = np.frexp(posiciones.astype(np.float64))[1].astype(np.int64) - 1
+        rangos = ((2 * (posiciones - (1 << np.maximum(nivel, 0))) + 1) << np.maximum(self.altura - 1 - nivel, 0)) - 1
+        return np.where((posiciones > 0) & (rangos < len(self.claves)), rangos, len(self.claves))
+
+    def _rango_inferior(self, id):
+        eytzinger = self.eytzinger
+        k = 1
+        for _ in range(self.altura):
+            k = 2 * k + (eytzinger.item(k) < id)
+        k >>= (~k & (k + 1)).bit_length()  # Deshace los pasos a la derecha del final del descenso
+        if k == 0:
+            return len(self.claves)
+        nivel = k.bit_length() - 1
+        rango = ((2 * (k - (1 << nivel)) + 1) << (self.altura - 1 - nivel)) - 1
+        return min(rango, len(self.claves))
+
+    def _rangos_inferiores(self, ids):
+        eytzinger = self.eytzinger
+        k = np.ones(len(ids), dtype=np.int64)
+        for _ in range(self.altura):
+            k = 2 * k + (eytzinger[k] < ids)
+        k //= (~k & (k + 1)) << 1
+        return self._rangos(k)
@@ -1,54 +1,36 @@
 from __future__ import print_function
 
+import math
+from array import array
+
+from carga_masiva import validar_orden
+from instantanea import TIPO_AVL, HIJO_IZQUIERDO, HIJO_DERECHO, escribir_instantanea, leer_instantanea
+from protocolo import Resultado, NO_ENCONTRADO
+from operaciones_lote import LOTE_MINIMO, ordenar_lote
+
 # Definición de la clase Nodo para el árbol AVL
 class Node2:
+    __slots__ = ('label', 'name', 'parent', 'left', 'right', 'height')  # Sin __dict__ por instancia
+
     def __init__(self, label, name: str):
         self.label = label  # Etiqueta del nodo (ID)
         self.name = name  # Nombre del nodo
-        self._parent = None  # Referencia al padre del nodo
-        self._left = None  # Referencia al hijo izquierdo del nodo
-        self._right = None  # Referencia al hijo derecho del nodo
-        self.height = 0  # Altura del nodo
-
-    # Propiedad para acceder al hijo derecho
-    @property
-    def right(self):
-        return self._right
-
-    # Setter del hijo derecho
-    @right.setter
-    def right(self, node):
-        if node is not None:
-            node._parent = self
-        self._right = node
-
-    # Propiedad para acceder al hijo izquierdo
-    @property
-    def left(self):
-        return self._left
-
-    # Setter del hijo izquierdo
-    @left.setter
-    def left(self, node):
-        if node is not None:
-            node._parent = self
-        self._left = node
-
-    # Propiedad para acceder al nodo padre
-    @property
-    def parent(self):
-        return self._parent
-
-    # Setter del nodo padre
-    @parent.setter
-    def parent(self, node):
-        self._parent = node
-        if node is not None:
-            self.height = self.parent.height + 1  # Actualiza la altura del nodo actual
-        else:
-            self.height = 0  # Si el nodo dado es None, la altura se vuelve a 0
+        self.parent = None  # Referencia al padre del nodo
+        self.left = None  # Referencia al hijo izquierdo del nodo
+        self.right = None  # Referencia al hijo derecho del nodo
+        self.height = 1  # Altura del subárbol que tiene a este nodo como raíz (una hoja mide 1)
+
+
+def _height(node):
+    # Altura de un subárbol, 0 si está vacío
+    return node.height if node is not None else 0
+
 
 class AVL2:
+    # Los hijos se asignan como atributos simples; quien enlaza un nodo también
+    # actualiza su 'parent'. Cada nodo guarda la altura de su subárbol, que se
+    # recalcula en el camino de vuelta hacia la raíz tras insertar o eliminar.
+
     def __init__(self):
         self.root = None  # Nodo raíz
         self.size = 0  # Tamaño inicial del árbol
@@ -58,177 +40,393 @@ class AVL2:
 
         if self.root is None:
             self.root = node  # Si el árbol está vacío, se crea el nodo raíz
-            self.root.height = 0  # Se inicializa la altura de la raíz como 0
             self.size = 1  # Se actualiza el tamaño del árbol
+            return Resultado((True, n))
+
+        # Desciende iterativamente hasta el lugar de inserción
+        dad_node = None
+        curr_node = self.root
+        while curr_node is not None:
+            dad_node = curr_node
+            if value < curr_node.label:
+                curr_node = curr_node.left  # Se desplaza hacia la izquierda, si la ID es menor
+            else:
+                curr_node = curr_node.right  # Se desplaza hacia la derecha del árbol, si la ID es mayor
+
+        node.parent = dad_node
+        if value < dad_node.label:
+            dad_node.left = node  # Se inserta como hijo izquierdo
         else:
-            dad_node = None
-            curr_node = self.root  # Se ubica en el nodo raíz
-
-            while True:
-                if curr_node is not None:  # Condición que verifica que el nodo actual exista
-                    dad_node = curr_node  # Establece el nodo actual como nodo padre
-                    if node.label < curr_node.label:
-                        curr_node = curr_node.left  # Se desplaza hacia la izquierda, si la ID es menor
-                    else:
-                        curr_node = curr_node.right  # Se desplaza hacia la derecha del árbol, si la ID es mayor
-                else:
-                    node.height = dad_node.height
-                    dad_node.height += 1  # Se actualiza la altura de los nodos
-                    if node.label < dad_node.label:  # Se verifica si la ID del nodo es menor o mayor que la del padre
-                        dad_node.left = node  # Se inserta como hijo izquierdo
-                    else:
-                        dad_node.right = node  # Se inserta como hijo derecho
-                    self.rebalance(node)  # Se rebalancea el árbol
-                    self.size += 1  # Se aumenta el tamaño del árbol
-                    break
+            dad_node.right = node  # Se inserta como hijo derecho
+        self.size += 1  # Se aumenta el tamaño del árbol
+        self.rebalance(dad_node)  # Actualiza alturas y rebalancea hacia la raíz
+        return Resultado((True, n))
+
+    @classmethod
+    def bulk_load(cls, sorted_pairs, fill_factor=1.0):
+        # Construye un árbol perfectamente balanceado en O(n) a partir de pares ordenados.
+        # fill_factor se acepta por uniformidad con los árboles B; cada nodo AVL guarda una sola clave.
+        pares = validar_orden(sorted_pairs)
+        tree = cls()
+
+        def construir(inicio, fin, parent):
+            # Toma el elemento central como raíz del subárbol [inicio, fin)
+            if inicio >= fin:
+                return None
+            medio = (inicio + fin) // 2
+            node = Node2(pares[medio][0], pares[medio][1])
+            node.parent = parent
+            node.left = construir(inicio, medio, node)
+            node.right = construir(medio + 1, fin, node)
+            node.height = max(_height(node.left), _height(node.right)) + 1
+            return node
+
+        tree.root = construir(0, len(pares), None)
+        tree.size = len(pares)
+        return tree
+
+    def dump(self, ruta):
+        # Guarda el árbol en una instantánea binaria por niveles (ver instantanea): de cada nodo,
+        # qué hijos tiene, su id y su nombre. Las alturas se recalculan al cargar.
+        forma = array('B')
+        ids = array('q')
+        nombres = []
+        nodos = [self.root] if self.root is not None else []
+        for node in nodos:  # La lista crece con los hijos mientras se recorre: orden por niveles
+            hijos = 0
+            if node.left is not None:
+                hijos |= HIJO_IZQUIERDO
+                nodos.append(node.left)
+            if node.right is not None:
+                hijos |= HIJO_DERECHO
+                nodos.append(node.right)
+            forma.append(hijos)
+            ids.append(node.label)
+            nombres.append(node.name)
+        escribir_instantanea(ruta, TIPO_AVL, 0, forma, ids, nombres)
+
+    @classmethod
+    def load(cls, ruta):
+        # Reconstruye un árbol guardado con dump con una sola lectura del archivo
+        _, forma, ids, nombres, _ = leer_instantanea(ruta, TIPO_AVL)
+        tree = cls()
+        nodos = [Node2(label, name) for label, name in zip(ids, nombres)]
+        hijo = 1
+        for node, hijos in zip(nodos, forma):
+            if hijos & HIJO_IZQUIERDO:
+                node.left = nodos[hijo]
+                node.left.parent = node
+                hijo += 1
+            if hijos & HIJO_DERECHO:
+                node.right = nodos[hijo]
+                node.right.parent = node
+                hijo += 1
+        # En orden por niveles inverso cada hijo aparece antes que su padre
+        for node in reversed(nodos):
+            node.height = max(_height(node.left), _height(node.right)) + 1
+        tree.root = nodos[0] if nodos else None
+        tree.size = len(nodos)
+        return tree
 
     def rebalance(self, node):
+        # Recorre el camino desde node hasta la raíz actualizando la altura de cada
+        # subárbol y rotando donde el factor de balance supere 1. Se detiene cuando
+        # la altura de un subárbol balanceado no cambia, porque sus ancestros ya no se ven afectados.
         n = node
+        while n is not None:
+            left = n.left
+            right = n.right
+            height_left = left.height if left is not None else 0
+            height_right = right.height if right is not None else 0
 
-        while n is not None:  # Loop que itera hasta que el nodo actual sea nulo
-            height_right = n.right.height if n.right is not None else 0
-            height_left = n.left.height if n.left is not None else 0
-
-            if abs(height_left - height_right) > 1:  # Se verifica si la diferencia de altura es mayor que 1
-                if height_left > height_right:
-                    left_child = n.left
-                    h_right = left_child.right.height if left_child.right is not None else 0
-                    h_left = left_child.left.height if left_child.left is not None else 0
-                    if h_left > h_right:  # Si la altura izquierda es mayor que la derecha
-                        self.rotate_right(n)  # Rotación simple a la derecha
-                    else:
-                        self.double_rotate_right(n)  # Rotación doble a la derecha
+            if height_left - height_right > 1:
+                if _height(left.left) >= _height(left.right):
+                    n = self.rotate_right(n)  # Rotación simple a la derecha
                 else:
-                    right_child = n.right
-                    h_right = right_child.right.height if right_child.right is not None else 0
-                    h_left = right_child.left.height if right_child.left is not None else 0
-                    if h_left > h_right:  # Si la altura izquierda es mayor que la derecha
-                        self.double_rotate_left(n)  # Rotación doble a la izquierda
-                    else:
-                        self.rotate_left(n)  # Rotación simple a la izquierda
-                break
+                    n = self.double_rotate_right(n)  # Rotación doble a la derecha
+            elif height_right - height_left > 1:
+                if _height(right.right) >= _height(right.left):
+                    n = self.rotate_left(n)  # Rotación simple a la izquierda
+                else:
+                    n = self.double_rotate_left(n)  # Rotación doble a la izquierda
+            else:
+                new_height = (height_left if height_left > height_right else height_right) + 1
+                if new_height == n.height:
+                    return  # La altura no cambió: el resto del camino ya está balanceado
+                n.height = new_height
             n = n.parent
 
+    def _replace_child(self, parent, old, new):
+        # Reemplaza el hijo 'old' de 'parent' por 'new' (o la raíz si no hay padre)
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+        if new is not None:
+            new.parent = parent
+
     def rotate_left(self, node):
-        # Realiza una rotación a la izquierda en el nodo dado.
+        # Realiza una rotación a la izquierda en el nodo dado y retorna la nueva raíz del subárbol.
         new_root = node.right
-        if new_root is None:
-            return  # No se puede realizar la rotación si no hay hijo derecho
 
         # Reasigna los hijos del nuevo nodo raíz
         node.right = new_root.left
         if new_root.left is not None:
             new_root.left.parent = node
-        new_root.parent = node.parent
-        
-        # Actualiza el padre del nuevo nodo raíz
-        if node.parent is None:
-            self.root = new_root  # Si el nodo es la raíz, actualiza la raíz del árbol
-        elif node == node.parent.left:
-            node.parent.left = new_root  # El nodo original es hijo izquierdo
-        else:
-            node.parent.right = new_root  # El nodo original es hijo derecho
-        
-        # Completa la rotación
+
+        # Actualiza el padre del nuevo nodo raíz y completa la rotación
+        self._replace_child(node.parent, node, new_root)
         new_root.left = node
         node.parent = new_root
 
+        # Solo cambian las alturas de los dos nodos rotados
+        node.height = max(_height(node.left), _height(node.right)) + 1
+        new_root.height = max(node.height, _height(new_root.right)) + 1
+        return new_root
+
     def rotate_right(self, node):
-        # Realiza una rotación a la derecha en el nodo dado.
+        # Realiza una rotación a la derecha en el nodo dado y retorna la nueva raíz del subárbol.
         new_root = node.left
-        if new_root is None:
-            return  # No se puede realizar la rotación si no hay hijo izquierdo
 
         # Reasigna los hijos del nuevo nodo raíz
         node.left = new_root.right
         if new_root.right is not None:
             new_root.right.parent = node
-        new_root.parent = node.parent
-        
-        # Actualiza el padre del nuevo nodo raíz
-        if node.parent is None:
-            self.root = new_root  # Si el nodo es la raíz, actualiza la raíz del árbol
-        elif node == node.parent.right:
-            node.parent.right = new_root  # El nodo original es hijo derecho
-        else:
-            node.parent.left = new_root  # El nodo original es hijo izquierdo
-        
-        # Completa la rotación
+
+        # Actualiza el padre del nuevo nodo raíz y completa la rotación
+        self._replace_child(node.parent, node, new_root)
         new_root.right = node
         node.parent = new_root
 
+        # Solo cambian las alturas de los dos nodos rotados
+        node.height = max(_height(node.left), _height(node.right)) + 1
+        new_root.height = max(_height(new_root.left), node.height) + 1
+        return new_root
+
     def double_rotate_left(self, node):
         # Realiza una rotación doble a la izquierda en el nodo dado.
-        # Primero rota a la derecha en el hijo derecho del nodo
-        if node.right is not None:
-            self.rotate_right(node.right)
-        # Luego rota a la izquierda en el nodo original
-        self.rotate_left(node)
+        # Primero rota a la derecha en el hijo derecho del nodo y luego a la izquierda en el nodo
+        self.rotate_right(node.right)
+        return self.rotate_left(node)
 
     def double_rotate_right(self, node):
         # Realiza una rotación doble a la derecha en el nodo dado.
-        # Primero rota a la izquierda en el hijo izquierdo del nodo
-        if node.left is not None:
-            self.rotate_left(node.left)
-        # Luego rota a la derecha en el nodo original
-        self.rotate_right(node)
+        # Primero rota a la izquierda en el hijo izquierdo del nodo y luego a la derecha en el nodo
+        self.rotate_left(node.left)
+        return self.rotate_right(node)
 
     def search(self, value):
-        # Busca un valor en el árbol y retorna el nodo y un booleano indicando si se encontró.
+        # Busca un valor en el árbol y retorna si se encontró y el nombre asociado
         current = self.root
         while current is not None:
             if value == current.label:
-                return current, True  # Retorna el nodo y True si se encontró el valor
+                return Resultado((True, current.name))
             elif value < current.label:
                 current = current.left  # Busca en el subárbol izquierdo
             else:
                 current = current.right  # Busca en el subárbol derecho
-        return None, False  # Retorna None y False si el valor no se encontró
+        return NO_ENCONTRADO
 
+    def _find(self, value):
+        # Igual que search, pero retorna el nodo (o None) para poder eliminarlo
+        current = self.root
+        while current is not None:
+            if value == current.label:
+                return current
+            elif value < current.label:
+                current = current.left  # Busca en el subárbol izquierdo
+            else:
+                current = current.right  # Busca en el subárbol derecho
+        return None
 
     def delete(self, value):
-        node, found = self.search(value)  # Busca el nodo a eliminar
-        if not found:
-            return None, False
+        node = self._find(value)  # Busca el nodo a eliminar
+        if node is None:
+            return NO_ENCONTRADO
 
         self._delete_node(node)
         self.size -= 1
-        return node, True
+        return Resultado((True, node.name))
+
+    # Operaciones en lote: el lote se ordena una vez y cada búsqueda parte del último nodo
+    # visitado (finger search) en lugar de la raíz. Sube solo hasta el primer ancestro cuyo
+    # subárbol contiene el valor, de modo que las claves vecinas comparten el camino.
+
+    def _finger(self, node, value):
+        # node es un nodo del árbol con clave <= value (o None). Sube por los enlaces derechos
+        # hasta el ancestro que acota el subárbol por arriba; si esa cota supera value, el
+        # subárbol de node contiene el valor y el descenso puede empezar ahí
+        if node is None:
+            return self.root
+        while True:
+            top = node
+            while top.parent is not None and top is top.parent.right:
+                top = top.parent
+            parent = top.parent
+            if parent is None or value < parent.label:
+                return node
+            node = parent
+
+    def search_many(self, values):
+        # Retorna el Resultado de cada valor, en el orden del lote
+        if len(values) < LOTE_MINIMO:
+            return [self.search(value) for value in values]
+        orden, ordenados = ordenar_lote(values)
+        resultados = [NO_ENCONTRADO] * len(values)
+        finger = None  # Último nodo visitado con clave <= valor actual
+        for j, value in enumerate(ordenados):
+            current = self._finger(finger, value)
+            while current is not None:
+                if value == current.label:
+                    finger = current
+                    resultados[orden[j]] = Resultado((True, current.name))
+                    break
+                elif value < current.label:
+                    current = current.left
+                else:
+                    finger = current
+                    current = current.right
+        return resultados
+
+    def insert_many(self, pares):
+        # Inserta un lote de pares (value, n) y retorna sus Resultado en el orden del lote
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        orden, _ = ordenar_lote([value for value, _ in pares])
+        finger = None
+        for p in orden:
+            value, n = pares[p]
+            node = Node2(value, n)
+            dad_node = None
+            curr_node = self._finger(finger, value)
+            while curr_node is not None:
+                dad_node = curr_node
+                if value < curr_node.label:
+                    curr_node = curr_node.left
+                else:
+                    curr_node = curr_node.right
+            if dad_node is None:
+                self.root = node
+            else:
+                node.parent = dad_node
+                if value < dad_node.label:
+                    dad_node.left = node
+                else:
+                    dad_node.right = node
+            self.size += 1
+            self.rebalance(dad_node)
+            finger = node  # Las rotaciones no lo sacan del árbol y su clave no supera la siguiente
+        return [Resultado((True, n)) for _, n in pares]
+
+    def delete_many(self, values):
+        # Elimina un lote de valores y retorna sus Resultado en el orden del lote
+        if len(values) < LOTE_MINIMO:
+            return [self.delete(value) for value in values]
+        orden, ordenados = ordenar_lote(values)
+        resultados = [NO_ENCONTRADO] * len(values)
+        finger = None
+        for j, value in enumerate(ordenados):
+            current = self._finger(finger, value)
+            while current is not None and value != current.label:
+                if value < current.label:
+                    current = current.left
+                else:
+                    finger = current
+                    current = current.right
+            if current is not None:
+                # El finger es un ancestro con clave menor: sigue en el árbol tras eliminar
+                self._delete_node(current)
+                self.size -= 1
+                resultados[orden[j]] = Resultado((True, current.name))
+        return resultados
 
     def _delete_node(self, node):
-        if node.left is None and node.right is None:
-            # Caso 1: El nodo no tiene hijos
-            self._replace_node_in_parent(node, None)
-        elif node.left is None:
-            # Caso 2: El nodo tiene un solo hijo (derecho)
-            self._replace_node_in_parent(node, node.right)
+        parent = node.parent
+        if node.left is None:
+            # Caso 1 y 2: El nodo no tiene hijos o solo tiene hijo derecho
+            self._replace_child(parent, node, node.right)
+            retrace = parent
         elif node.right is None:
             # Caso 2: El nodo tiene un solo hijo (izquierdo)
-            self._replace_node_in_parent(node, node.left)
+            self._replace_child(parent, node, node.left)
+            retrace = parent
         else:
             # Caso 3: El nodo tiene dos hijos
-            # Encuentra el sucesor inorder (el nodo más pequeño en el subárbol derecho)
+            # El sucesor inorder (el nodo más pequeño en el subárbol derecho) ocupa su lugar
             successor = self._find_min(node.right)
-            node.label = successor.label
-            node.name = successor.name
-            self._delete_node(successor)  # Elimina el sucesor
-
-        # Rebala el árbol a partir del padre del nodo eliminado
-        self.rebalance(node.parent)
-
-    def _replace_node_in_parent(self, node, new_value):
-        if node.parent is not None:
-            if node == node.parent.left:
-                node.parent.left = new_value
+            if successor.parent is node:
+                retrace = successor
             else:
-                node.parent.right = new_value
-        else:
-            self.root = new_value
-        if new_value is not None:
-            new_value.parent = node.parent
+                retrace = successor.parent
+                self._replace_child(successor.parent, successor, successor.right)
+                successor.right = node.right
+                node.right.parent = successor
+            successor.left = node.left
+            node.left.parent = successor
+            successor.height = node.height
+            self._replace_child(parent, node, successor)
+
+        node.parent = node.left = node.right = None
+        # Rebalancea el árbol desde el punto más bajo que cambió hasta la raíz
+        self.rebalance(retrace)
 
     def _find_min(self, node):
         current = node
         while current.left is not None:
             current = current.left
         return current
+
+    def audit(self):
+        # Recorre todo el árbol y verifica las alturas almacenadas, el factor de balance
+        # y el orden de las claves. La altura se compara con la cota de un árbol AVL:
+        # h < 1.4405 * log2(n + 2) - 0.3277
+        altura_real = {}
+        balance_maximo = 0
+        alturas_correctas = True
+        ordenado = True
+        anterior = None
+
+        # Recorrido inorder iterativo para verificar el orden de las claves
+        pila = []
+        current = self.root
+        while pila or current is not None:
+            while current is not None:
+                pila.append(current)
+                current = current.left
+            current = pila.pop()
+            if anterior is not None and current.label < anterior:
+                ordenado = False
+            anterior = current.label
+            current = current.right
+
+        # Recorrido postorden iterativo para calcular las alturas reales
+        pila = [(self.root, False)] if self.root is not None else []
+        while pila:
+            node, visitado = pila.pop()
+            if not visitado:
+                pila.append((node, True))
+                if node.right is not None:
+                    pila.append((node.right, False))
+                if node.left is not None:
+                    pila.append((node.left, False))
+                continue
+            h_left = altura_real.pop(id(node.left), 0) if node.left is not None else 0
+            h_right = altura_real.pop(id(node.right), 0) if node.right is not None else 0
+            altura_real[id(node)] = max(h_left, h_right) + 1
+            balance_maximo = max(balance_maximo, abs(h_left - h_right))
+            if node.height != altura_real[id(node)]:
+                alturas_correctas = False
+
+        altura = altura_real.get(id(self.root), 0) if self.root is not None else 0
+        limite = 1.4405 * math.log2(self.size + 2) - 0.3277
+        return {
+            'Nodos': self.size,
+            'Altura': altura,
+            'Altura_Minima': math.ceil(math.log2(self.size + 1)),
+            'Altura_Limite': limite,
+            'Balance_Maximo': balance_maximo,
+            'Alturas_Correctas': alturas_correctas,
+            'Valido': ordenado and alturas_correctas and balance_maximo <= 1 and altura < limite,
+        }
@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from metricas import bytes_por_clave
+from cache_simulado import crear_cache
+from estructuras import crear_estructura
+from instrumentacion import instrumentar
+from paralelo import traza_compilada
+from rendimiento import MedicionThroughput
+from temporizador import Temporizador, reloj
+from traza_binaria import abrir_traza
+
+
+# Barrido de grados: cada combinación (grado, estructura) se ejecuta en un proceso del pool
+# sobre la misma traza compilada, en modo throughput, y se reporta su rendimiento, altura,
+# llenado y memoria para elegir el grado de los árboles B, B+ y B*. Con una caché simulada
+# (politica, paginas) se estima además la E/S por operación si cada nodo fuera una página;
+# en ese caso los tiempos incluyen el costo de la simulación.
+
+ESTRUCTURAS_BARRIDO = ('Arbol B', 'Arbol B+', 'Arbol B*')
+
+
+def parsear_grados(texto):
+    # Convierte '2,4,8' o rangos 'inicio-fin' e 'inicio-fin:paso' (inclusivos) en una lista de grados
+    grados = []
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if '-' in parte:
+            limites, _, paso = parte.partition(':')
+            inicio, fin = (int(valor) for valor in limites.split('-', 1))
+            grados.extend(range(inicio, fin + 1, int(paso) if paso else 1))
+        else:
+            grados.append(int(parte))
+    if not grados or any(grado < 2 for grado in grados):
+        raise ValueError(f"Lista de grados inválida: {texto!r} (cada grado debe ser un entero mayor que 1)")
+    return sorted(set(grados))
+
+
+def medir_grado(tree_name, degree, ruta_traza, cache=None):
+    # Proceso trabajador: replay en modo throughput de una estructura con un grado
+    inicio = reloj()
+    lector = abrir_traza(ruta_traza)
+    tree = crear_estructura(tree_name, degree)
+    if cache:
+        instrumentar(tree, crear_cache(*cache))
+    medicion = MedicionThroughput({tree_name: tree}, Temporizador())
+    medicion.ejecutar(lector)
+    filas = medicion.resumen()
+    operaciones = sum(fila['Operaciones'] for fila in filas)
+    tiempo = sum(fila['Tiempo(s)'] for fila in filas)
+    stats = tree.structure_stats()
+    fila = {
+        'Grado': degree,
+        'Estructura': tree_name,
+        'Operaciones': operaciones,
+        'Operaciones_Por_Segundo': operaciones / tiempo if tiempo else 0.0,
+        'Ns_Por_Operacion': {fila['Operacion']: fila['Ns_Por_Operacion'] for fila in filas},
+        'Altura': stats['Altura'],
+        'Llenado_Promedio': stats['Llenado_Promedio'],
+        'Bytes_Por_Clave': bytes_por_clave(tree, stats['Claves']),
+        'Tiempo(s)': (reloj() - inicio) / 1e9,
+    }
+    if cache:
+        fila['ES_Por_Operacion'] = sum(contador.fallos for contador in tree.contadores.values()) / max(operaciones, 1)
+    return fila
+
+
+def barrido_grados(ruta_archivo_op, grados, procesos=None, cache=None):
+    # Ejecuta todas las combinaciones en un pool de procesos y retorna las filas ordenadas por grado
+    with traza_compilada(ruta_archivo_op) as ruta_traza:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = [pool.submit(medir_grado, tree_name, degree, ruta_traza, cache)
+                       for degree in grados for tree_name in ESTRUCTURAS_BARRIDO]
+            return [futuro.result() for futuro in futuros]
@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+from arbolb import TreeB
+from bplus import BPlusTree
+from bstar import BStarTree
+from busqueda_nodo import buscar_slot_lineal, buscar_slot_derecha_lineal
+
+
+# Benchmark que compara la búsqueda lineal contra la binaria (bisect) del slot
+# dentro de un nodo, primero aislada y luego en búsquedas completas sobre cada árbol.
+
+
+def variante_lineal(cls):
+    # Crea una subclase del árbol que usa la búsqueda lineal original dentro de cada nodo
+    return type(cls.__name__ + "Lineal", (cls,), {
+        '_slot': staticmethod(buscar_slot_lineal),
+        '_slot_derecha': staticmethod(buscar_slot_derecha_lineal),
+    })
+
+
+def medir_slot(funcion, ids, consultas):
+    # Tiempo promedio (ns) de una búsqueda de slot sobre un nodo lleno
+    inicio = time.perf_counter()
+    for id in consultas:
+        funcion(ids, id)
+    return (time.perf_counter() - inicio) * 1e9 / len(consultas)
+
+
+def medir_arbol(tree, consultas):
+    # Tiempo promedio (ns) de una búsqueda completa en el árbol
+    search = tree.search
+    inicio = time.perf_counter()
+    for id in consultas:
+        search(id)
+    return (time.perf_counter() - inicio) * 1e9 / len(consultas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda lineal vs binaria del slot en los árboles B")
+    parser.add_argument('--grados', default="2,4,8,16,32,64,128,256",
+                        help="Lista de grados separados por coma")
+    parser.add_argument('--claves', type=int, default=200000, help="Cantidad de claves por árbol")
+    parser.add_argument('--consultas', type=int, default=50000, help="Cantidad de búsquedas medidas")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    grados = [int(g) for g in args.grados.split(',')]
+    pares = [(i * 2, f"N{i}") for i in range(args.claves)]
+    consultas = [rng.randrange(2 * args.claves) for _ in range(args.consultas)]
+
+    print(f"{'Grado':>6} {'Estructura':<10} {'Lineal(ns)':>12} {'Binaria(ns)':>12} {'Aceleracion':>12}")
+    for grado in grados:
+        # Búsqueda aislada sobre un nodo lleno de 2 * grado - 1 claves
+        ids = [i * 2 for i in range(2 * grado - 1)]
+        en_nodo = [rng.randrange(4 * grado) for _ in range(args.consultas)]
+        lineal = medir_slot(buscar_slot_lineal, ids, en_nodo)
+        binaria = medir_slot(TreeB._slot, ids, en_nodo)
+        print(f"{grado:>6} {'Nodo':<10} {lineal:>12.1f} {binaria:>12.1f} {lineal / binaria:>11.2f}x")
+
+        for nombre, cls in (("Arbol B", TreeB), ("Arbol B+", BPlusTree), ("Arbol B*", BStarTree)):
+            binario = cls.bulk_load(pares, grado)
+            lineal_tree = variante_lineal(cls).bulk_load(pares, grado)
+            lineal = medir_arbol(lineal_tree, consultas)
+            binaria = medir_arbol(binario, consultas)
+            print(f"{grado:>6} {nombre:<10} {lineal:>12.1f} {binaria:>12.1f} {lineal / binaria:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
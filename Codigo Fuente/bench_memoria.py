@@ -0,0 +1,44 @@
+import argparse
+import random
+
+from arbolb import TreeB, TreeBCompacto
+from bplus import BPlusTree, BPlusTreeCompacto
+from bstar import BStarTree, BStarTreeCompacto
+from metricas import bytes_por_clave
+
+
+# Benchmark que compara la memoria por clave del diseño de nodos por objetos
+# (Node o tupla por clave) contra el diseño compacto (ids en array('q')).
+
+ESTRUCTURAS = [
+    ("Arbol B", TreeB, TreeBCompacto),
+    ("Arbol B+", BPlusTree, BPlusTreeCompacto),
+    ("Arbol B*", BStarTree, BStarTreeCompacto),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes por clave de cada diseño de nodo")
+    parser.add_argument('--claves', type=int, default=200000, help="Cantidad de claves por árbol")
+    parser.add_argument('--grado', type=int, default=16, help="Grado de los árboles")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    # Inserciones en orden aleatorio para obtener el llenado típico de cada árbol
+    ids = list(range(args.claves))
+    random.Random(args.semilla).shuffle(ids)
+
+    print(f"{'Estructura':<10} {'Objetos(B/clave)':>17} {'Compacto(B/clave)':>18} {'Ahorro':>8}")
+    for nombre, objetos_cls, compacto_cls in ESTRUCTURAS:
+        resultados = []
+        for cls in (objetos_cls, compacto_cls):
+            tree = cls(args.grado)
+            for id in ids:
+                tree.insert(id, f"N{id}")
+            resultados.append(bytes_por_clave(tree, args.claves))
+        objetos, compacto = resultados
+        print(f"{nombre:<10} {objetos:>17.1f} {compacto:>18.1f} {1 - compacto / objetos:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,99 +1,174 @@
 from node import Node
+from busqueda_nodo import buscar_slot, buscar_slot_derecha
+from carga_masiva import validar_orden, capacidad_por_llenado, construir_niveles_bplus, repartir, repartir_hojas
+from metricas import estadisticas_nodos
+from almacenamiento import ids_compactos, nombre_de_node, registro_compacto, nombre_compacto
+from protocolo import Resultado, NO_ENCONTRADO
+from operaciones_lote import LOTE_MINIMO, ordenar_lote, fin_tramo
+from instantanea import TIPO_BPLUS, volcar_niveles, leer_instantanea, construir_desde_niveles
 
 class BPlusNode:
+    __slots__ = ('is_leaf', 'keys', 'ids', 'children', 'next')  # Sin __dict__ por instancia
+
     def __init__(self, is_leaf=False):
         self.is_leaf = is_leaf  # Indica si el nodo es una hoja
-        self.keys = []  # Lista de claves, cada clave es una instancia de Node
+        self.keys = []  # Registros (instancias de Node), solo en las hojas
+        self.ids = []  # En hojas, ids de 'keys'; en nodos internos, ids separadores
         self.children = []  # Lista de hijos del nodo
         self.next = None  # Solo se usa si el nodo es una hoja para enlazar con el siguiente nodo hoja
 
+class BPlusNodeCompacto(BPlusNode):
+    # Nodo del diseño compacto: ids en array('q') y 'keys' guarda solo los nombres
+    __slots__ = ()
+
+    def __init__(self, is_leaf=False):
+        super().__init__(is_leaf)
+        self.ids = ids_compactos()
+
 class BPlusTree:
+    # Búsqueda del slot dentro de un nodo (ver busqueda_nodo)
+    _slot = staticmethod(buscar_slot)
+    _slot_derecha = staticmethod(buscar_slot_derecha)
+
+    # Diseño de los nodos: clase del nodo y forma de crear y leer cada registro
+    _node_cls = BPlusNode
+    _registro = Node
+    _nombre = staticmethod(nombre_de_node)
+
+    # Los nodos internos solo guardan separadores: ids[i] es menor o igual que todas
+    # las claves del hijo i + 1 y mayor que todas las del hijo i.
+    # Todos los registros viven en las hojas, que están enlazadas por 'next'.
+
     def __init__(self, degree):
         self.degree = degree  # Grado mínimo del árbol B+
-        self.root = BPlusNode(is_leaf=True)  # Inicializa la raíz del árbol como un nodo hoja
-
-    def search(self, id, node=None):
-        # Busca un id en el árbol B+
-        if node is None:
-            node = self.root  # Comienza la búsqueda en la raíz
-        i = 0
-        # Encuentra el índice del primer nodo con clave mayor o igual a id
-        while i < len(node.keys) and id > node.keys[i].id:
-            i += 1
-        if node.is_leaf:
-            # Si se encuentra en una hoja, verifica si la clave está presente
-            if i < len(node.keys) and node.keys[i].id == id:
-                return node.keys[i].name
-            return None
-        else:
-            # Si no es una hoja, busca recursivamente en el hijo adecuado
-            if i < len(node.keys) and node.keys[i].id == id:
-                return node.keys[i].name
-            return self.search(id, node.children[i])
+        self.root = self._node_cls(is_leaf=True)  # Inicializa la raíz del árbol como un nodo hoja
+
+    def _find_leaf(self, id):
+        # Desciende desde la raíz hasta la hoja donde está o debería estar el id
+        node = self.root
+        while not node.is_leaf:
+            node = node.children[self._slot_derecha(node.ids, id)]
+        return node
+
+    def search(self, id):
+        # Busca un id en el árbol B+; la búsqueda siempre termina en una hoja
+        leaf = self._find_leaf(id)
+        i = self._slot(leaf.ids, id)
+        if i < len(leaf.ids) and leaf.ids[i] == id:
+            return Resultado((True, self._nombre(leaf.keys[i])))
+        return NO_ENCONTRADO
+
+    def iter_from(self, id):
+        # Genera los pares (id, name) con clave mayor o igual a id, recorriendo la cadena de hojas
+        leaf = self._find_leaf(id)
+        i = self._slot(leaf.ids, id)
+        nombre = self._nombre
+        while leaf is not None:
+            ids = leaf.ids
+            keys = leaf.keys
+            for j in range(i, len(keys)):
+                yield ids[j], nombre(keys[j])
+            leaf = leaf.next
+            i = 0
+
+    def range(self, lo, hi):
+        # Genera los pares (id, name) con lo <= id <= hi en orden ascendente
+        for id, name in self.iter_from(lo):
+            if id > hi:
+                return
+            yield id, name
 
     def insert(self, id, name):
         # Inserta un nuevo par (id, name) en el árbol B+
         root = self.root
         # Si la raíz está llena, debe dividirse
-        if len(root.keys) == (2 * self.degree - 1):
-            new_root = BPlusNode()  # Crea una nueva raíz
+        if len(root.ids) == (2 * self.degree - 1):
+            new_root = self._node_cls()  # Crea una nueva raíz
             new_root.children.append(self.root)  # Mueve la antigua raíz a los hijos de la nueva raíz
             self.split_child(new_root, 0)  # Divide el hijo lleno
             self.root = new_root  # Actualiza la raíz del árbol
         self._insert_non_full(self.root, id, name)  # Inserta el nuevo par en el árbol
+        return Resultado((True, name))
+
+    @classmethod
+    def bulk_load(cls, sorted_pairs, degree, fill_factor=1.0):
+        # Construye el árbol en O(n) a partir de pares (id, name) ya ordenados,
+        # llenando cada nodo hasta fill_factor * (2 * degree - 1) claves
+        pares = validar_orden(sorted_pairs)
+        tree = cls(degree)
+        capacidad = capacidad_por_llenado(2 * degree - 1, degree - 1, fill_factor)
+
+        def nuevo_nodo(es_hoja, registros, hijos):
+            node = cls._node_cls(is_leaf=es_hoja)
+            if es_hoja:
+                node.keys = [cls._registro(id, name) for id, name in registros]
+                node.ids.extend(id for id, _ in registros)
+            else:
+                node.ids.extend(registros)  # Separadores
+            node.children = hijos
+            return node
+
+        tree.root, hojas = construir_niveles_bplus(pares, capacidad, degree - 1, nuevo_nodo)
+        # Enlaza las hojas en orden como lo hace split_child
+        for izquierda, derecha in zip(hojas, hojas[1:]):
+            izquierda.next = derecha
+        return tree
+
+    def dump(self, ruta):
+        # Guarda el árbol en una instantánea binaria por niveles (ver instantanea); los
+        # nodos internos solo aportan sus separadores
+        volcar_niveles(ruta, TIPO_BPLUS, self.degree, self.root, lambda node: node.keys, self._nombre)
+
+    @classmethod
+    def load(cls, ruta):
+        # Reconstruye un árbol guardado con dump con una sola lectura del archivo
+        degree, forma, ids, names, primera_hoja = leer_instantanea(ruta, TIPO_BPLUS)
+        tree = cls(degree)
+
+        def nuevo_nodo(es_hoja, ids_nodo, names_nodo):
+            node = cls._node_cls(is_leaf=es_hoja)
+            node.keys = [cls._registro(id, name) for id, name in zip(ids_nodo, names_nodo)]
+            node.ids.extend(ids_nodo)
+            return node
+
+        tree.root, hojas = construir_desde_niveles(forma, ids, names, primera_hoja, False, nuevo_nodo)
+        for izquierda, derecha in zip(hojas, hojas[1:]):
+            izquierda.next = derecha
+        return tree
+
+    def structure_stats(self):
+        # Altura, cantidad de nodos y llenado promedio respecto de 2 * degree - 1 claves por nodo
+        return estadisticas_nodos(self.root, 2 * self.degree - 1)
 
     def delete(self, id):
-        # Elimina un par (id, name) del árbol B+
+        # Elimina un par (id, name) del árbol B+ y retorna el Resultado con el nombre eliminado
+        eliminado = self._delete(self.root, id)
         root = self.root
-        self._delete(root, id)
         # Si la raíz queda vacía y no es hoja, actualiza la raíz
-        if len(root.keys) == 0 and not root.is_leaf:
+        if len(root.ids) == 0 and not root.is_leaf:
             self.root = root.children[0]
+        return eliminado
 
     def _delete(self, node, id):
-        # Elimina una clave (id) en un nodo
-        i = 0
-        # Encuentra el índice del primer nodo con clave mayor o igual a id
-        while i < len(node.keys) and node.keys[i].id < id:
-            i += 1
-
+        # Elimina la clave (id) del subárbol y repara los hijos que queden con menos de degree - 1 claves
         if node.is_leaf:
-            # Elimina la clave en una hoja
-            if i < len(node.keys) and node.keys[i].id == id:
-                node.keys.pop(i)
-                return True
-            return False
-        else:
-            # Si el nodo tiene la clave, maneja los casos de claves en hijos
-            if i < len(node.keys) and node.keys[i].id == id:
-                if len(node.children[i].keys) >= self.degree:
-                    pred = self._get_predecessor(node, i)  # Encuentra el predecesor
-                    node.keys[i] = pred
-                    self._delete(node.children[i], pred.id)  # Elimina la clave en el hijo
-                elif len(node.children[i + 1].keys) >= self.degree:
-                    succ = self._get_successor(node, i)  # Encuentra el sucesor
-                    node.keys[i] = succ
-                    self._delete(node.children[i + 1], succ.id)  # Elimina la clave en el hijo
-                else:
-                    # Si ambos hijos tienen menos de d claves, fusiona los hijos
-                    self._merge(node, i)
-                    self._delete(node.children[i], id)
-            else:
-                # Verificación de que el hijo tenga suficientes claves antes de eliminar
-                if len(node.children[i].keys) < self.degree:
-                    self._fill(node, i)
-                if i < len(node.children):
-                    if i > len(node.keys):
-                        self._delete(node.children[i - 1], id)
-                    else:
-                        self._delete(node.children[i], id)
-        return True
+            i = self._slot(node.ids, id)
+            if i < len(node.ids) and node.ids[i] == id:
+                node.ids.pop(i)
+                return Resultado((True, self._nombre(node.keys.pop(i))))
+            return NO_ENCONTRADO
+
+        i = self._slot_derecha(node.ids, id)
+        deleted = self._delete(node.children[i], id)
+        if deleted.encontrado and len(node.children[i].ids) < self.degree - 1:
+            self._fill(node, i)
+        return deleted
 
     def _fill(self, node, index):
-        # Llena un hijo que tiene menos de d claves pidiendo prestado de hermanos
-        if index > 0 and len(node.children[index - 1].keys) >= self.degree:
+        # Llena un hijo que quedó con menos de degree - 1 claves pidiendo prestado de hermanos
+        if index > 0 and len(node.children[index - 1].ids) >= self.degree:
             self._borrow_from_prev(node, index)  # Presta del hermano izquierdo
-        elif index < len(node.children) - 1 and len(node.children[index + 1].keys) >= self.degree:
+        elif index < len(node.children) - 1 and len(node.children[index + 1].ids) >= self.degree:
             self._borrow_from_next(node, index)  # Presta del hermano derecho
         else:
             # Fusiona con el hermano izquierdo o derecho
@@ -107,10 +182,15 @@ class BPlusTree:
         child = node.children[index]
         sibling = node.children[index - 1]
 
-        child.keys.insert(0, node.keys[index - 1])
-        node.keys[index - 1] = sibling.keys.pop()
-
-        if not sibling.is_leaf:
+        if child.is_leaf:
+            # En las hojas se mueve el registro y el separador pasa a ser el nuevo primer id
+            child.keys.insert(0, sibling.keys.pop())
+            child.ids.insert(0, sibling.ids.pop())
+            node.ids[index - 1] = child.ids[0]
+        else:
+            # En nodos internos el separador baja y el último id del hermano sube
+            child.ids.insert(0, node.ids[index - 1])
+            node.ids[index - 1] = sibling.ids.pop()
             child.children.insert(0, sibling.children.pop())
 
     def _borrow_from_next(self, node, index):
@@ -118,10 +198,13 @@ class BPlusTree:
         child = node.children[index]
         sibling = node.children[index + 1]
 
-        child.keys.append(node.keys[index])
-        node.keys[index] = sibling.keys.pop(0)
-
-        if not sibling.is_leaf:
+        if child.is_leaf:
+            child.keys.append(sibling.keys.pop(0))
+            child.ids.append(sibling.ids.pop(0))
+            node.ids[index] = sibling.ids[0]
+        else:
+            child.ids.append(node.ids[index])
+            node.ids[index] = sibling.ids.pop(0)
             child.children.append(sibling.children.pop(0))
 
     def _merge(self, node, index):
@@ -129,62 +212,222 @@ class BPlusTree:
         child = node.children[index]
         sibling = node.children[index + 1]
 
-        child.keys.append(node.keys.pop(index))
-        child.keys.extend(sibling.keys)
-
-        if not child.is_leaf:
+        separator = node.ids.pop(index)
+        if child.is_leaf:
+            # El separador se descarta y la hoja fusionada hereda el enlace del hermano
+            child.keys.extend(sibling.keys)
+            child.ids.extend(sibling.ids)
+            child.next = sibling.next
+        else:
+            child.ids.append(separator)
+            child.ids.extend(sibling.ids)
             child.children.extend(sibling.children)
-        
-        node.children.pop(index + 1)
-
-    def _get_predecessor(self, node, index):
-        # Encuentra el predecesor (la clave más grande en el hijo izquierdo)
-        current = node.children[index]
-        while not current.is_leaf:
-            current = current.children[-1]
-        return current.keys[-1]
 
-    def _get_successor(self, node, index):
-        # Encuentra el sucesor (la clave más pequeña en el hijo derecho)
-        current = node.children[index + 1]
-        while not current.is_leaf:
-            current = current.children[0]
-        return current.keys[0]
+        node.children.pop(index + 1)
 
     def split_child(self, parent, index):
         # Divide un hijo del nodo padre y ajusta las claves y los hijos
         degree = self.degree
         full_child = parent.children[index]
-        new_child = BPlusNode(is_leaf=full_child.is_leaf)
+        new_child = self._node_cls(is_leaf=full_child.is_leaf)
 
         mid = degree - 1
-        parent.keys.insert(index, full_child.keys[mid])
         parent.children.insert(index + 1, new_child)
 
-        new_child.keys = full_child.keys[mid + 1:]
-        full_child.keys = full_child.keys[:mid]
+        if full_child.is_leaf:
+            # La hoja derecha conserva el registro del medio y su id se copia al padre
+            new_child.keys = full_child.keys[mid:]
+            new_child.ids = full_child.ids[mid:]
+            full_child.keys = full_child.keys[:mid]
+            full_child.ids = full_child.ids[:mid]
+            parent.ids.insert(index, new_child.ids[0])
 
-        if not full_child.is_leaf:
-            new_child.children = full_child.children[mid + 1:]
-            full_child.children = full_child.children[:mid + 1]
-        else:
             new_child.next = full_child.next
             full_child.next = new_child
+        else:
+            # En nodos internos el separador del medio sube al padre
+            parent.ids.insert(index, full_child.ids[mid])
+            new_child.ids = full_child.ids[mid + 1:]
+            full_child.ids = full_child.ids[:mid]
+            new_child.children = full_child.children[mid + 1:]
+            full_child.children = full_child.children[:mid + 1]
 
     def _insert_non_full(self, node, id, name):
         # Inserta una clave en un nodo que no está lleno
         if node.is_leaf:
-            index = 0
-            while index < len(node.keys) and id > node.keys[index].id:
-                index += 1
-            node.keys.insert(index, Node(id, name))
+            index = self._slot_derecha(node.ids, id)
+            node.keys.insert(index, self._registro(id, name))
+            node.ids.insert(index, id)
         else:
-            index = 0
-            while index < len(node.keys) and id > node.keys[index].id:
-                index += 1
+            index = self._slot_derecha(node.ids, id)
             # Si el hijo está lleno, se divide
-            if len(node.children[index].keys) == (2 * self.degree - 1):
+            if len(node.children[index].ids) == (2 * self.degree - 1):
                 self.split_child(node, index)
-                if id > node.keys[index].id:
+                if id >= node.ids[index]:
                     index += 1
             self._insert_non_full(node.children[index], id, name)
+
+    # Operaciones en lote: el lote se ordena una vez y se recorre con un descenso compartido.
+    # Cada nodo reparte entre sus hijos el tramo de ids que les corresponde; los hijos que
+    # desbordan o quedan con menos de degree - 1 claves se reparan al volver de la recursión.
+
+    def search_many(self, ids):
+        # Retorna el Resultado de cada id, en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.search(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        self._search_many(self.root, ordenados, 0, len(ordenados), orden, resultados)
+        return resultados
+
+    def _search_many(self, node, ids, inicio, fin, orden, resultados):
+        if node.is_leaf:
+            claves = node.ids
+            i = 0
+            for j in range(inicio, fin):
+                id = ids[j]
+                i = self._slot(claves, id, i)
+                if i < len(claves) and claves[i] == id:
+                    resultados[orden[j]] = Resultado((True, self._nombre(node.keys[i])))
+            return
+        j = inicio
+        while j < fin:
+            # Los ids menores que el separador i continúan juntos en el hijo i
+            i = self._slot_derecha(node.ids, ids[j])
+            k = fin_tramo(ids, node.ids[i], j, fin) if i < len(node.ids) else fin
+            self._search_many(node.children[i], ids, j, k, orden, resultados)
+            j = k
+
+    def insert_many(self, pares):
+        # Inserta un lote de pares (id, name) y retorna sus Resultado en el orden del lote
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        orden, ids = ordenar_lote([id for id, _ in pares])
+        names = [pares[p][1] for p in orden]
+        self._insert_many(self.root, ids, names, 0, len(ids))
+        self._ajustar_raiz()
+        return [Resultado((True, name)) for _, name in pares]
+
+    def _insert_many(self, node, ids, names, inicio, fin):
+        # Inserta ids[inicio:fin] en el subárbol; el nodo puede quedar desbordado y es su
+        # padre quien lo divide
+        if node.is_leaf:
+            i = 0
+            for j in range(inicio, fin):
+                i = self._slot_derecha(node.ids, ids[j], i)
+                node.keys.insert(i, self._registro(ids[j], names[j]))
+                node.ids.insert(i, ids[j])
+                i += 1
+            return
+        j = inicio
+        while j < fin:
+            i = self._slot_derecha(node.ids, ids[j])
+            k = fin_tramo(ids, node.ids[i], j, fin) if i < len(node.ids) else fin
+            child = node.children[i]
+            self._insert_many(child, ids, names, j, k)
+            if len(child.ids) > 2 * self.degree - 1:
+                self._dividir(node, i)
+            j = k
+
+    def delete_many(self, ids):
+        # Elimina un lote de ids y retorna sus Resultado en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.delete(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        self._delete_many(self.root, ordenados, 0, len(ordenados), orden, resultados)
+        self._ajustar_raiz()
+        return resultados
+
+    def _delete_many(self, node, ids, inicio, fin, orden, resultados):
+        if node.is_leaf:
+            i = 0
+            for j in range(inicio, fin):
+                id = ids[j]
+                i = self._slot(node.ids, id, i)
+                if i < len(node.ids) and node.ids[i] == id:
+                    node.ids.pop(i)
+                    resultados[orden[j]] = Resultado((True, self._nombre(node.keys.pop(i))))
+            return
+        j = inicio
+        while j < fin:
+            i = self._slot_derecha(node.ids, ids[j])
+            k = fin_tramo(ids, node.ids[i], j, fin) if i < len(node.ids) else fin
+            child = node.children[i]
+            self._delete_many(child, ids, j, k, orden, resultados)
+            if len(child.ids) < self.degree - 1:
+                self._reparar(node, i)
+            j = k
+
+    def _dividir(self, node, index):
+        # Divide el hijo desbordado en los nodos necesarios para que ninguno supere
+        # 2 * degree - 1 claves, con el mismo reparto que bulk_load
+        degree = self.degree
+        child = node.children[index]
+        keys, ids, children = child.keys, child.ids, child.children
+        separators = ids[:0]  # Mismo tipo que los ids del nodo (lista o array)
+        nodes = []
+        pos = 0
+        if child.is_leaf:
+            # Las hojas conservan todos los registros; el primer id de cada hoja nueva se copia al padre
+            for n, cantidad in enumerate(repartir_hojas(len(ids), 2 * degree - 1, degree - 1)):
+                parte = child if n == 0 else self._node_cls(is_leaf=True)
+                parte.keys = keys[pos:pos + cantidad]
+                parte.ids = ids[pos:pos + cantidad]
+                if n:
+                    separators.append(parte.ids[0])
+                    previa = nodes[-1] if nodes else child
+                    parte.next = previa.next
+                    previa.next = parte
+                    nodes.append(parte)
+                pos += cantidad
+        else:
+            # En nodos internos los separadores intermedios suben al padre
+            for n, cantidad in enumerate(repartir(len(ids), 2 * degree - 1, degree - 1)):
+                if n:
+                    separators.append(ids[pos])
+                    pos += 1
+                parte = child if n == 0 else self._node_cls()
+                parte.ids = ids[pos:pos + cantidad]
+                parte.children = children[pos:pos + cantidad + 1]
+                if n:
+                    nodes.append(parte)
+                pos += cantidad
+        node.ids[index:index] = separators
+        node.children[index + 1:index + 1] = nodes
+
+    def _reparar(self, node, index):
+        # Fusiona el hijo que quedó con menos de degree - 1 claves con un hermano y vuelve a
+        # dividir el resultado si supera el máximo. Un nodo interno que quedó sin claves (con un
+        # solo hijo) no puede reparar a ese hijo: lo hace su padre al fusionarlo, en la unión
+        if len(node.children) == 1:
+            return
+        if index == len(node.children) - 1:
+            index -= 1
+        child = node.children[index]
+        union = len(child.children)  # Primer hijo que viene del hermano derecho
+        self._merge(node, index)
+        if not child.is_leaf:
+            for j in (union - 1, union):
+                if len(child.children[j].ids) < self.degree - 1:
+                    self._reparar(child, j)
+                    break
+        if len(child.ids) > 2 * self.degree - 1:
+            self._dividir(node, index)
+
+    def _ajustar_raiz(self):
+        # Tras un lote la raíz puede quedar desbordada (se divide hacia arriba) o vacía (baja un nivel)
+        while len(self.root.ids) > 2 * self.degree - 1:
+            root = self._node_cls()
+            root.children.append(self.root)
+            self._dividir(root, 0)
+            self.root = root
+        while len(self.root.ids) == 0 and not self.root.is_leaf:
+            self.root = self.root.children[0]
+
+
+class BPlusTreeCompacto(BPlusTree):
+    # Árbol B+ con el diseño compacto de nodos (ver almacenamiento)
+    _node_cls = BPlusNodeCompacto
+    _registro = staticmethod(registro_compacto)
+    _nombre = staticmethod(nombre_compacto)
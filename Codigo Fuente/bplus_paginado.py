@@ -0,0 +1,529 @@
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+
+from buffer_pool import BufferPool
+from busqueda_nodo import buscar_slot, buscar_slot_derecha
+from operaciones_lote import LOTE_MINIMO, ordenar_lote
+from protocolo import Resultado, NO_ENCONTRADO
+
+
+# Árbol B+ persistente: los mismos algoritmos que BPlusTree, pero cada nodo es una página de
+# tamaño fijo de un archivo y se accede a través de un BufferPool LRU con escritura diferida.
+# Los hijos y el enlace entre hojas son números de página, no referencias a objetos.
+#
+# Formato del archivo (little-endian):
+#   Página 0: metadatos -> magic, versión, tamaño de página, grado, raíz, páginas, primera libre
+#   Resto: cabecera (tipo, cantidad de claves, siguiente) seguida de
+#     hoja: ids int64, largos uint16 de los nombres y los nombres en UTF-8. Un nombre de más de
+#           BYTES_NOMBRE_MAXIMO bytes se guarda en páginas de desborde: la hoja guarda el largo
+#           DESBORDADO y el número (int64) de la primera página de la cadena
+#     interna: ids separadores int64 y números de página de los hijos int64
+#     desborde: un tramo de los bytes de un nombre largo; 'siguiente' enlaza el tramo que sigue
+#     libre: sin contenido; 'siguiente' enlaza la lista de páginas libres
+
+MAGIC = b'BPPG'
+VERSION = 2  # La versión 1 no tenía páginas de desborde; sus archivos se leen igual
+METADATOS = struct.Struct('<4sIIIqqq')
+CABECERA_PAGINA = struct.Struct('<BIq')
+ENTERO = struct.Struct('<q')
+LIBRE, HOJA, INTERNA, DESBORDE = 0, 1, 2, 3
+SIN_PAGINA = -1
+BYTES_NOMBRE_MAXIMO = 64  # Nombres más largos (en UTF-8) van a páginas de desborde, para que una hoja llena entre en su página
+DESBORDADO = 0xFFFF  # Largo que marca un nombre guardado en páginas de desborde
+TAMANO_BLOQUE = 4096
+PAGINAS_BUFFER = 256  # Capacidad por defecto del buffer pool (1 MB con páginas de 4 KB)
+
+
+def tamano_pagina(degree):
+    # Menor múltiplo de 4096 bytes donde entra un nodo lleno (2 * degree - 1 claves)
+    claves = 2 * degree - 1
+    hoja = CABECERA_PAGINA.size + claves * (8 + 2 + BYTES_NOMBRE_MAXIMO)
+    interna = CABECERA_PAGINA.size + claves * 8 + (claves + 1) * 8
+    return -(-max(hoja, interna, METADATOS.size) // TAMANO_BLOQUE) * TAMANO_BLOQUE
+
+
+class PaginaBPlus:
+    __slots__ = ('numero', 'is_leaf', 'libre', 'ids', 'names', 'children', 'next', 'datos')
+
+    def __init__(self, numero, is_leaf=False):
+        self.numero = numero  # Posición de la página en el archivo
+        self.is_leaf = is_leaf
+        self.libre = False  # Página liberada por una fusión, en la lista de libres
+        self.ids = []  # En hojas, ids de los registros; en páginas internas, ids separadores
+        self.names = []  # Nombres de los registros, solo en las hojas (o la página de desborde de cada nombre largo)
+        self.children = []  # Números de página de los hijos
+        self.next = SIN_PAGINA  # Hoja siguiente (o siguiente página libre o de desborde)
+        self.datos = None  # Bytes de un tramo de nombre largo, solo en las páginas de desborde
+
+
+def codificar_pagina(pagina):
+    if pagina.libre:
+        return CABECERA_PAGINA.pack(LIBRE, 0, pagina.next)
+    if pagina.datos is not None:
+        return CABECERA_PAGINA.pack(DESBORDE, len(pagina.datos), pagina.next) + pagina.datos
+    partes = [CABECERA_PAGINA.pack(HOJA if pagina.is_leaf else INTERNA, len(pagina.ids), pagina.next),
+              array('q', pagina.ids).tobytes()]
+    if pagina.is_leaf:
+        largos = array('H')
+        nombres = []
+        for name in pagina.names:
+            if isinstance(name, str):
+                nombres.append(name.encode('utf-8'))
+                largos.append(len(nombres[-1]))
+            else:
+                nombres.append(ENTERO.pack(name))  # Primera página de desborde del nombre
+                largos.append(DESBORDADO)
+        partes.append(largos.tobytes())
+        partes.extend(nombres)
+    else:
+        partes.append(array('q', pagina.children).tobytes())
+    return b''.join(partes)
+
+
+def decodificar_pagina(numero, datos):
+    tipo, claves, siguiente = CABECERA_PAGINA.unpack_from(datos)
+    pagina = PaginaBPlus(numero, tipo == HOJA)
+    pagina.next = siguiente
+    if tipo == LIBRE:
+        pagina.libre = True
+        return pagina
+    posicion = CABECERA_PAGINA.size
+    if tipo == DESBORDE:
+        pagina.datos = datos[posicion:posicion + claves]
+        return pagina
+    ids = array('q')
+    ids.frombytes(datos[posicion:posicion + 8 * claves])
+    pagina.ids = ids.tolist()
+    posicion += 8 * claves
+    if tipo == HOJA:
+        largos = array('H')
+        largos.frombytes(datos[posicion:posicion + 2 * claves])
+        posicion += 2 * claves
+        names = []
+        for largo in largos:
+            if largo == DESBORDADO:
+                names.append(ENTERO.unpack_from(datos, posicion)[0])
+                posicion += ENTERO.size
+            else:
+                names.append(str(datos[posicion:posicion + largo], 'utf-8'))
+                posicion += largo
+        pagina.names = names
+    else:
+        hijos = array('q')
+        hijos.frombytes(datos[posicion:posicion + 8 * (claves + 1)])
+        pagina.children = hijos.tolist()
+    return pagina
+
+
+class BPlusTreePaginado:
+    # Búsqueda del slot dentro de una página (ver busqueda_nodo)
+    _slot = staticmethod(buscar_slot)
+    _slot_derecha = staticmethod(buscar_slot_derecha)
+
+    def __init__(self, degree, ruta=None, paginas_buffer=PAGINAS_BUFFER):
+        # Crea un árbol vacío en 'ruta', o en un archivo temporal anónimo si no se indica
+        if degree < 2:
+            raise ValueError("El grado debe ser un entero mayor que 1")
+        file = open(ruta, 'w+b', buffering=0) if ruta else tempfile.TemporaryFile(buffering=0)
+        self._conectar(file, degree, tamano_pagina(degree), paginas_buffer)
+        self.paginas = 1  # La página 0 guarda los metadatos
+        self.libre = SIN_PAGINA  # Primera página de la lista de libres
+        self.root = self._nueva(is_leaf=True).numero  # Número de página de la raíz
+
+    @classmethod
+    def abrir(cls, ruta, paginas_buffer=PAGINAS_BUFFER):
+        # Abre un árbol guardado con flush() o close()
+        return cls._desde_archivo(open(ruta, 'r+b', buffering=0), ruta, paginas_buffer)
+
+    def dump(self, ruta):
+        # La instantánea del árbol paginado es una copia de su archivo de páginas
+        self.flush()
+        self.file.seek(0)
+        with open(ruta, 'wb') as destino:
+            shutil.copyfileobj(self.file, destino)
+
+    @classmethod
+    def load(cls, ruta, paginas_buffer=PAGINAS_BUFFER):
+        # Trabaja sobre una copia temporal de la instantánea, que no se modifica
+        file = tempfile.TemporaryFile(buffering=0)
+        with open(ruta, 'rb') as origen:
+            shutil.copyfileobj(origen, file)
+        return cls._desde_archivo(file, ruta, paginas_buffer)
+
+    @classmethod
+    def _desde_archivo(cls, file, ruta, paginas_buffer):
+        file.seek(0)
+        magic, version, tamano, degree, root, paginas, libre = METADATOS.unpack(file.read(METADATOS.size))
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            file.close()
+            raise ValueError(f"{ruta} no es un árbol B+ paginado compatible")
+        tree = cls.__new__(cls)
+        tree._conectar(file, degree, tamano, paginas_buffer)
+        tree.paginas = paginas
+        tree.libre = libre
+        tree.root = root
+        return tree
+
+    def _conectar(self, file, degree, tamano, paginas_buffer):
+        if sys.byteorder != 'little':
+            file.close()
+            raise ValueError("El formato de las páginas requiere una arquitectura little-endian")
+        self.file = file
+        self.degree = degree  # Grado mínimo del árbol B+
+        self.tamano_pagina = tamano
+        self.pool = BufferPool(file, tamano, paginas_buffer, decodificar_pagina, codificar_pagina)
+
+    def flush(self):
+        # Escribe las páginas sucias y los metadatos; el archivo queda listo para abrir()
+        self.pool.flush()
+        self.pool.escribir(0, METADATOS.pack(MAGIC, VERSION, self.tamano_pagina, self.degree,
+                                             self.root, self.paginas, self.libre))
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def _nueva(self, is_leaf=False):
+        # Página vacía: reutiliza la primera de la lista de libres o agrega una al final del archivo
+        if self.libre != SIN_PAGINA:
+            numero = self.libre
+            self.libre = self.pool.obtener(numero).next
+        else:
+            numero = self.paginas
+            self.paginas += 1
+        pagina = PaginaBPlus(numero, is_leaf)
+        self.pool.agregar(pagina)
+        return pagina
+
+    def _liberar(self, pagina):
+        # Agrega la página al frente de la lista de libres
+        pagina.libre = True
+        pagina.ids = []
+        pagina.names = []
+        pagina.children = []
+        pagina.datos = None
+        pagina.next = self.libre
+        self.libre = pagina.numero
+        self.pool.modificar(pagina)
+
+    def _guardar_nombre(self, name):
+        # Retorna el nombre si entra en la hoja; si no, lo escribe en una cadena de páginas de
+        # desborde y retorna el número de la primera
+        if len(name) <= BYTES_NOMBRE_MAXIMO // 4:
+            return name
+        codificado = name.encode('utf-8')
+        if len(codificado) <= BYTES_NOMBRE_MAXIMO:
+            return name
+        capacidad = self.tamano_pagina - CABECERA_PAGINA.size
+        siguiente = SIN_PAGINA
+        # Del último tramo al primero, para conocer el enlace de cada página al crearla
+        for inicio in reversed(range(0, len(codificado), capacidad)):
+            pagina = self._nueva()
+            pagina.datos = codificado[inicio:inicio + capacidad]
+            pagina.next = siguiente
+            self.pool.modificar(pagina)
+            siguiente = pagina.numero
+        return siguiente
+
+    def _leer_nombre(self, name, liberar=False):
+        # Nombre guardado en una hoja: el texto, o el número de su primera página de desborde.
+        # Con liberar, las páginas de desborde se devuelven a la lista de libres al leerlas
+        if isinstance(name, str):
+            return name
+        partes = []
+        while name != SIN_PAGINA:
+            pagina = self.pool.obtener(name)
+            partes.append(pagina.datos)
+            name = pagina.next
+            if liberar:
+                self._liberar(pagina)
+        return str(b''.join(partes), 'utf-8')
+
+    def _find_leaf(self, id):
+        # Desciende desde la raíz hasta la hoja donde está o debería estar el id
+        obtener = self.pool.obtener
+        node = obtener(self.root)
+        while not node.is_leaf:
+            node = obtener(node.children[self._slot_derecha(node.ids, id)])
+        return node
+
+    def search(self, id):
+        leaf = self._find_leaf(id)
+        i = self._slot(leaf.ids, id)
+        if i < len(leaf.ids) and leaf.ids[i] == id:
+            return Resultado((True, self._leer_nombre(leaf.names[i])))
+        return NO_ENCONTRADO
+
+    def iter_from(self, id):
+        # Genera los pares (id, name) con clave mayor o igual a id, recorriendo la cadena de hojas
+        leaf = self._find_leaf(id)
+        i = self._slot(leaf.ids, id)
+        while True:
+            ids = leaf.ids
+            names = leaf.names
+            for j in range(i, len(ids)):
+                yield ids[j], self._leer_nombre(names[j])
+            if leaf.next == SIN_PAGINA:
+                return
+            leaf = self.pool.obtener(leaf.next)
+            i = 0
+
+    def range(self, lo, hi):
+        # Genera los pares (id, name) con lo <= id <= hi en orden ascendente
+        for id, name in self.iter_from(lo):
+            if id > hi:
+                return
+            yield id, name
+
+    def insert(self, id, name):
+        guardado = self._guardar_nombre(name)
+        root = self.pool.obtener(self.root)
+        # Si la raíz está llena, debe dividirse
+        if len(root.ids) == (2 * self.degree - 1):
+            new_root = self._nueva()
+            new_root.children.append(root.numero)
+            self.pool.modificar(new_root)
+            self.split_child(new_root, 0)
+            self.root = new_root.numero
+            root = new_root
+        self._insert_non_full(root, id, guardado)
+        return Resultado((True, name))
+
+    def split_child(self, parent, index):
+        # Divide un hijo lleno de 'parent' en dos páginas, como BPlusTree.split_child
+        full_child = self.pool.obtener(parent.children[index])
+        new_child = self._nueva(full_child.is_leaf)
+        mid = self.degree - 1
+        parent.children.insert(index + 1, new_child.numero)
+
+        if full_child.is_leaf:
+            new_child.names = full_child.names[mid:]
+            new_child.ids = full_child.ids[mid:]
+            full_child.names = full_child.names[:mid]
+            full_child.ids = full_child.ids[:mid]
+            parent.ids.insert(index, new_child.ids[0])
+
+            new_child.next = full_child.next
+            full_child.next = new_child.numero
+        else:
+            parent.ids.insert(index, full_child.ids[mid])
+            new_child.ids = full_child.ids[mid + 1:]
+            full_child.ids = full_child.ids[:mid]
+            new_child.children = full_child.children[mid + 1:]
+            full_child.children = full_child.children[:mid + 1]
+        self.pool.modificar(parent, full_child, new_child)
+
+    def _insert_non_full(self, node, id, name):
+        # Desciende dividiendo los hijos llenos y agrega el registro en la hoja
+        while not node.is_leaf:
+            index = self._slot_derecha(node.ids, id)
+            child = self.pool.obtener(node.children[index])
+            if len(child.ids) == (2 * self.degree - 1):
+                self.split_child(node, index)
+                if id >= node.ids[index]:
+                    index += 1
+                child = self.pool.obtener(node.children[index])
+            node = child
+        index = self._slot_derecha(node.ids, id)
+        node.names.insert(index, name)
+        node.ids.insert(index, id)
+        self.pool.modificar(node)
+
+    def delete(self, id):
+        # Elimina un par (id, name) y retorna el Resultado con el nombre eliminado
+        eliminado = self._delete(self.pool.obtener(self.root), id)
+        root = self.pool.obtener(self.root)
+        # Si la raíz queda vacía y no es hoja, su único hijo pasa a ser la raíz
+        if len(root.ids) == 0 and not root.is_leaf:
+            self.root = root.children[0]
+            self._liberar(root)
+        return eliminado
+
+    def _delete(self, node, id):
+        if node.is_leaf:
+            i = self._slot(node.ids, id)
+            if i < len(node.ids) and node.ids[i] == id:
+                node.ids.pop(i)
+                name = node.names.pop(i)
+                self.pool.modificar(node)
+                return Resultado((True, self._leer_nombre(name, liberar=True)))
+            return NO_ENCONTRADO
+
+        i = self._slot_derecha(node.ids, id)
+        child = self.pool.obtener(node.children[i])
+        deleted = self._delete(child, id)
+        if deleted.encontrado and len(child.ids) < self.degree - 1:
+            self._fill(node, i)
+        return deleted
+
+    def _fill(self, node, index):
+        # Llena un hijo que quedó con menos de degree - 1 claves pidiendo prestado de hermanos
+        obtener = self.pool.obtener
+        if index > 0 and len(obtener(node.children[index - 1]).ids) >= self.degree:
+            self._borrow_from_prev(node, index)
+        elif index < len(node.children) - 1 and len(obtener(node.children[index + 1]).ids) >= self.degree:
+            self._borrow_from_next(node, index)
+        elif index < len(node.children) - 1:
+            self._merge(node, index)
+        else:
+            self._merge(node, index - 1)
+
+    def _borrow_from_prev(self, node, index):
+        child = self.pool.obtener(node.children[index])
+        sibling = self.pool.obtener(node.children[index - 1])
+        if child.is_leaf:
+            child.names.insert(0, sibling.names.pop())
+            child.ids.insert(0, sibling.ids.pop())
+            node.ids[index - 1] = child.ids[0]
+        else:
+            child.ids.insert(0, node.ids[index - 1])
+            node.ids[index - 1] = sibling.ids.pop()
+            child.children.insert(0, sibling.children.pop())
+        self.pool.modificar(node, child, sibling)
+
+    def _borrow_from_next(self, node, index):
+        child = self.pool.obtener(node.children[index])
+        sibling = self.pool.obtener(node.children[index + 1])
+        if child.is_leaf:
+            child.names.append(sibling.names.pop(0))
+            child.ids.append(sibling.ids.pop(0))
+            node.ids[index] = sibling.ids[0]
+        else:
+            child.ids.append(node.ids[index])
+            node.ids[index] = sibling.ids.pop(0)
+            child.children.append(sibling.children.pop(0))
+        self.pool.modificar(node, child, sibling)
+
+    def _merge(self, node, index):
+        # Fusiona el hijo en la posición index con el hermano derecho, cuya página se libera
+        child = self.pool.obtener(node.children[index])
+        sibling = self.pool.obtener(node.children[index + 1])
+        separator = node.ids.pop(index)
+        if child.is_leaf:
+            child.names.extend(sibling.names)
+            child.ids.extend(sibling.ids)
+            child.next = sibling.next
+        else:
+            child.ids.append(separator)
+            child.ids.extend(sibling.ids)
+            child.children.extend(sibling.children)
+        node.children.pop(index + 1)
+        self.pool.modificar(node, child)
+        self._liberar(sibling)
+
+    # Operaciones en lote: el lote se ordena una vez y las claves consecutivas que caen en la
+    # misma hoja se resuelven en ella sin volver a descender. A diferencia de BPlusTree, ninguna
+    # página queda desbordada mientras se piden otras (el buffer pool no podría escribirla si
+    # la desaloja): la inserción en una hoja llena y la eliminación que la deja por debajo del
+    # mínimo pasan por la operación individual, y la clave siguiente vuelve a descender.
+
+    def _find_leaf_cota(self, id):
+        # Como _find_leaf, y además retorna el separador desde el cual los ids ya no
+        # corresponden a la hoja (None si es la última hoja)
+        obtener = self.pool.obtener
+        node = obtener(self.root)
+        cota = None
+        while not node.is_leaf:
+            i = self._slot_derecha(node.ids, id)
+            if i < len(node.ids):
+                cota = node.ids[i]
+            node = obtener(node.children[i])
+        return node, cota
+
+    def search_many(self, ids):
+        # Retorna el Resultado de cada id, en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.search(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        leaf = cota = None
+        for p, id in zip(orden, ordenados):
+            if leaf is None or cota is not None and id >= cota:
+                leaf, cota = self._find_leaf_cota(id)
+            i = self._slot(leaf.ids, id)
+            if i < len(leaf.ids) and leaf.ids[i] == id:
+                resultados[p] = Resultado((True, self._leer_nombre(leaf.names[i])))
+        return resultados
+
+    def insert_many(self, pares):
+        # Inserta un lote de pares (id, name) y retorna sus Resultado en el orden del lote
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        orden, ids = ordenar_lote([id for id, _ in pares])
+        max_keys = 2 * self.degree - 1
+        leaf = cota = None
+        for p, id in zip(orden, ids):
+            name = pares[p][1]
+            if leaf is None or cota is not None and id >= cota:
+                leaf, cota = self._find_leaf_cota(id)
+            if len(leaf.ids) < max_keys:
+                guardado = self._guardar_nombre(name)
+                index = self._slot_derecha(leaf.ids, id)
+                leaf.names.insert(index, guardado)
+                leaf.ids.insert(index, id)
+                self.pool.modificar(leaf)
+            else:
+                self.insert(id, name)  # Divide la hoja llena (y los nodos llenos del camino)
+                leaf = None
+        return [Resultado((True, name)) for _, name in pares]
+
+    def delete_many(self, ids):
+        # Elimina un lote de ids y retorna sus Resultado en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.delete(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        leaf = cota = None
+        for p, id in zip(orden, ordenados):
+            if leaf is None or cota is not None and id >= cota:
+                leaf, cota = self._find_leaf_cota(id)
+            i = self._slot(leaf.ids, id)
+            if i == len(leaf.ids) or leaf.ids[i] != id:
+                continue
+            if len(leaf.ids) >= self.degree or leaf.numero == self.root:
+                leaf.ids.pop(i)
+                name = leaf.names.pop(i)
+                self.pool.modificar(leaf)
+                resultados[p] = Resultado((True, self._leer_nombre(name, liberar=True)))
+            else:
+                resultados[p] = self.delete(id)  # Pide prestado o fusiona la hoja
+                leaf = None
+        return resultados
+
+    def structure_stats(self):
+        # Mismas métricas que estadisticas_nodos, recorriendo los niveles por número de página
+        # y sin pasar por el buffer pool (no altera sus estadísticas ni su orden LRU)
+        max_claves = 2 * self.degree - 1
+        altura = nodos = claves = hojas = claves_hojas = 0
+        nivel = [self.root]
+        while nivel:
+            altura += 1
+            siguiente = []
+            for numero in nivel:
+                pagina = self.pool.inspeccionar(numero)
+                nodos += 1
+                claves += len(pagina.ids)
+                if pagina.is_leaf:
+                    hojas += 1
+                    claves_hojas += len(pagina.ids)
+                else:
+                    siguiente.extend(pagina.children)
+            nivel = siguiente
+        return {
+            'Altura': altura,
+            'Nodos': nodos,
+            'Hojas': hojas,
+            'Claves': claves,
+            'Llenado_Promedio': claves / (nodos * max_claves),
+            'Llenado_Hojas': claves_hojas / (hojas * max_claves),
+        }
+
+    def page_stats(self):
+        # Estadísticas del buffer pool más el tamaño de página y las páginas del archivo
+        stats = self.pool.estadisticas()
+        stats['Tamano_Pagina'] = self.tamano_pagina
+        stats['Paginas'] = self.paginas
+        return stats
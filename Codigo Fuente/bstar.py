@@ -1,94 +1,165 @@
 from node import Node
+from busqueda_nodo import buscar_slot, buscar_slot_derecha
+from carga_masiva import validar_orden, capacidad_por_llenado, construir_niveles, repartir
+from metricas import estadisticas_nodos
+from almacenamiento import ids_compactos, nombre_de_node, registro_compacto, nombre_compacto
+from protocolo import Resultado, NO_ENCONTRADO
+from operaciones_lote import LOTE_MINIMO, ordenar_lote, fin_tramo
+from instantanea import TIPO_BSTAR, volcar_niveles, leer_instantanea, construir_desde_niveles
 
 class BStarNode:
+    __slots__ = ('is_leaf', 'keys', 'ids', 'children', 'next')  # Sin __dict__ por instancia
+
     def __init__(self, is_leaf=False):
         self.is_leaf = is_leaf
         self.keys = []  # Lista de claves (instancias de Node) almacenadas en el nodo
+        self.ids = []  # Lista paralela con los ids de 'keys', usada para buscar con bisect
         self.children = []  # Lista de hijos del nodo
         self.next = None  # Apunta al siguiente nodo en el caso de ser un nodo hoja
 
+class BStarNodeCompacto(BStarNode):
+    # Nodo del diseño compacto: ids en array('q') y 'keys' guarda solo los nombres
+    __slots__ = ()
+
+    def __init__(self, is_leaf=False):
+        super().__init__(is_leaf)
+        self.ids = ids_compactos()
+
 class BStarTree:
+    # Búsqueda del slot dentro de un nodo (ver busqueda_nodo)
+    _slot = staticmethod(buscar_slot)
+    _slot_derecha = staticmethod(buscar_slot_derecha)
+
+    # Diseño de los nodos: clase del nodo y forma de crear y leer cada registro
+    _node_cls = BStarNode
+    _registro = Node
+    _nombre = staticmethod(nombre_de_node)
+
     def __init__(self, degree):
         self.degree = degree  # Grado mínimo del árbol B*
-        self.root = BStarNode(is_leaf=True)  # Inicializa la raíz como un nodo hoja
+        self.root = self._node_cls(is_leaf=True)  # Inicializa la raíz como un nodo hoja
 
     def search(self, id, node=None):
-        # Busca un nodo con la clave id y retorna el nombre asociado si se encuentra
+        # Busca un nodo con la clave id y retorna el Resultado con el nombre asociado
         if node is None:
             node = self.root  # Empieza la búsqueda desde la raíz
-        i = 0
-        while i < len(node.keys) and id > node.keys[i].id:
-            i += 1
+        i = self._slot(node.ids, id)
         if node.is_leaf:
-            if i < len(node.keys) and node.keys[i].id == id:
-                return node.keys[i].name  # Retorna el nombre si se encuentra la clave
-            return None  # Retorna None si la clave no se encuentra
+            if i < len(node.ids) and node.ids[i] == id:
+                return Resultado((True, self._nombre(node.keys[i])))  # Retorna el nombre si se encuentra la clave
+            return NO_ENCONTRADO  # La clave no se encuentra
         else:
-            if i < len(node.keys) and node.keys[i].id == id:
-                return node.keys[i].name  # Retorna el nombre si se encuentra la clave
+            if i < len(node.ids) and node.ids[i] == id:
+                return Resultado((True, self._nombre(node.keys[i])))  # Retorna el nombre si se encuentra la clave
             return self.search(id, node.children[i])  # Continua la búsqueda en el hijo adecuado
 
     def insert(self, id, name):
-        # Inserta una nueva clave en el árbol
+        # Inserta una nueva clave en el árbol. El desborde de un nodo se resuelve
+        # primero cediendo claves a un hermano con espacio y, si ambos están llenos,
+        # dividiendo dos hermanos en tres nodos llenos a 2/3.
         root = self.root
-        if len(root.keys) == (2 * self.degree - 1):
-            # Si el nodo raíz está lleno, crea una nueva raíz
-            new_root = BStarNode()
-            new_root.children.append(self.root)
+        self._insert(root, id, name)
+        if len(root.ids) > (2 * self.degree - 1):
+            # La raíz no tiene hermanos: se divide en dos y crea una nueva raíz
+            new_root = self._node_cls()
+            new_root.children.append(root)
             self.split_child(new_root, 0)
             self.root = new_root  # Actualiza la raíz del árbol
-        self._insert_non_full(self.root, id, name)
+        return Resultado((True, name))
+
+    @classmethod
+    def bulk_load(cls, sorted_pairs, degree, fill_factor=1.0):
+        # Construye el árbol en O(n) a partir de pares (id, name) ya ordenados,
+        # llenando cada nodo hasta fill_factor * (2 * degree - 1) claves
+        pares = validar_orden(sorted_pairs)
+        tree = cls(degree)
+        capacidad = capacidad_por_llenado(2 * degree - 1, degree - 1, fill_factor)
+
+        def nuevo_nodo(es_hoja, registros, hijos):
+            node = cls._node_cls(is_leaf=es_hoja)
+            node.keys = [cls._registro(id, name) for id, name in registros]
+            node.ids.extend(id for id, _ in registros)
+            node.children = hijos
+            return node
+
+        tree.root, hojas = construir_niveles(pares, capacidad, degree - 1, nuevo_nodo)
+        # Enlaza las hojas en orden como lo hace split_child
+        for izquierda, derecha in zip(hojas, hojas[1:]):
+            izquierda.next = derecha
+        return tree
+
+    def dump(self, ruta):
+        # Guarda el árbol en una instantánea binaria por niveles (ver instantanea)
+        volcar_niveles(ruta, TIPO_BSTAR, self.degree, self.root, lambda node: node.keys, self._nombre)
+
+    @classmethod
+    def load(cls, ruta):
+        # Reconstruye un árbol guardado con dump con una sola lectura del archivo
+        degree, forma, ids, names, primera_hoja = leer_instantanea(ruta, TIPO_BSTAR)
+        tree = cls(degree)
+
+        def nuevo_nodo(es_hoja, ids_nodo, names_nodo):
+            node = cls._node_cls(is_leaf=es_hoja)
+            node.keys = [cls._registro(id, name) for id, name in zip(ids_nodo, names_nodo)]
+            node.ids.extend(ids_nodo)
+            return node
+
+        tree.root, hojas = construir_desde_niveles(forma, ids, names, primera_hoja, True, nuevo_nodo)
+        for izquierda, derecha in zip(hojas, hojas[1:]):
+            izquierda.next = derecha
+        return tree
 
     def delete(self, id):
-        # Elimina una clave del árbol
+        # Elimina una clave del árbol y retorna el Resultado con el nombre eliminado
         root = self.root
-        self._delete(root, id)
+        eliminado = self._delete(root, id)
         if len(root.keys) == 0 and not root.is_leaf:
             self.root = root.children[0]  # Actualiza la raíz si está vacía
+        return eliminado
 
     def _delete(self, node, id):
         # Elimina una clave del nodo dado y maneja los casos de subárboles
-        i = 0
-        while i < len(node.keys) and node.keys[i].id < id:
-            i += 1
+        i = self._slot(node.ids, id)
 
         if node.is_leaf:
-            if i < len(node.keys) and node.keys[i].id == id:
-                node.keys.pop(i)  # Elimina la clave del nodo hoja
-                return True
-            return False
+            if i < len(node.ids) and node.ids[i] == id:
+                node.ids.pop(i)  # Elimina la clave del nodo hoja
+                return Resultado((True, self._nombre(node.keys.pop(i))))
+            return NO_ENCONTRADO
         else:
-            if i < len(node.keys) and node.keys[i].id == id:
+            if i < len(node.ids) and node.ids[i] == id:
+                eliminado = Resultado((True, self._nombre(node.keys[i])))
                 if len(node.children[i].keys) >= self.degree:
                     # Si el hijo tiene suficientes claves, usa el predecesor
-                    pred = self._get_predecessor(node, i)
+                    pred_id, pred = self._get_predecessor(node, i)
                     node.keys[i] = pred
-                    self._delete(node.children[i], pred.id)
+                    node.ids[i] = pred_id
+                    self._delete(node.children[i], pred_id)
                 elif len(node.children[i + 1].keys) >= self.degree:
                     # Si el siguiente hijo tiene suficientes claves, usa el sucesor
-                    succ = self._get_successor(node, i)
+                    succ_id, succ = self._get_successor(node, i)
                     node.keys[i] = succ
-                    self._delete(node.children[i + 1], succ.id)
+                    node.ids[i] = succ_id
+                    self._delete(node.children[i + 1], succ_id)
                 else:
                     # Si no se pueden tomar prestadas claves, fusiona hijos
                     self._merge(node, i)
-                    self._delete(node.children[i], id)
+                    eliminado = self._delete(node.children[i], id)
             else:
                 # Verificación de que el hijo tenga suficientes claves antes de eliminar
                 if len(node.children[i].keys) < self.degree:
                     self._fill(node, i)
-                if i < len(node.children):
                     if i > len(node.keys):
-                        self._delete(node.children[i - 1], id)
-                    else:
-                        self._delete(node.children[i], id)
-        return True
+                        i -= 1  # El último hijo se fusionó con su hermano izquierdo
+                eliminado = self._delete(node.children[i], id)
+        return eliminado
 
     def _fill(self, node, index):
-        # Verificación que el nodo tenga suficientes claves
-        if index > 0 and len(node.children[index - 1].keys) > self.degree * 2 // 3:
+        # Verificación que el nodo tenga suficientes claves. Solo se pide prestado a un hermano
+        # que conserve al menos degree - 1 claves después de ceder una (como TreeB y _reparar)
+        if index > 0 and len(node.children[index - 1].keys) >= self.degree:
             self._borrow_from_prev(node, index)
-        elif index < len(node.children) - 1 and len(node.children[index + 1].keys) > self.degree * 2 // 3:
+        elif index < len(node.children) - 1 and len(node.children[index + 1].keys) >= self.degree:
             self._borrow_from_next(node, index)
         else:
             if index < len(node.children) - 1:
@@ -103,6 +174,8 @@ class BStarTree:
 
         child.keys.insert(0, node.keys[index - 1])
         node.keys[index - 1] = sibling.keys.pop()
+        child.ids.insert(0, node.ids[index - 1])
+        node.ids[index - 1] = sibling.ids.pop()
 
         if not sibling.is_leaf:
             child.children.insert(0, sibling.children.pop())
@@ -114,6 +187,8 @@ class BStarTree:
 
         child.keys.append(node.keys[index])
         node.keys[index] = sibling.keys.pop(0)
+        child.ids.append(node.ids[index])
+        node.ids[index] = sibling.ids.pop(0)
 
         if not sibling.is_leaf:
             child.children.append(sibling.children.pop(0))
@@ -125,38 +200,44 @@ class BStarTree:
 
         child.keys.append(node.keys.pop(index))
         child.keys.extend(sibling.keys)
+        child.ids.append(node.ids.pop(index))
+        child.ids.extend(sibling.ids)
 
         if not child.is_leaf:
             child.children.extend(sibling.children)
+        else:
+            child.next = sibling.next
         
         node.children.pop(index + 1)
 
     def _get_predecessor(self, node, index):
-        # Encuentra el predecesor del nodo en el índice dado
+        # Encuentra el predecesor del nodo en el índice dado y retorna su id y registro
         current = node.children[index]
         while not current.is_leaf:
             current = current.children[-1]
-        return current.keys[-1]
+        return current.ids[-1], current.keys[-1]
 
     def _get_successor(self, node, index):
-        # Encuentra el sucesor del nodo en el índice dado
+        # Encuentra el sucesor del nodo en el índice dado y retorna su id y registro
         current = node.children[index + 1]
         while not current.is_leaf:
             current = current.children[0]
-        return current.keys[0]
+        return current.ids[0], current.keys[0]
 
     def split_child(self, parent, index):
-        # Divide el hijo completo en el índice dado y actualiza el nodo padre
-        degree = self.degree
+        # Divide en dos el hijo desbordado (solo se usa con la raíz, que no tiene hermanos)
         full_child = parent.children[index]
-        new_child = BStarNode(is_leaf=full_child.is_leaf)
+        new_child = self._node_cls(is_leaf=full_child.is_leaf)
 
-        mid = degree - 1
+        mid = len(full_child.ids) // 2
         parent.keys.insert(index, full_child.keys[mid])
+        parent.ids.insert(index, full_child.ids[mid])
         parent.children.insert(index + 1, new_child)
 
         new_child.keys = full_child.keys[mid + 1:]
+        new_child.ids = full_child.ids[mid + 1:]
         full_child.keys = full_child.keys[:mid]
+        full_child.ids = full_child.ids[:mid]
 
         if not full_child.is_leaf:
             new_child.children = full_child.children[mid + 1:]
@@ -165,19 +246,267 @@ class BStarTree:
             new_child.next = full_child.next
             full_child.next = new_child
 
-    def _insert_non_full(self, node, id, name):
-        # Inserta una nueva clave en un nodo que no está lleno
+    def _insert(self, node, id, name):
+        # Inserta la clave en el subárbol; el nodo puede quedar con una clave de más
+        # y es su padre quien resuelve el desborde
+        index = self._slot_derecha(node.ids, id)
         if node.is_leaf:
-            index = 0
-            while index < len(node.keys) and id > node.keys[index].id:
-                index += 1
-            node.keys.insert(index, Node(id, name))
+            node.keys.insert(index, self._registro(id, name))
+            node.ids.insert(index, id)
         else:
-            index = 0
-            while index < len(node.keys) and id > node.keys[index].id:
-                index += 1
-            if len(node.children[index].keys) == (2 * self.degree - 1):
-                self.split_child(node, index)
-                if id > node.keys[index].id:
-                    index += 1
-            self._insert_non_full(node.children[index], id, name)
+            child = node.children[index]
+            self._insert(child, id, name)
+            if len(child.ids) > (2 * self.degree - 1):
+                self._overflow(node, index)
+
+    def _overflow(self, parent, index):
+        # Resuelve el desborde del hijo en index: redistribución con un hermano no lleno
+        # o, si los hermanos están llenos, división 2 a 3
+        max_keys = 2 * self.degree - 1
+        children = parent.children
+        if index > 0 and len(children[index - 1].ids) < max_keys:
+            self._redistribute(parent, index - 1, 2)
+        elif index < len(children) - 1 and len(children[index + 1].ids) < max_keys:
+            self._redistribute(parent, index, 2)
+        elif index < len(children) - 1:
+            self._redistribute(parent, index, 3)
+        else:
+            self._redistribute(parent, index - 1, 3)
+
+    def _redistribute(self, parent, index, count):
+        # Reparte las claves de los hijos index e index + 1 (más su separador) en 'count' nodos
+        # de tamaño parejo. Con count = 2 es un traspaso entre hermanos; con count = 3 es la
+        # división 2 a 3 propia del árbol B*.
+        left = parent.children[index]
+        right = parent.children[index + 1]
+        keys = left.keys + [parent.keys[index]] + right.keys
+        ids = left.ids[:]  # Copia del mismo tipo que los ids del nodo (lista o array)
+        ids.append(parent.ids[index])
+        ids.extend(right.ids)
+        children = left.children + right.children
+
+        nodes = [left, right]
+        if count == 3:
+            middle = self._node_cls(is_leaf=left.is_leaf)
+            if left.is_leaf:
+                middle.next = right
+                left.next = middle
+            nodes.insert(1, middle)
+
+        per_node, extra = divmod(len(ids) - (count - 1), count)
+        separator_keys = []
+        separator_ids = ids[:0]
+        pos = 0
+        child_pos = 0
+        for n, node in enumerate(nodes):
+            size = per_node + 1 if n < extra else per_node
+            node.keys = keys[pos:pos + size]
+            node.ids = ids[pos:pos + size]
+            if not node.is_leaf:
+                node.children = children[child_pos:child_pos + size + 1]
+                child_pos += size + 1
+            pos += size
+            if n < count - 1:
+                # La clave siguiente sube al padre como separador
+                separator_keys.append(keys[pos])
+                separator_ids.append(ids[pos])
+                pos += 1
+
+        parent.keys[index:index + 1] = separator_keys
+        parent.ids[index:index + 1] = separator_ids
+        parent.children[index:index + 2] = nodes
+
+    def structure_stats(self):
+        # Altura, cantidad de nodos y llenado promedio respecto de 2 * degree - 1 claves por nodo
+        return estadisticas_nodos(self.root, 2 * self.degree - 1)
+
+    # Operaciones en lote: el lote se ordena una vez y se recorre con un descenso compartido.
+    # Cada nodo reparte entre sus hijos el tramo de ids que les corresponde. Al volver de la
+    # recursión, los hijos desbordados se resuelven como en las inserciones individuales
+    # (traspaso a un hermano o división 2 a 3) y los que quedan con menos de degree - 1
+    # claves se fusionan con un hermano. Solo la raíz, que no tiene hermanos, se divide
+    # con el mismo reparto que bulk_load.
+
+    def search_many(self, ids):
+        # Retorna el Resultado de cada id, en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.search(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        self._search_many(self.root, ordenados, 0, len(ordenados), orden, resultados)
+        return resultados
+
+    def _search_many(self, node, ids, inicio, fin, orden, resultados):
+        claves = node.ids
+        i = 0
+        j = inicio
+        while j < fin:
+            id = ids[j]
+            i = self._slot(claves, id, i)
+            if i < len(claves) and claves[i] == id:
+                resultados[orden[j]] = Resultado((True, self._nombre(node.keys[i])))
+                j += 1
+            elif node.is_leaf:
+                j += 1
+            else:
+                # Los ids menores que la clave i continúan juntos en el hijo i
+                k = fin_tramo(ids, claves[i], j, fin) if i < len(claves) else fin
+                self._search_many(node.children[i], ids, j, k, orden, resultados)
+                j = k
+
+    def insert_many(self, pares):
+        # Inserta un lote de pares (id, name) y retorna sus Resultado en el orden del lote
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        orden, ids = ordenar_lote([id for id, _ in pares])
+        names = [pares[p][1] for p in orden]
+        self._insert_many(self.root, ids, names, 0, len(ids))
+        self._ajustar_raiz()
+        return [Resultado((True, name)) for _, name in pares]
+
+    def _insert_many(self, node, ids, names, inicio, fin):
+        # Inserta ids[inicio:fin] en el subárbol; el nodo puede quedar desbordado y es su
+        # padre quien resuelve el desborde
+        if node.is_leaf:
+            i = 0
+            for j in range(inicio, fin):
+                i = self._slot_derecha(node.ids, ids[j], i)
+                node.keys.insert(i, self._registro(ids[j], names[j]))
+                node.ids.insert(i, ids[j])
+                i += 1
+            return
+        j = inicio
+        while j < fin:
+            i = self._slot_derecha(node.ids, ids[j])
+            k = fin_tramo(ids, node.ids[i], j, fin) if i < len(node.ids) else fin
+            child = node.children[i]
+            self._insert_many(child, ids, names, j, k)
+            if len(child.ids) > 2 * self.degree - 1:
+                self._desbordes(node, i)
+            j = k
+
+    def delete_many(self, ids):
+        # Elimina un lote de ids y retorna sus Resultado en el orden del lote
+        if len(ids) < LOTE_MINIMO:
+            return [self.delete(id) for id in ids]
+        orden, ordenados = ordenar_lote(ids)
+        resultados = [NO_ENCONTRADO] * len(ids)
+        self._delete_many(self.root, ordenados, 0, len(ordenados), orden, resultados)
+        self._ajustar_raiz()
+        return resultados
+
+    def _delete_many(self, node, ids, inicio, fin, orden, resultados):
+        if node.is_leaf:
+            i = 0
+            for j in range(inicio, fin):
+                id = ids[j]
+                i = self._slot(node.ids, id, i)
+                if i < len(node.ids) and node.ids[i] == id:
+                    node.ids.pop(i)
+                    resultados[orden[j]] = Resultado((True, self._nombre(node.keys.pop(i))))
+            return
+        j = inicio
+        while j < fin:
+            i = self._slot(node.ids, ids[j])
+            if i < len(node.ids) and node.ids[i] == ids[j]:
+                # La clave está en este nodo: se fusionan los dos hijos que separa y se
+                # elimina dentro del hijo fusionado junto con el resto de su tramo
+                self._merge(node, i)
+                continue
+            k = fin_tramo(ids, node.ids[i], j, fin) if i < len(node.ids) else fin
+            child = node.children[i]
+            self._delete_many(child, ids, j, k, orden, resultados)
+            if len(child.ids) > 2 * self.degree - 1:
+                self._desbordes(node, i)
+            elif len(child.ids) < self.degree - 1:
+                self._reparar(node, i)
+            j = k
+
+    def _desbordes(self, node, index):
+        # Resuelve con _overflow el desborde del hijo index, que tras un lote puede superar el
+        # máximo por muchas claves. Cada paso solo cambia los hijos vecinos del que desborda,
+        # así que la búsqueda del siguiente desbordado sigue desde el anterior a ese hijo y
+        # hasta el último hijo que pudo recibir claves
+        max_keys = 2 * self.degree - 1
+        children = node.children
+        i = ultimo = index
+        while True:
+            while i <= ultimo and len(children[i].ids) <= max_keys:
+                i += 1
+            if i > ultimo:
+                return
+            antes = len(children)
+            if antes == 1:
+                self._dividir(node, i)  # Nodo sin claves tras un lote: su único hijo no tiene hermanos
+            else:
+                self._overflow(node, i)
+            ultimo = min(max(ultimo, i + 1) + len(children) - antes, len(children) - 1)
+            i = max(i - 1, 0)
+
+    def _dividir(self, node, index):
+        # Divide el hijo desbordado (solo la raíz, que no tiene hermanos) en los nodos
+        # necesarios para que ninguno supere 2 * degree - 1 claves; las claves intermedias
+        # suben al padre como separadores
+        degree = self.degree
+        child = node.children[index]
+        keys, ids, children = child.keys, child.ids, child.children
+        separator_keys = []
+        separator_ids = ids[:0]  # Mismo tipo que los ids del nodo (lista o array)
+        nodes = []
+        pos = 0
+        for n, cantidad in enumerate(repartir(len(ids), 2 * degree - 1, degree - 1)):
+            if n:
+                separator_keys.append(keys[pos])
+                separator_ids.append(ids[pos])
+                pos += 1
+            parte = child if n == 0 else self._node_cls(is_leaf=child.is_leaf)
+            parte.keys = keys[pos:pos + cantidad]
+            parte.ids = ids[pos:pos + cantidad]
+            if not child.is_leaf:
+                parte.children = children[pos:pos + cantidad + 1]
+            if n:
+                if child.is_leaf:
+                    previa = nodes[-1] if nodes else child
+                    parte.next = previa.next
+                    previa.next = parte
+                nodes.append(parte)
+            pos += cantidad
+        node.keys[index:index] = separator_keys
+        node.ids[index:index] = separator_ids
+        node.children[index + 1:index + 1] = nodes
+
+    def _reparar(self, node, index):
+        # Fusiona el hijo que quedó con menos de degree - 1 claves con un hermano y vuelve a
+        # dividir el resultado si supera el máximo. Un nodo interno que quedó sin claves (con un
+        # solo hijo) no puede reparar a ese hijo: lo hace su padre al fusionarlo, en la unión
+        if len(node.children) == 1:
+            return
+        if index == len(node.children) - 1:
+            index -= 1
+        child = node.children[index]
+        union = len(child.children)  # Primer hijo que viene del hermano derecho
+        self._merge(node, index)
+        if not child.is_leaf:
+            for j in (union - 1, union):
+                if len(child.children[j].ids) < self.degree - 1:
+                    self._reparar(child, j)
+                    break
+        if len(child.ids) > 2 * self.degree - 1:
+            self._desbordes(node, index)
+
+    def _ajustar_raiz(self):
+        # Tras un lote la raíz puede quedar desbordada (se divide hacia arriba) o vacía (baja un nivel)
+        while len(self.root.ids) > 2 * self.degree - 1:
+            root = self._node_cls()
+            root.children.append(self.root)
+            self._dividir(root, 0)
+            self.root = root
+        while len(self.root.ids) == 0 and not self.root.is_leaf:
+            self.root = self.root.children[0]
+
+
+class BStarTreeCompacto(BStarTree):
+    # Árbol B* con el diseño compacto de nodos (ver almacenamiento)
+    _node_cls = BStarNodeCompacto
+    _registro = staticmethod(registro_compacto)
+    _nombre = staticmethod(nombre_compacto)
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+
+
+# Buffer pool de páginas de tamaño fijo sobre un archivo, con reemplazo LRU y escritura
+# diferida: las páginas modificadas se escriben en el archivo recién cuando se desalojan
+# o en flush(). Guarda las páginas ya decodificadas, así que un acierto no lee ni decodifica.
+#
+# Quien modifica una página debe llamar a modificar(pagina) después de cambiarla y sin
+# pedir otras páginas en el medio. Si la página se desalojó mientras se la tenía en uso,
+# modificar la vuelve a dejar residente (es el mismo objeto, y nadie más la releyó).
+
+CAPACIDAD_MINIMA = 8  # Páginas que una operación del árbol puede tener en uso a la vez
+
+
+class BufferPool:
+
+    def __init__(self, file, tamano_pagina, capacidad, decodificar, codificar):
+        if capacidad < CAPACIDAD_MINIMA:
+            raise ValueError(f"El buffer pool necesita al menos {CAPACIDAD_MINIMA} páginas")
+        self.file = file  # Archivo binario sin buffer (lecturas y escrituras posicionadas)
+        self.tamano_pagina = tamano_pagina
+        self.capacidad = capacidad
+        self.decodificar = decodificar  # decodificar(numero, datos) -> página
+        self.codificar = codificar  # codificar(pagina) -> bytes (a lo sumo tamano_pagina)
+        self.paginas = OrderedDict()  # Número -> página residente, de la menos a la más usada
+        self.sucias = set()  # Números de las páginas residentes modificadas
+        self.aciertos = 0
+        self.fallos = 0
+        self.lecturas = 0  # Páginas leídas del archivo
+        self.escrituras = 0  # Páginas escritas en el archivo
+        self.desalojos = 0
+
+    def obtener(self, numero):
+        # Retorna la página, leyéndola del archivo si no está residente
+        pagina = self.paginas.get(numero)
+        if pagina is not None:
+            self.aciertos += 1
+            self.paginas.move_to_end(numero)
+            return pagina
+        self.fallos += 1
+        pagina = self.decodificar(numero, self.leer(numero))
+        self._admitir(numero, pagina)
+        return pagina
+
+    def agregar(self, pagina):
+        # Página nueva o reutilizada: reemplaza a la residente y queda sucia sin leer el archivo
+        self.paginas.pop(pagina.numero, None)
+        self._admitir(pagina.numero, pagina)
+        self.sucias.add(pagina.numero)
+
+    def modificar(self, *paginas):
+        for pagina in paginas:
+            numero = pagina.numero
+            if numero in self.paginas:
+                self.paginas.move_to_end(numero)
+            else:
+                self._admitir(numero, pagina)
+            self.sucias.add(numero)
+
+    def inspeccionar(self, numero):
+        # Página residente o decodificada del archivo, sin contarla ni admitirla en el pool
+        pagina = self.paginas.get(numero)
+        if pagina is not None:
+            return pagina
+        self.file.seek(numero * self.tamano_pagina)
+        return self.decodificar(numero, self.file.read(self.tamano_pagina))
+
+    def _admitir(self, numero, pagina):
+        self.paginas[numero] = pagina
+        while len(self.paginas) > self.capacidad:
+            # Desaloja la página menos usada recientemente, escribiéndola si está sucia
+            victima, desalojada = self.paginas.popitem(last=False)
+            self.desalojos += 1
+            if victima in self.sucias:
+                self.sucias.discard(victima)
+                self.escribir(victima, self.codificar(desalojada))
+
+    def leer(self, numero):
+        self.lecturas += 1
+        self.file.seek(numero * self.tamano_pagina)
+        return self.file.read(self.tamano_pagina)
+
+    def escribir(self, numero, datos):
+        if len(datos) > self.tamano_pagina:
+            raise ValueError(f"La página {numero} ocupa {len(datos)} bytes (máximo {self.tamano_pagina})")
+        self.escrituras += 1
+        self.file.seek(numero * self.tamano_pagina)
+        self.file.write(datos.ljust(self.tamano_pagina, b'\0'))
+
+    def flush(self):
+        # Escribe las páginas sucias en orden de número (acceso secuencial al archivo)
+        for numero in sorted(self.sucias):
+            self.escribir(numero, self.codificar(self.paginas[numero]))
+        self.sucias.clear()
+
+    def estadisticas(self):
+        accesos = self.aciertos + self.fallos
+        return {
+            'Capacidad': self.capacidad,
+            'Residentes': len(self.paginas),
+            'Aciertos': self.aciertos,
+            'Fallos': self.fallos,
+            'Tasa_Aciertos': self.aciertos / accesos if accesos else 0.0,
+            'Lecturas': self.lecturas,
+            'Escrituras': self.escrituras,
+            'Desalojos': self.desalojos,
+            'Sucias': len(self.sucias),
+        }
@@ -0,0 +1,29 @@
+# Capa de búsqueda dentro de un nodo, compartida por los árboles B, B+ y B*.
+# Cada nodo mantiene una lista paralela 'ids' con las claves enteras, ordenada,
+# para ubicar el slot con bisect en O(log grado) en lugar de recorrerla.
+
+from bisect import bisect_left, bisect_right
+
+# Primer índice cuyo id es mayor o igual al buscado
+buscar_slot = bisect_left
+
+# Primer índice cuyo id es estrictamente mayor al buscado
+buscar_slot_derecha = bisect_right
+
+
+def buscar_slot_lineal(ids, id, inicio=0):
+    # Versión lineal equivalente a buscar_slot, usada como referencia en el benchmark
+    i = inicio
+    n = len(ids)
+    while i < n and id > ids[i]:
+        i += 1
+    return i
+
+
+def buscar_slot_derecha_lineal(ids, id, inicio=0):
+    # Versión lineal equivalente a buscar_slot_derecha
+    i = inicio
+    n = len(ids)
+    while i < n and id >= ids[i]:
+        i += 1
+    return i
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+
+# Cachés de páginas simuladas para estimar la E/S que tendrían los árboles en memoria si cada
+# nodo viviera en su propia página de disco: solo registran qué páginas están residentes
+# (no guardan datos). acceder(numero) retorna True en un acierto y admite la página en un
+# fallo; admitir(numero) deja residente una página recién creada, que no se lee del disco.
+
+
+class CacheLRU:
+    # Reemplazo LRU exacto: desaloja la página usada hace más tiempo
+
+    def __init__(self, capacidad):
+        if capacidad < 1:
+            raise ValueError("La caché simulada necesita al menos una página")
+        self.capacidad = capacidad
+        self.paginas = OrderedDict()  # Números residentes, del menos al más usado
+        self.desalojos = 0
+
+    def acceder(self, numero):
+        if numero in self.paginas:
+            self.paginas.move_to_end(numero)
+            return True
+        self.admitir(numero)
+        return False
+
+    def admitir(self, numero):
+        self.paginas[numero] = None
+        self.paginas.move_to_end(numero)
+        if len(self.paginas) > self.capacidad:
+            self.paginas.popitem(last=False)
+            self.desalojos += 1
+
+
+class CacheClock:
+    # Aproximación CLOCK de LRU: un bit de referencia por marco y una manecilla que da la
+    # segunda oportunidad a las páginas referenciadas desde su última pasada
+
+    def __init__(self, capacidad):
+        if capacidad < 1:
+            raise ValueError("La caché simulada necesita al menos una página")
+        self.capacidad = capacidad
+        self.marcos = []  # Página de cada marco
+        self.referencia = bytearray(capacidad)
+        self.posicion = {}  # Número de página -> marco
+        self.manecilla = 0
+        self.desalojos = 0
+
+    def acceder(self, numero):
+        marco = self.posicion.get(numero)
+        if marco is not None:
+            self.referencia[marco] = 1
+            return True
+        self.admitir(numero)
+        return False
+
+    def admitir(self, numero):
+        marco = self.posicion.get(numero)
+        if marco is None:
+            if len(self.marcos) < self.capacidad:
+                marco = len(self.marcos)
+                self.marcos.append(numero)
+            else:
+                while self.referencia[self.manecilla]:
+                    self.referencia[self.manecilla] = 0
+                    self.manecilla = (self.manecilla + 1) % self.capacidad
+                marco = self.manecilla
+                del self.posicion[self.marcos[marco]]
+                self.marcos[marco] = numero
+                self.manecilla = (marco + 1) % self.capacidad
+                self.desalojos += 1
+            self.posicion[numero] = marco
+        self.referencia[marco] = 1
+
+
+POLITICAS = {'lru': CacheLRU, 'clock': CacheClock}
+
+
+def crear_cache(politica, capacidad):
+    return POLITICAS[politica](capacidad)
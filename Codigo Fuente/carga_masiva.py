@@ -0,0 +1,90 @@
+# Utilidades compartidas para construir árboles de abajo hacia arriba (bulk load)
+# a partir de pares (id, nombre) ya ordenados por id.
+
+
+def validar_orden(sorted_pairs):
+    # Materializa la entrada y verifica que los ids vengan en orden ascendente
+    pares = list(sorted_pairs)
+    for i in range(1, len(pares)):
+        if pares[i][0] < pares[i - 1][0]:
+            raise ValueError("bulk_load requiere los pares ordenados por id")
+    return pares
+
+
+def capacidad_por_llenado(maximo, minimo, fill_factor):
+    # Convierte el factor de llenado en la cantidad de claves por nodo
+    if not 0 < fill_factor <= 1:
+        raise ValueError("fill_factor debe estar en el intervalo (0, 1]")
+    return max(minimo, 1, min(maximo, round(maximo * fill_factor)))
+
+
+def repartir(total, capacidad, minimo):
+    # Reparte 'total' elementos en nodos separados por una clave que sube al padre.
+    # Retorna la cantidad de claves de cada nodo, garantizando el mínimo en todos.
+    nodos = -(-(total + 1) // (capacidad + 1))
+    while nodos > 1 and (total + 1) // nodos - 1 < minimo:
+        nodos -= 1
+    claves = total - (nodos - 1)  # Las claves restantes suben como separadores
+    base, extra = divmod(claves, nodos)
+    return [base + 1 if i < extra else base for i in range(nodos)]
+
+
+def repartir_hojas(total, capacidad, minimo):
+    # Reparte 'total' registros en hojas de un árbol B+, donde ninguna clave sube al padre
+    nodos = max(1, -(-total // capacidad))
+    while nodos > 1 and total // nodos < minimo:
+        nodos -= 1
+    base, extra = divmod(total, nodos)
+    return [base + 1 if i < extra else base for i in range(nodos)]
+
+
+def construir_internos(nivel, separadores, capacidad, minimo, nuevo_nodo):
+    # Agrupa un nivel de nodos bajo nodos internos hasta llegar a una única raíz.
+    # 'separadores' tiene una clave entre cada par de nodos consecutivos del nivel.
+    while len(nivel) > 1:
+        superior = []
+        siguientes = []
+        pos = 0
+        hijo = 0
+        for cantidad in repartir(len(separadores), capacidad, minimo):
+            if superior:
+                siguientes.append(separadores[pos])
+                pos += 1
+            superior.append(nuevo_nodo(False, separadores[pos:pos + cantidad],
+                                       nivel[hijo:hijo + cantidad + 1]))
+            pos += cantidad
+            hijo += cantidad + 1
+        nivel = superior
+        separadores = siguientes
+    return nivel[0]
+
+
+def construir_niveles(registros, capacidad, minimo, nuevo_nodo):
+    # Construye un árbol tipo B (con registros en nodos internos) nivel por nivel.
+    # nuevo_nodo(es_hoja, registros, hijos) crea el nodo con la representación de cada árbol.
+    # Retorna la raíz y la lista de hojas en orden.
+    hojas = []
+    separadores = []
+    pos = 0
+    for cantidad in repartir(len(registros), capacidad, minimo):
+        if hojas:
+            separadores.append(registros[pos])  # Clave que sube al nivel superior
+            pos += 1
+        hojas.append(nuevo_nodo(True, registros[pos:pos + cantidad], []))
+        pos += cantidad
+    return construir_internos(hojas, separadores, capacidad, minimo, nuevo_nodo), hojas
+
+
+def construir_niveles_bplus(registros, capacidad, minimo, nuevo_nodo):
+    # Construye un árbol B+: todos los registros quedan en las hojas y los nodos
+    # internos solo guardan copias de los ids como separadores.
+    # Retorna la raíz y la lista de hojas en orden.
+    hojas = []
+    separadores = []
+    pos = 0
+    for cantidad in repartir_hojas(len(registros), capacidad, minimo):
+        if hojas:
+            separadores.append(registros[pos][0])  # El primer id de la hoja se copia al padre
+        hojas.append(nuevo_nodo(True, registros[pos:pos + cantidad], []))
+        pos += cantidad
+    return construir_internos(hojas, separadores, capacidad, minimo, nuevo_nodo), hojas
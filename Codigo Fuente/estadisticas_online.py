@@ -0,0 +1,125 @@
+import heapq
+import sys
+
+import numpy as np
+import pandas as pd
+
+from histograma import HistogramaLatencia
+from parser_operaciones import NOMBRES_OPERACION, RANGO
+
+
+# Estadísticas calculadas durante la corrida. El registro columnar entrega cada buffer de
+# muestras al vaciarse y aquí se acumulan, por operación, cantidad, suma, mínimo, máximo y
+# los 10 tiempos más rápidos y más lentos, además de un histograma de latencias para los
+# percentiles. Al terminar, el reporte sale de estos acumulados sin releer los logs.
+
+TOP = 10
+
+
+class EstadisticaOperacion:
+    __slots__ = ('cantidad', 'suma_ns', 'minimo_ns', 'maximo_ns', 'rapidos', 'lentos', 'registros', 'histograma')
+
+    def __init__(self):
+        self.cantidad = 0
+        self.suma_ns = 0
+        self.minimo_ns = None
+        self.maximo_ns = None
+        self.rapidos = []  # (tiempo, fila, id, nombre) de los TOP más rápidos
+        self.lentos = []  # (tiempo, -fila, id, nombre) de los TOP más lentos
+        self.registros = 0  # Registros recorridos (solo rangos)
+        self.histograma = HistogramaLatencia()
+
+    def agregar(self, tiempos, filas, ids, nombres):
+        # tiempos, filas e ids son arreglos NumPy de las muestras de esta operación en el bloque
+        self.cantidad += len(tiempos)
+        self.suma_ns += int(tiempos.sum())
+        minimo = int(tiempos.min())
+        maximo = int(tiempos.max())
+        self.minimo_ns = minimo if self.minimo_ns is None else min(self.minimo_ns, minimo)
+        self.maximo_ns = maximo if self.maximo_ns is None else max(self.maximo_ns, maximo)
+        self.histograma.registrar(tiempos)
+
+        # Solo los TOP candidatos de cada extremo del bloque compiten con los acumulados
+        k = min(TOP, len(tiempos))
+        rapidos = np.argpartition(tiempos, k - 1)[:k].tolist()
+        lentos = np.argpartition(tiempos, len(tiempos) - k)[len(tiempos) - k:].tolist()
+        self.rapidos = heapq.nsmallest(TOP, self.rapidos + [
+            (int(tiempos[i]), int(filas[i]), int(ids[i]), nombres[i]) for i in rapidos])
+        self.lentos = heapq.nlargest(TOP, self.lentos + [
+            (int(tiempos[i]), -int(filas[i]), int(ids[i]), nombres[i]) for i in lentos])
+
+    def tabla(self, muestras):
+        return pd.DataFrame({
+            'Tiempo(ms)': [tiempo / 1e6 for tiempo, _, _, _ in muestras],
+            'Id': [id for _, _, id, _ in muestras],
+            'Nombre': ['NA' if nombre is None else nombre for _, _, _, nombre in muestras],
+        })
+
+
+class AgregadorOnline:
+    # Estadísticas de una estructura, por tipo de operación
+
+    def __init__(self, estructura, progreso=None):
+        self.estructura = estructura
+        self.progreso = progreso
+        self.operaciones = {op: EstadisticaOperacion() for op in NOMBRES_OPERACION}
+
+    def agregar_bloque(self, ops, ids, tiempos, nombres, fila_inicial):
+        # ops, ids y tiempos son arreglos NumPy del bloque; nombres es la lista de nombres
+        filas = np.arange(fila_inicial, fila_inicial + len(ops))
+        for op in np.unique(ops).tolist():
+            indices = np.flatnonzero(ops == op)
+            nombres_op = [nombres[i] for i in indices.tolist()]
+            estadistica = self.operaciones[op]
+            estadistica.agregar(tiempos[indices], filas[indices], ids[indices], nombres_op)
+            if op == RANGO:
+                # En los rangos el nombre es la cantidad de registros recorridos
+                estadistica.registros += sum(nombres_op)
+        if self.progreso is not None:
+            self.progreso.actualizar(self.estructura, len(ops), int(tiempos.sum()))
+
+    def statistics(self):
+        # Mismo formato que usa print_statistics: top 10 y tiempos en ms por operación
+        statistics = {}
+        for op, estadistica in self.operaciones.items():
+            if not estadistica.cantidad:
+                continue
+            statistics[NOMBRES_OPERACION[op]] = {
+                'Top_10_Rapidos': estadistica.tabla(estadistica.rapidos),
+                'Top_10_Lentos': estadistica.tabla(estadistica.lentos),
+                'Tiempo_Promedio': estadistica.suma_ns / estadistica.cantidad / 1e6,
+                'Tiempo_Total': estadistica.suma_ns / 1e6,
+                'Tiempo_Minimo': estadistica.minimo_ns / 1e6,
+                'Tiempo_Maximo': estadistica.maximo_ns / 1e6,
+                'Percentiles': estadistica.histograma.percentiles(),
+            }
+            if op == RANGO:
+                statistics[NOMBRES_OPERACION[op]]['Registros'] = estadistica.registros
+        return statistics
+
+    def histogramas(self):
+        # {(estructura, operacion): histograma} de las operaciones registradas
+        return {(self.estructura, NOMBRES_OPERACION[op]): estadistica.histograma
+                for op, estadistica in self.operaciones.items() if estadistica.cantidad}
+
+
+class Progreso:
+    # Línea de progreso en vivo con las operaciones por segundo de cada estructura,
+    # calculadas sobre el último bloque registrado. Solo se muestra en una terminal.
+
+    def __init__(self, salida=sys.stderr):
+        self.salida = salida
+        self.activo = salida.isatty()
+        self.ritmo = {}  # Estructura -> operaciones/s del último bloque
+
+    def actualizar(self, estructura, operaciones, tiempo_ns):
+        self.ritmo[estructura] = operaciones / (tiempo_ns / 1e9) if tiempo_ns else 0.0
+        if self.activo:
+            linea = ' | '.join(f"{nombre}: {ritmo:,.0f} ops/s" for nombre, ritmo in self.ritmo.items())
+            self.salida.write(f"\r{linea}")
+            self.salida.flush()
+
+    def terminar(self):
+        if self.activo and self.ritmo:
+            self.salida.write("\n")
+            self.salida.flush()
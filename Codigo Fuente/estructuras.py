@@ -0,0 +1,138 @@
+import os
+from typing import Callable, NamedTuple
+
+from arbolb import TreeB
+from arreglo_ordenado import ArregloOrdenado, ArregloEytzinger
+from avl2 import AVL2
+from bplus import BPlusTree
+from bplus_paginado import BPlusTreePaginado
+from bstar import BStarTree
+from instantanea import grado_instantanea
+from parser_operaciones import INSERTAR, BUSCAR, ELIMINAR, RANGO
+from registrador import NA
+from rendimiento import gc_pausado
+from temporizador import reloj
+
+
+# Registro de las estructuras del benchmark. Cada estructura implementa la interfaz de
+# protocolo (insert, search y delete retornan un Resultado; range es opcional), así que
+# para agregar una nueva basta con registrarla aquí: el replay, los logs, el modo throughput,
+# el replay paralelo y los reportes recorren este registro en orden.
+
+
+class DefinicionEstructura(NamedTuple):
+    nombre: str
+    fabrica: Callable  # fabrica(degree) retorna la estructura vacía
+    log: str  # Directorio de su log binario
+    cargar: Callable  # cargar(ruta) retorna la estructura guardada con su dump(ruta); None si no admite instantáneas
+
+
+ESTRUCTURAS = {}
+
+
+def registrar_estructura(nombre, fabrica, log, cargar=None):
+    ESTRUCTURAS[nombre] = DefinicionEstructura(nombre, fabrica, log, cargar)
+
+
+registrar_estructura('AVL', lambda degree: AVL2(), 'logs/logAvl', AVL2.load)
+registrar_estructura('Arbol B', TreeB, 'logs/logBtree', TreeB.load)
+registrar_estructura('Arbol B+', BPlusTree, 'logs/logBtreeplus', BPlusTree.load)
+registrar_estructura('Arbol B*', BStarTree, 'logs/logBtreestar', BStarTree.load)
+registrar_estructura('Arbol B+ Paginado', BPlusTreePaginado, 'logs/logBtreeplusPaginado', BPlusTreePaginado.load)
+# Referencias sin punteros (ver arreglo_ordenado); no usan el grado
+registrar_estructura('Arreglo Ordenado', lambda degree: ArregloOrdenado(), 'logs/logArregloOrdenado', ArregloOrdenado.load)
+registrar_estructura('Arreglo Eytzinger', lambda degree: ArregloEytzinger(), 'logs/logArregloEytzinger',
+                     ArregloEytzinger.load)
+
+
+def crear_estructura(nombre, degree):
+    return ESTRUCTURAS[nombre].fabrica(degree)
+
+
+def crear_estructuras(degree, nombres=None):
+    # Instancia las estructuras indicadas (por defecto, todas las registradas)
+    return {nombre: crear_estructura(nombre, degree) for nombre in (nombres or ESTRUCTURAS)}
+
+
+def ruta_instantanea(directorio, nombre):
+    # Archivo de la instantánea de una estructura dentro del directorio dado ('Arbol B*' -> 'Arbol_B_.snap')
+    archivo = ''.join(c if c.isalnum() or c in '+-' else '_' for c in nombre)
+    return os.path.join(directorio, archivo + '.snap')
+
+
+def guardar_instantaneas(estructuras, directorio):
+    # Guarda cada estructura construida con su dump (ver instantanea)
+    os.makedirs(directorio, exist_ok=True)
+    for nombre, tree in estructuras.items():
+        tree.dump(ruta_instantanea(directorio, nombre))
+
+
+def cargar_estructura(nombre, directorio):
+    # Restaura una estructura de su instantánea. El recolector cíclico se pausa mientras tanto:
+    # con millones de nodos nuevos, sus colecciones costarían más que la carga misma.
+    cargar = ESTRUCTURAS[nombre].cargar
+    if cargar is None:
+        raise ValueError(f"La estructura {nombre} no admite instantáneas")
+    with gc_pausado():
+        return cargar(ruta_instantanea(directorio, nombre))
+
+
+def cargar_estructuras(directorio, nombres=None):
+    return {nombre: cargar_estructura(nombre, directorio) for nombre in (nombres or ESTRUCTURAS)}
+
+
+def grado_instantaneas(directorio, nombres=None):
+    # Grado de los árboles guardados en el directorio, tomado de la primera instantánea que lo indique
+    for nombre in (nombres or ESTRUCTURAS):
+        ruta = ruta_instantanea(directorio, nombre)
+        grado = grado_instantanea(ruta) if os.path.isfile(ruta) else None
+        if grado:
+            return grado
+    return None
+
+
+def directorios_log(nombres=None):
+    # Directorio del log binario de cada estructura
+    return {nombre: ESTRUCTURAS[nombre].log for nombre in (nombres or ESTRUCTURAS)}
+
+
+def reproducir(estructuras, registros, lector):
+    # Ejecuta cada operación de la traza sobre todas las estructuras, una tras otra, midiendo
+    # cada ejecución solo con dos lecturas del reloj y registrándola en el RegistroColumnar
+    # de su estructura. El recorrido por rango solo corre en las estructuras que lo definen.
+    destinos = [(tree.insert, tree.search, tree.delete, registros[nombre].agregar)
+                for nombre, tree in estructuras.items()]
+    con_rango = [(tree.range, registros[nombre].agregar)
+                 for nombre, tree in estructuras.items() if hasattr(tree, 'range')]
+
+    for op, id_value, dato in lector:
+        if op == INSERTAR:
+            # El dato de la inserción es el nombre
+            for insert, _, _, agregar in destinos:
+                start_time = reloj()
+                insert(id_value, dato)
+                end_time = reloj()
+                agregar(INSERTAR, id_value, NA, end_time - start_time, dato)
+
+        elif op == BUSCAR:
+            for _, search, _, agregar in destinos:
+                start_time = reloj()
+                resultado = search(id_value)
+                end_time = reloj()
+                agregar(BUSCAR, id_value, resultado.encontrado, end_time - start_time, resultado.nombre)
+
+        elif op == ELIMINAR:
+            # delete informa si encontró la clave; no hacen falta búsquedas de confirmación
+            for _, _, delete, agregar in destinos:
+                start_time = reloj()
+                resultado = delete(id_value)
+                end_time = reloj()
+                agregar(ELIMINAR, id_value, resultado.encontrado, end_time - start_time, resultado.nombre)
+
+        elif op == RANGO:
+            # Límites inclusivos; 'Nombre' guarda la cantidad de registros recorridos
+            for rango, agregar in con_rango:
+                start_time = reloj()
+                cantidad = sum(1 for _ in rango(id_value, dato))
+                end_time = reloj()
+                agregar(RANGO, id_value, cantidad > 0, end_time - start_time, cantidad)
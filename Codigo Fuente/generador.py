@@ -0,0 +1,244 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from parser_operaciones import INSERTAR, BUSCAR, ELIMINAR, RANGO
+from traza_binaria import EscritorTraza
+
+
+# Generador de trazas sintéticas en streaming. Las operaciones se generan por bloques con
+# NumPy y se escriben en el formato de texto de siempre o como traza compilada, así que
+# la memoria no depende de la cantidad de operaciones (sirve para 100M+).
+#
+# Claves: la i-ésima inserción usa la clave 2 * orden(i), donde orden depende de la
+# distribución; las claves de los fallos son impares, por lo que nunca existen, y los rangos
+# fallidos empiezan por encima de la mayor clave posible, así que no devuelven ninguna.
+# Las eliminaciones acertadas borran la clave viva más antigua, de modo que las claves
+# vivas son siempre las inserciones [borradas, insertadas) y los aciertos se eligen en
+# ese intervalo sin guardar un conjunto de claves.
+
+DISTRIBUCIONES = ('secuencial', 'inversa', 'uniforme', 'zipf', 'agrupada')
+OPERACIONES_POR_BLOQUE = 1 << 16
+LETRAS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+class Permutacion:
+    # Biyección de [0, n) en [0, n) sin tabla: i -> (a * i + b) mod n con mcd(a, n) = 1.
+    # a cerca de n / phi reparte los valores consecutivos por todo el intervalo.
+
+    def __init__(self, n, rng):
+        self.n = max(n, 1)
+        a = max(int(self.n / 1.6180339887), 1) | 1
+        while math.gcd(a, self.n) != 1:
+            a += 1
+        self.a = a
+        self.b = int(rng.integers(self.n))
+
+    def __call__(self, i):
+        return (self.a * i + self.b) % self.n
+
+
+def nombre_para(clave):
+    # Nombre determinista de una clave (solo letras, como exige el formato de texto)
+    letras = []
+    while True:
+        clave, resto = divmod(clave, 26)
+        letras.append(LETRAS[resto])
+        if not clave:
+            break
+    return 'N' + ''.join(letras)
+
+
+class Generador:
+
+    def __init__(self, operaciones, mezcla=(50, 35, 15, 0), distribucion='uniforme', fallos=0.1,
+                 semilla=42, zipf=1.1, cluster=1000, ancho_rango=100):
+        if distribucion not in DISTRIBUCIONES:
+            raise ValueError(f"Distribución desconocida: {distribucion}")
+        if not 0 <= fallos <= 1:
+            raise ValueError("La tasa de fallos debe estar entre 0 y 1")
+        if distribucion == 'zipf' and zipf <= 1:
+            raise ValueError("El exponente de Zipf debe ser mayor que 1")
+        mezcla = list(mezcla) + [0] * (4 - len(mezcla))
+        if any(peso < 0 for peso in mezcla) or not sum(mezcla):
+            raise ValueError("La mezcla de operaciones debe tener pesos no negativos")
+        self.operaciones = operaciones
+        self.probabilidades = np.array(mezcla, dtype=np.float64) / sum(mezcla)
+        self.distribucion = distribucion
+        self.fallos = fallos
+        self.zipf = zipf
+        self.cluster = cluster
+        self.ancho_rango = ancho_rango
+        self.rng = np.random.default_rng(semilla)
+        self.permutacion = Permutacion(operaciones, self.rng)
+        self.permutacion_clusters = Permutacion(-(-operaciones // cluster), self.rng)
+        # Cota de todas las claves insertadas (la distribución agrupada completa el último grupo)
+        self.limite_claves = 2 * max(operaciones, self.permutacion_clusters.n * cluster)
+        self.insertadas = 0
+        self.borradas = 0
+        self.accesos = 0  # Aciertos generados, para recorrer las claves en orden
+        self.conteo = {op: 0 for op in (INSERTAR, BUSCAR, ELIMINAR, RANGO)}
+        self.aciertos = 0
+        self.fallidas = 0
+
+    def clave(self, i):
+        # Clave de la i-ésima inserción (arreglo de índices)
+        if self.distribucion == 'secuencial':
+            orden = i
+        elif self.distribucion == 'inversa':
+            orden = self.operaciones - 1 - i
+        elif self.distribucion == 'agrupada':
+            # Grupos de 'cluster' claves consecutivas en posiciones dispersas del espacio de claves
+            orden = self.permutacion_clusters(i // self.cluster) * self.cluster + i % self.cluster
+        else:
+            orden = self.permutacion(i)
+        return 2 * orden
+
+    def elegir_vivas(self, insertadas, borradas):
+        # Índice de inserción de cada acierto, entre las claves vivas [borradas, insertadas)
+        vivas = insertadas - borradas
+        n = len(vivas)
+        if self.distribucion in ('secuencial', 'inversa'):
+            paso = self.accesos + np.arange(n)
+            self.accesos += n
+            desplazamiento = paso % vivas
+            return borradas + desplazamiento if self.distribucion == 'secuencial' else insertadas - 1 - desplazamiento
+        if self.distribucion == 'zipf':
+            # Las claves vivas más antiguas son las más populares
+            rango = np.minimum(self.rng.zipf(self.zipf, n), np.iinfo(np.int64).max // 2) - 1
+            return borradas + rango % vivas
+        centro = borradas + (self.rng.random(n) * vivas).astype(np.int64)
+        if self.distribucion == 'agrupada':
+            # Accesos concentrados alrededor de un punto, dentro de su grupo de claves vecinas
+            centro = centro + np.rint(self.rng.normal(0, self.cluster / 4, n)).astype(np.int64)
+            centro = np.clip(centro, borradas, insertadas - 1)
+        return centro
+
+    def bloques(self):
+        # Genera bloques (ops, ids, datos); en las inserciones datos es la clave (para el nombre),
+        # en los rangos el límite superior y -1 en el resto
+        restantes = self.operaciones
+        while restantes > 0:
+            m = min(OPERACIONES_POR_BLOQUE, restantes)
+            restantes -= m
+            ops = self.rng.choice(4, size=m, p=self.probabilidades)
+            fallo = self.rng.random(m) < self.fallos
+            es_insercion = ops == INSERTAR
+
+            # Las eliminaciones acertadas sin claves vivas pasan a ser fallos
+            borra = (ops == ELIMINAR) & ~fallo
+            while True:
+                insertadas = self.insertadas + np.cumsum(es_insercion) - es_insercion
+                borradas = self.borradas + np.cumsum(borra) - borra
+                sin_vivas = borra & (insertadas <= borradas)
+                if not sin_vivas.any():
+                    break
+                borra &= ~sin_vivas
+            hay_vivas = insertadas > borradas
+            acierta = ((ops == BUSCAR) | (ops == RANGO)) & ~fallo & hay_vivas
+            falla = ((ops == BUSCAR) | (ops == ELIMINAR) | (ops == RANGO)) & ~acierta & ~borra
+
+            ids = np.empty(m, dtype=np.int64)
+            ids[es_insercion] = self.clave(insertadas[es_insercion])
+            ids[borra] = self.clave(borradas[borra])
+            ids[acierta] = self.clave(self.elegir_vivas(insertadas[acierta], borradas[acierta]))
+            ids[falla] = 2 * self.rng.integers(0, max(self.operaciones, 1), int(falla.sum())) + 1
+            es_rango = ops == RANGO
+            ids[falla & es_rango] += self.limite_claves
+
+            datos = np.full(m, -1, dtype=np.int64)
+            datos[es_insercion] = ids[es_insercion]
+            datos[es_rango] = ids[es_rango] + self.ancho_rango
+
+            self.insertadas += int(es_insercion.sum())
+            self.borradas += int(borra.sum())
+            for op, cantidad in enumerate(np.bincount(ops, minlength=4).tolist()):
+                self.conteo[op] += cantidad
+            self.aciertos += int(acierta.sum() + borra.sum())
+            self.fallidas += int(falla.sum())
+            yield ops, ids, datos
+
+    def escribir_texto(self, ruta):
+        with open(ruta, 'w') as file:
+            for ops, ids, datos in self.bloques():
+                lineas = []
+                for op, id, dato in zip(ops.tolist(), ids.tolist(), datos.tolist()):
+                    if op == INSERTAR:
+                        lineas.append(f'Insert:{{id:{id},nombre:"{nombre_para(id)}"}}\n')
+                    elif op == BUSCAR:
+                        lineas.append(f'Search:{{id:{id}}}\n')
+                    elif op == ELIMINAR:
+                        lineas.append(f'Delete:{{id:{id}}}\n')
+                    else:
+                        lineas.append(f'Range:{{from:{id},to:{dato}}}\n')
+                file.write(''.join(lineas))
+
+    def escribir_binario(self, ruta):
+        escritor = EscritorTraza(ruta)
+        for ops, ids, datos in self.bloques():
+            es_insercion = ops == INSERTAR
+            nombres = [nombre_para(clave) for clave in ids[es_insercion].tolist()]
+            primero = escritor.agregar_nombres(nombres)
+            datos[es_insercion] = primero + np.arange(len(nombres))
+            registros = np.empty((len(ops), 3), dtype='<i8')
+            registros[:, 0] = ops
+            registros[:, 1] = ids
+            registros[:, 2] = datos
+            escritor.escribir_registros(registros)
+        escritor.close()
+
+    def resumen(self):
+        return {
+            'Inserciones': self.conteo[INSERTAR],
+            'Busquedas': self.conteo[BUSCAR],
+            'Eliminaciones': self.conteo[ELIMINAR],
+            'Rangos': self.conteo[RANGO],
+            'Aciertos': self.aciertos,
+            'Fallos': self.fallidas,
+            'Claves_Vivas': self.insertadas - self.borradas,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera trazas sintéticas de operaciones")
+    parser.add_argument('salida', help="Archivo de salida (.txt de texto o .bin compilado)")
+    parser.add_argument('--operaciones', type=int, default=1000000, help="Cantidad de operaciones")
+    parser.add_argument('--mezcla', default='50,35,15',
+                        help="Pesos de inserción, búsqueda, eliminación y opcionalmente rango, p. ej. 60,30,10,0")
+    parser.add_argument('--distribucion', choices=DISTRIBUCIONES, default='uniforme',
+                        help="Orden de las claves insertadas y de los accesos")
+    parser.add_argument('--fallos', type=float, default=0.1,
+                        help="Fracción de búsquedas, eliminaciones y rangos sobre claves inexistentes")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Exponente de la distribución zipf (> 1)")
+    parser.add_argument('--cluster', type=int, default=1000, help="Claves por grupo en la distribución agrupada")
+    parser.add_argument('--ancho-rango', type=int, default=100, help="Ancho de los rangos generados")
+    parser.add_argument('--formato', choices=('texto', 'binario'),
+                        help="Formato de salida (por defecto, binario si la salida termina en .bin)")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        mezcla = [float(peso) for peso in args.mezcla.split(',')]
+        generador = Generador(args.operaciones, mezcla, args.distribucion, args.fallos, args.semilla,
+                              args.zipf, args.cluster, args.ancho_rango)
+    except ValueError as error:
+        parser.error(str(error))
+
+    formato = args.formato or ('binario' if args.salida.endswith('.bin') else 'texto')
+    inicio = time.perf_counter()
+    if formato == 'binario':
+        generador.escribir_binario(args.salida)
+    else:
+        generador.escribir_texto(args.salida)
+    segundos = time.perf_counter() - inicio
+
+    resumen = generador.resumen()
+    print(f"{args.operaciones} operaciones ({formato}) en {segundos:.1f} s: "
+          f"{args.operaciones / segundos if segundos else 0:.0f} operaciones/s")
+    print(', '.join(f"{clave} {valor}" for clave, valor in resumen.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import numpy as np
+
+
+# Histograma de latencias con cubetas logarítmicas al estilo HDR. Cada potencia de 2 se
+# divide en 2^(PRECISION-1) cubetas lineales, de modo que el error relativo de cualquier
+# valor es menor que 2^-(PRECISION-1) y la memoria es fija sin importar cuántas muestras
+# se registren. Los histogramas con la misma precisión se combinan sumando sus conteos.
+
+PRECISION = 8  # Bits significativos: error relativo < 0.8%
+BITS_MAXIMOS = 44  # Valores de hasta 2^44 ns (unas 4.9 horas); los mayores van a la última cubeta
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def cantidad_cubetas(precision=PRECISION, bits_maximos=BITS_MAXIMOS):
+    mitad = 1 << (precision - 1)
+    return (bits_maximos - precision + 2) * mitad
+
+
+def indices_cubeta(valores, precision=PRECISION):
+    # Cubeta de cada valor (arreglo de enteros no negativos):
+    #   v < 2^precision -> la cubeta es el propio valor (exacto)
+    #   si no, m = bits(v) - precision y la cubeta es m * 2^(precision-1) + (v >> m)
+    valores = np.asarray(valores, dtype=np.int64)
+    bits = np.frexp(valores.astype(np.float64))[1].astype(np.int64)  # Cantidad de bits de cada valor
+    magnitud = np.maximum(bits - precision, 0)
+    return magnitud * (1 << (precision - 1)) + (valores >> magnitud)
+
+
+def limite_superior(indice, precision=PRECISION):
+    # Mayor valor que cae en la cubeta 'indice'
+    mitad = 1 << (precision - 1)
+    if indice < 2 * mitad:
+        return indice
+    magnitud, resto = divmod(indice, mitad)
+    magnitud -= 1
+    mantisa = resto + mitad
+    return ((mantisa + 1) << magnitud) - 1
+
+
+class HistogramaLatencia:
+
+    def __init__(self, precision=PRECISION, bits_maximos=BITS_MAXIMOS):
+        self.precision = precision
+        self.conteos = np.zeros(cantidad_cubetas(precision, bits_maximos), dtype=np.int64)
+        self.total = 0
+        self.minimo = None
+        self.maximo = None
+
+    def registrar(self, valores):
+        # Agrega un arreglo de latencias en ns
+        if not len(valores):
+            return
+        indices = np.minimum(indices_cubeta(valores, self.precision), len(self.conteos) - 1)
+        self.conteos += np.bincount(indices, minlength=len(self.conteos))
+        self.total += len(valores)
+        minimo, maximo = int(np.min(valores)), int(np.max(valores))
+        self.minimo = minimo if self.minimo is None else min(self.minimo, minimo)
+        self.maximo = maximo if self.maximo is None else max(self.maximo, maximo)
+
+    def combinar(self, otro):
+        if otro.precision != self.precision or len(otro.conteos) != len(self.conteos):
+            raise ValueError("Solo se pueden combinar histogramas con la misma precisión")
+        self.conteos += otro.conteos
+        self.total += otro.total
+        for valor in (otro.minimo, otro.maximo):
+            if valor is not None:
+                self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+                self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def percentil(self, p):
+        # Valor en ns bajo el cual queda el p% de las muestras (límite superior de su cubeta)
+        if not self.total:
+            return None
+        objetivo = max(int(np.ceil(p / 100 * self.total)), 1)
+        indice = int(np.searchsorted(np.cumsum(self.conteos), objetivo))
+        return min(limite_superior(indice, self.precision), self.maximo)
+
+    def percentiles(self, valores=PERCENTILES):
+        return {p: self.percentil(p) for p in valores}
+
+    def a_arreglo(self):
+        # Forma compacta para guardar: fila 0 las cubetas no vacías, fila 1 sus conteos,
+        # y al final (precisión, cubetas, mínimo, máximo)
+        indices = np.flatnonzero(self.conteos)
+        meta = [self.precision, len(self.conteos),
+                -1 if self.minimo is None else self.minimo, -1 if self.maximo is None else self.maximo]
+        return np.concatenate([indices, self.conteos[indices], meta]).astype(np.int64)
+
+    @classmethod
+    def desde_arreglo(cls, arreglo):
+        arreglo = np.asarray(arreglo, dtype=np.int64)
+        precision, cubetas, minimo, maximo = arreglo[-4:].tolist()
+        histograma = cls(precision)
+        if cubetas != len(histograma.conteos):
+            histograma.conteos = np.zeros(cubetas, dtype=np.int64)
+        mitad = (len(arreglo) - 4) // 2
+        histograma.conteos[arreglo[:mitad]] = arreglo[mitad:2 * mitad]
+        histograma.total = int(histograma.conteos.sum())
+        histograma.minimo = None if minimo < 0 else minimo
+        histograma.maximo = None if maximo < 0 else maximo
+        return histograma
+
+
+def guardar_histogramas(histogramas, ruta):
+    # histogramas: {(estructura, operacion): HistogramaLatencia} -> archivo .npz
+    np.savez(ruta, **{f"{estructura}|{operacion}": histograma.a_arreglo()
+                      for (estructura, operacion), histograma in histogramas.items()})
+
+
+def cargar_histogramas(ruta):
+    with np.load(ruta) as datos:
+        return {tuple(clave.split('|', 1)): HistogramaLatencia.desde_arreglo(datos[clave]) for clave in datos.files}
+
+
+def combinar_archivos(rutas):
+    # Combina los histogramas de varias corridas o procesos, por estructura y operación
+    combinados = {}
+    for ruta in rutas:
+        for clave, histograma in cargar_histogramas(ruta).items():
+            if clave in combinados:
+                combinados[clave].combinar(histograma)
+            else:
+                combinados[clave] = histograma
+    return combinados
@@ -0,0 +1,134 @@
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+
+# Instantáneas binarias de los árboles construidos (sin pickle), para restaurar un árbol
+# caliente sin volver a reproducir sus inserciones. Formato (little-endian):
+#   Cabecera: magic, versión, tipo de árbol, grado, nodos, ids, registros, nombres distintos,
+#             índice de la primera hoja
+#   Forma: un entero por nodo en orden por niveles (uint32 con la cantidad de ids en los
+#          árboles B, B+ y B*; uint8 con los hijos presentes en el AVL: bit 0 izquierdo, bit 1 derecho)
+#   Ids: int64 de todos los nodos, en orden por niveles
+#   Registros: índice uint32 en la tabla de nombres del nombre de cada registro
+#   Tabla de nombres: cantidad + 1 posiciones int64 seguidas de los nombres en UTF-8
+# Cada sección empieza alineada a 8 bytes. En orden por niveles los hijos de los nodos de un
+# nivel aparecen seguidos en el siguiente, así que no hace falta guardar punteros.
+
+MAGIC = b'TRSN'
+VERSION = 1
+CABECERA = struct.Struct('<4sHHqqqqqq')
+TIPO_AVL, TIPO_B, TIPO_BPLUS, TIPO_BSTAR = 1, 2, 3, 4
+TIPO_ARREGLO = 5  # Arreglos ordenados (arreglo_ordenado): sin nodos, solo ids y nombres
+HIJO_IZQUIERDO, HIJO_DERECHO = 1, 2
+
+
+def _alinear(datos):
+    return datos + b'\0' * (-len(datos) % 8)
+
+
+def escribir_instantanea(ruta, tipo, grado, forma, ids, nombres, primera_hoja=0):
+    # forma: array('I') o array('B') por nodo; ids: array('q'); nombres: nombre de cada registro.
+    # Los nombres repetidos se guardan una sola vez en la tabla.
+    if sys.byteorder != 'little':
+        raise ValueError("Las instantáneas requieren una arquitectura little-endian")
+    indices = {}
+    registros = array('I', [indices.setdefault(nombre, len(indices)) for nombre in nombres])
+    codificados = [nombre.encode('utf-8') for nombre in indices]
+    posiciones = array('q', accumulate(map(len, codificados), initial=0))
+    with open(ruta, 'wb') as file:
+        file.write(CABECERA.pack(MAGIC, VERSION, tipo, grado, len(forma), len(ids), len(registros),
+                                 len(codificados), primera_hoja))
+        for seccion in (forma, ids, registros, posiciones):
+            file.write(_alinear(seccion.tobytes()))
+        file.write(b''.join(codificados))
+
+
+def grado_instantanea(ruta):
+    # Grado guardado en la cabecera de una instantánea (0 en el AVL), o None si el archivo
+    # no es una instantánea de este formato
+    with open(ruta, 'rb') as file:
+        cabecera = file.read(CABECERA.size)
+    if len(cabecera) < CABECERA.size or cabecera[:len(MAGIC)] != MAGIC:
+        return None
+    return CABECERA.unpack(cabecera)[3]
+
+
+def leer_instantanea(ruta, tipo):
+    # Lee la instantánea con una sola lectura secuencial y retorna
+    # (grado, forma, ids, nombres de cada registro, primera hoja), con listas de Python
+    if sys.byteorder != 'little':
+        raise ValueError("Las instantáneas requieren una arquitectura little-endian")
+    with open(ruta, 'rb') as file:
+        datos = file.read()
+    mv = memoryview(datos)
+    magic, version, tipo_archivo, grado, nodos, total_ids, total_registros, total_nombres, primera_hoja = \
+        CABECERA.unpack_from(mv)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{ruta} no es una instantánea compatible")
+    if tipo_archivo != tipo:
+        raise ValueError(f"{ruta} es la instantánea de otro tipo de árbol")
+
+    posicion = CABECERA.size
+    secciones = []
+    for formato, cantidad in (('B' if tipo == TIPO_AVL else 'I', nodos), ('q', total_ids),
+                              ('I', total_registros), ('q', total_nombres + 1)):
+        tamano = cantidad * array(formato).itemsize
+        secciones.append(mv[posicion:posicion + tamano].cast(formato).tolist())
+        posicion += tamano + (-tamano % 8)
+    forma, ids, registros, posiciones = secciones
+
+    texto = mv[posicion:]
+    tabla = [str(texto[posiciones[i]:posiciones[i + 1]], 'utf-8') for i in range(total_nombres)]
+    texto.release()
+    mv.release()
+    return grado, forma, ids, [tabla[i] for i in registros], primera_hoja
+
+
+def volcar_niveles(ruta, tipo, grado, raiz, registros_de, nombre):
+    # Escribe la instantánea de un árbol B, B+ o B* (nodos con 'ids' y 'children').
+    # registros_de(nodo) retorna los registros del nodo y nombre(registro) su nombre.
+    forma = array('I')
+    ids = array('q')
+    nombres = []
+    primera_hoja = 0
+    nivel = [raiz]
+    while nivel:
+        siguiente = []
+        for nodo in nivel:
+            forma.append(len(nodo.ids))
+            ids.extend(nodo.ids)
+            nombres.extend(map(nombre, registros_de(nodo)))
+            siguiente.extend(nodo.children)
+        if not siguiente:
+            primera_hoja = len(forma) - len(nivel)  # Todas las hojas están en el último nivel
+        nivel = siguiente
+    escribir_instantanea(ruta, tipo, grado, forma, ids, nombres, primera_hoja)
+
+
+def construir_desde_niveles(forma, ids, nombres, primera_hoja, registros_internos, nuevo_nodo):
+    # Reconstruye un árbol B, B+ o B* a partir de lo leído con leer_instantanea.
+    # nuevo_nodo(es_hoja, ids, nombres) crea el nodo con la representación de cada árbol;
+    # en el B+ (registros_internos False) los nodos internos no tienen nombres.
+    # Retorna la raíz y la lista de hojas en orden.
+    nodos = []
+    pos_id = 0
+    pos_nombre = 0
+    for k, cantidad in enumerate(forma):
+        es_hoja = k >= primera_hoja
+        fin_id = pos_id + cantidad
+        if es_hoja or registros_internos:
+            nodos.append(nuevo_nodo(es_hoja, ids[pos_id:fin_id], nombres[pos_nombre:pos_nombre + cantidad]))
+            pos_nombre += cantidad
+        else:
+            nodos.append(nuevo_nodo(es_hoja, ids[pos_id:fin_id], []))
+        pos_id = fin_id
+
+    # Los hijos de cada nodo interno son los siguientes nodos del orden por niveles
+    hijo = 1
+    for k in range(primera_hoja):
+        cantidad = forma[k] + 1
+        nodos[k].children = nodos[hijo:hijo + cantidad]
+        hijo += cantidad
+    return nodos[0], nodos[primera_hoja:]
@@ -0,0 +1,411 @@
+from bisect import bisect_left, bisect_right
+from itertools import count
+
+from avl2 import AVL2, Node2
+from operaciones_lote import LOTE_MINIMO, ordenar_lote
+from parser_operaciones import INSERTAR, BUSCAR, ELIMINAR, RANGO, NOMBRES_OPERACION
+from protocolo import Resultado, NO_ENCONTRADO
+
+
+# Contadores estructurales por tipo de operación: nodos visitados, comparaciones de claves,
+# divisiones, fusiones, préstamos y rotaciones. Se activan cambiando la clase de un árbol ya
+# creado por una subclase instrumentada (instrumentar(tree)); las clases originales no se
+# modifican, así que un árbol sin instrumentar no paga ningún costo.
+#
+# En los árboles B, B+ y B* cada búsqueda dentro de un nodo (_slot o _slot_derecha) cuenta
+# como un nodo visitado, con las comparaciones de su búsqueda binaria. Las operaciones en
+# lote (insert_many, search_many, delete_many) no se atribuyen a un tipo de operación: se
+# cuentan aparte en contador_lote, con una operación por clave del lote.
+#
+# Con una caché simulada (instrumentar(tree, cache), ver cache_simulado) cada nodo visitado es
+# además un acceso a su página: un nodo por página, identificada por el objeto de sus claves
+# (el nodo mismo en el AVL). Las divisiones, fusiones y préstamos reemplazan listas de claves y
+# crean o liberan nodos, así que después de cada uno se reubican las páginas de los nodos
+# afectados: conservan su número, y los nodos nuevos se escriben y quedan residentes sin contar
+# una lectura. Cada fallo de la caché es una lectura de disco estimada.
+
+CAMPOS = ('operaciones', 'nodos', 'comparaciones', 'divisiones', 'fusiones', 'prestamos', 'rotaciones',
+          'aciertos', 'fallos')
+
+# Métodos estructurales de cada árbol y el contador que incrementan
+EVENTOS = {
+    'split_child': 'divisiones',
+    '_split_child': 'divisiones',
+    '_dividir': 'divisiones',
+    '_merge': 'fusiones',
+    '_merge_children': 'fusiones',
+    '_borrow_from_prev': 'prestamos',
+    '_borrow_from_next': 'prestamos',
+    'rotate_left': 'rotaciones',
+    'rotate_right': 'rotaciones',
+}
+
+
+class Contadores:
+    __slots__ = CAMPOS
+
+    def __init__(self):
+        for campo in CAMPOS:
+            setattr(self, campo, 0)
+
+
+class Instrumentado:
+    # Mezcla para cualquier estructura: atribuye cada operación a sus contadores y cuenta
+    # los nodos visitados a través de la búsqueda dentro del nodo
+
+    _en_lote = False
+
+    def _operacion(self, op):
+        if self._en_lote:
+            return  # Operación individual de un lote chico: sigue en el contador del lote
+        self._contador = contador = self.contadores[op]
+        contador.operaciones += 1
+
+    def _visitar(self, nodo, comparaciones):
+        # nodo: objeto que identifica la página del nodo (sus claves, o el nodo en el AVL)
+        contador = self._contador
+        contador.nodos += 1
+        contador.comparaciones += comparaciones
+
+    def _nuevo_nodo(self, nodo):
+        pass
+
+    def _slot(self, ids, id, inicio=0):
+        self._visitar(ids, (len(ids) - inicio).bit_length())  # Máximo de la búsqueda binaria
+        return bisect_left(ids, id, inicio)
+
+    def _slot_derecha(self, ids, id, inicio=0):
+        self._visitar(ids, (len(ids) - inicio).bit_length())
+        return bisect_right(ids, id, inicio)
+
+    def insert(self, id, nombre):
+        self._operacion(INSERTAR)
+        return super().insert(id, nombre)
+
+    def search(self, id, *args):
+        if not args:  # Las llamadas recursivas (BStarTree.search) no son operaciones nuevas
+            self._operacion(BUSCAR)
+        return super().search(id, *args)
+
+    def delete(self, id):
+        self._operacion(ELIMINAR)
+        return super().delete(id)
+
+
+class AVLInstrumentado(Instrumentado):
+    # El AVL no tiene búsqueda dentro de nodos: sus descensos (también los de las operaciones
+    # en lote, con finger) se repiten aquí contando cada nodo y cada comparación (igualdad y
+    # orden) que hacen los de AVL2
+
+    def search(self, value):
+        self._operacion(BUSCAR)
+        current = self.root
+        while current is not None:
+            if value == current.label:
+                self._visitar(current, 1)
+                return Resultado((True, current.name))
+            self._visitar(current, 2)
+            if value < current.label:
+                current = current.left
+            else:
+                current = current.right
+        return NO_ENCONTRADO
+
+    def _find(self, value):
+        current = self.root
+        while current is not None:
+            if value == current.label:
+                self._visitar(current, 1)
+                return current
+            self._visitar(current, 2)
+            if value < current.label:
+                current = current.left
+            else:
+                current = current.right
+        return None
+
+    def insert(self, value, n):
+        self._operacion(INSERTAR)
+        node = Node2(value, n)
+        self._nuevo_nodo(node)
+        if self.root is None:
+            self.root = node
+            self.size = 1
+            return Resultado((True, n))
+        dad_node = None
+        curr_node = self.root
+        while curr_node is not None:
+            self._visitar(curr_node, 1)
+            dad_node = curr_node
+            if value < curr_node.label:
+                curr_node = curr_node.left
+            else:
+                curr_node = curr_node.right
+        node.parent = dad_node
+        if value < dad_node.label:
+            dad_node.left = node
+        else:
+            dad_node.right = node
+        self.size += 1
+        self.rebalance(dad_node)
+        return Resultado((True, n))
+
+    def _finger(self, node, value):
+        # Cada ancestro cuya clave se compara con value en la subida cuenta como visitado
+        if node is None:
+            return self.root
+        while True:
+            top = node
+            while top.parent is not None and top is top.parent.right:
+                top = top.parent
+            parent = top.parent
+            if parent is None:
+                return node
+            self._visitar(parent, 1)
+            if value < parent.label:
+                return node
+            node = parent
+
+    def search_many(self, values):
+        if len(values) < LOTE_MINIMO:
+            return [self.search(value) for value in values]
+        orden, ordenados = ordenar_lote(values)
+        resultados = [NO_ENCONTRADO] * len(values)
+        finger = None
+        for j, value in enumerate(ordenados):
+            current = self._finger(finger, value)
+            while current is not None:
+                if value == current.label:
+                    self._visitar(current, 1)
+                    finger = current
+                    resultados[orden[j]] = Resultado((True, current.name))
+                    break
+                self._visitar(current, 2)
+                if value < current.label:
+                    current = current.left
+                else:
+                    finger = current
+                    current = current.right
+        return resultados
+
+    def insert_many(self, pares):
+        if len(pares) < LOTE_MINIMO:
+            return [self.insert(*par) for par in pares]
+        orden, _ = ordenar_lote([value for value, _ in pares])
+        finger = None
+        for p in orden:
+            value, n = pares[p]
+            node = Node2(value, n)
+            self._nuevo_nodo(node)
+            dad_node = None
+            curr_node = self._finger(finger, value)
+            while curr_node is not None:
+                self._visitar(curr_node, 1)
+                dad_node = curr_node
+                if value < curr_node.label:
+                    curr_node = curr_node.left
+                else:
+                    curr_node = curr_node.right
+            if dad_node is None:
+                self.root = node
+            else:
+                node.parent = dad_node
+                if value < dad_node.label:
+                    dad_node.left = node
+                else:
+                    dad_node.right = node
+            self.size += 1
+            self.rebalance(dad_node)
+            finger = node
+        return [Resultado((True, n)) for _, n in pares]
+
+    def delete_many(self, values):
+        if len(values) < LOTE_MINIMO:
+            return [self.delete(value) for value in values]
+        orden, ordenados = ordenar_lote(values)
+        resultados = [NO_ENCONTRADO] * len(values)
+        finger = None
+        for j, value in enumerate(ordenados):
+            current = self._finger(finger, value)
+            while current is not None and value != current.label:
+                self._visitar(current, 2)
+                if value < current.label:
+                    current = current.left
+                else:
+                    finger = current
+                    current = current.right
+            if current is not None:
+                self._visitar(current, 1)
+                self._delete_node(current)
+                self.size -= 1
+                resultados[orden[j]] = Resultado((True, current.name))
+        return resultados
+
+
+class ConCache:
+    # Mezcla que agrega la caché de páginas simulada: cada nodo visitado es un acierto o un fallo
+
+    def _visitar(self, nodo, comparaciones):
+        contador = self._contador
+        contador.nodos += 1
+        contador.comparaciones += comparaciones
+        numero = self.paginas.get(id(nodo))
+        if numero is None:
+            # Nodo que todavía no tiene página (creado o restaurado antes de instrumentar)
+            numero = self.paginas[id(nodo)] = next(self._numeros)
+        if self.cache.acceder(numero):
+            contador.aciertos += 1
+        else:
+            contador.fallos += 1
+
+    def _nuevo_nodo(self, nodo):
+        # Nodo AVL recién creado: su página se escribe y queda residente. Si ocupa la dirección
+        # de un nodo eliminado, reutiliza su página (como la lista de páginas libres de un archivo)
+        numero = self.paginas.get(id(nodo))
+        if numero is None:
+            numero = self.paginas[id(nodo)] = next(self._numeros)
+        self.cache.admitir(numero)
+
+    def _reubicar(self, parent, antes):
+        # Tras una división, fusión o préstamo bajo parent: los nodos que siguen en el árbol
+        # conservan su página aunque cambie su lista de claves, los que salieron la liberan
+        # y los nuevos reciben una página residente (se acaban de escribir)
+        paginas = self.paginas
+        despues = [parent, *parent.children]
+        vivos = {id(nodo) for nodo in despues}
+        for nodo, ids in antes:
+            if nodo.ids is ids and id(nodo) in vivos:
+                continue
+            numero = paginas.pop(id(ids), None)
+            if numero is not None and id(nodo) in vivos:
+                paginas[id(nodo.ids)] = numero
+        for nodo in despues:
+            if id(nodo.ids) not in paginas:
+                numero = paginas[id(nodo.ids)] = next(self._numeros)
+                self.cache.admitir(numero)
+
+
+def _reubicar_paginas(metodo):
+    # Envuelve un método estructural (parent, index, ...) de los árboles B, B+ y B* para
+    # mantener las páginas de los nodos que modifica
+    def reubicado(self, parent, *args):
+        antes = [(nodo, nodo.ids) for nodo in (parent, *parent.children)]
+        resultado = metodo(self, parent, *args)
+        self._reubicar(parent, antes)
+        return resultado
+    reubicado.__name__ = metodo.__name__
+    return reubicado
+
+
+def _contar_evento(metodo, campo):
+    # Envuelve un método estructural para que incremente el contador indicado
+    def contado(self, *args):
+        contador = self._contador
+        setattr(contador, campo, getattr(contador, campo) + 1)
+        return metodo(self, *args)
+    contado.__name__ = metodo.__name__
+    return contado
+
+
+def _contar_rango(metodo):
+    # Solo las estructuras con recorrido por rango reciben este envoltorio (el replay
+    # decide si ejecuta los rangos según hasattr(tree, 'range'))
+    def range(self, lo, hi):
+        self._operacion(RANGO)
+        return metodo(self, lo, hi)
+    return range
+
+
+def _contar_lote(metodo):
+    # Las visitas y eventos de un lote (incluidas las operaciones individuales en que se
+    # resuelven los lotes chicos) van al contador del lote, no al de la última operación
+    def en_lote(self, lote):
+        self._contador = contador = self.contador_lote
+        contador.operaciones += len(lote)
+        self._en_lote = True
+        try:
+            return metodo(self, lote)
+        finally:
+            self._en_lote = False
+    en_lote.__name__ = metodo.__name__
+    return en_lote
+
+
+def _contar_redistribucion(metodo):
+    # _redistribute del árbol B*: con 2 nodos es un traspaso entre hermanos; con 3, la división 2 a 3
+    def contado(self, parent, index, count):
+        if count == 3:
+            self._contador.divisiones += 1
+        else:
+            self._contador.prestamos += 1
+        return metodo(self, parent, index, count)
+    contado.__name__ = metodo.__name__
+    return contado
+
+
+_CLASES = {}
+
+
+def clase_instrumentada(cls, con_cache=False):
+    # Subclase instrumentada de cls (con o sin caché simulada), creada una sola vez por clase
+    instrumentada = _CLASES.get((cls, con_cache))
+    if instrumentada is None:
+        atributos = {nombre: _contar_evento(getattr(cls, nombre), campo)
+                     for nombre, campo in EVENTOS.items() if hasattr(cls, nombre)}
+        if hasattr(cls, 'range'):
+            atributos['range'] = _contar_rango(cls.range)
+        if hasattr(cls, '_redistribute'):
+            atributos['_redistribute'] = _contar_redistribucion(cls._redistribute)
+        mezcla = AVLInstrumentado if issubclass(cls, AVL2) else Instrumentado
+        for nombre in ('insert_many', 'search_many', 'delete_many'):
+            if hasattr(cls, nombre):
+                # La versión de la mezcla, si repite el método contando sus visitas
+                atributos[nombre] = _contar_lote(getattr(mezcla, nombre, None) or getattr(cls, nombre))
+        mezclas = (mezcla,)
+        if con_cache:
+            mezclas = (ConCache,) + mezclas
+            for nombre in list(atributos):
+                if nombre in EVENTOS and EVENTOS[nombre] != 'rotaciones' or nombre == '_redistribute':
+                    atributos[nombre] = _reubicar_paginas(atributos[nombre])
+        sufijo = 'ConCache' if con_cache else 'Instrumentado'
+        instrumentada = _CLASES[(cls, con_cache)] = type(cls.__name__ + sufijo, (*mezclas, cls), atributos)
+    return instrumentada
+
+
+def instrumentable(tree):
+    # Solo las estructuras con nodos: el AVL y las que buscan dentro de sus nodos con _slot
+    return isinstance(tree, AVL2) or hasattr(tree, '_slot')
+
+
+def instrumentar(tree, cache=None):
+    # Activa los contadores en un árbol ya creado (o restaurado), cambiando su clase;
+    # con una caché de cache_simulado también estima la E/S de cada operación
+    if cache is not None and hasattr(tree, 'page_stats'):
+        raise ValueError("Las estructuras paginadas miden su E/S con su propio buffer pool")
+    tree.__class__ = clase_instrumentada(type(tree), cache is not None)
+    tree.contadores = {op: Contadores() for op in (INSERTAR, BUSCAR, ELIMINAR, RANGO)}
+    tree.contador_lote = Contadores()
+    tree._contador = tree.contadores[INSERTAR]
+    if cache is not None:
+        tree.cache = cache
+        tree.paginas = {}  # id de la lista de claves (o del nodo AVL) -> número de página
+        tree._numeros = count()
+    return tree
+
+
+def resumen_contadores(tree):
+    # Una fila por tipo de operación ejecutada (y una para las operaciones en lote), con los
+    # totales y los promedios por operación
+    filas = []
+    contadores = [(NOMBRES_OPERACION[op], contador) for op, contador in tree.contadores.items()]
+    contadores.append(('Lote', tree.contador_lote))
+    for nombre, contador in contadores:
+        if not contador.operaciones:
+            continue
+        fila = {'Operacion': nombre}
+        for campo in CAMPOS:
+            fila[campo.capitalize()] = getattr(contador, campo)
+        fila['Nodos_Por_Operacion'] = contador.nodos / contador.operaciones
+        fila['Comparaciones_Por_Operacion'] = contador.comparaciones / contador.operaciones
+        filas.append(fila)
+    return filas
@@ -1,26 +1,27 @@
 import string
-import re
-import time
 import os
-import pandas as pd
+import argparse
+import multiprocessing
 from avl2 import AVL2
-from node import Node
-from bplus import BPlusTree
-from arbolb import TreeB
-from bstar import BStarTree
+from bplus import BPlusTree, BPlusTreeCompacto
+from arbolb import TreeB, TreeBCompacto
+from bstar import BStarTree, BStarTreeCompacto
+from memoria import medir_construccion, rss_pico
+from traza_binaria import abrir_traza, compilar
+from temporizador import Temporizador, reloj
+from registrador import RegistroColumnar, LogColumnar, exportar_csv
+from estadisticas_online import AgregadorOnline, Progreso
+from histograma import guardar_histogramas, combinar_archivos, PERCENTILES
+from rendimiento import MedicionThroughput, comparar_lotes
+from paralelo import replay_paralelo
+from instrumentacion import instrumentable, instrumentar, resumen_contadores
+from cache_simulado import POLITICAS, crear_cache
+from barrido import barrido_grados, parsear_grados
+from estructuras import (crear_estructuras, directorios_log, reproducir, cargar_estructuras,
+                         guardar_instantaneas, grado_instantaneas)
 import shutil
 
 
-def Tiempo_Actual():
-    
-    #Obtiene la hora actual en formato HH:MM:SS.
-
-    tiempo_actual = time.time()
-    tiempo_struct = time.localtime(tiempo_actual)
-    hora_actual = time.strftime("%H:%M:%S", tiempo_struct)
-    return hora_actual
-
-
 def solicitar_ruta_archivo():
     
     #Solicita la ruta del archivo de operaciones
@@ -33,46 +34,37 @@ def solicitar_ruta_archivo():
             print("La ruta ingresada no es válida o el archivo no existe. Por favor, intente de nuevo.")
 
 
-def read_log(file_path):
+def add_positions(df):
 
-    #Lee un archivo de log en formato CSV y convierte la columna 'Tiempo(ms)' a tipo float.
+    #Añade una columna de posiciones al Dataframe del log en formato CSV, para facilitar la identificacion del Top 10.
     
-    data = pd.read_csv(file_path)
-    data['Tiempo(ms)'] = data['Tiempo(ms)'].astype(float)
-    return data
+    df = df.reset_index(drop=True)
+    df.index += 1
+    return df
 
+def formato_percentiles(percentiles):
 
-def TopStatistics(data):
+    #Formatea los percentiles de latencia (en ns) como 'p50 X ms, p90 Y ms, ...'
 
-    #Calcula estadísticas (top 10 tiempos más rápidos y lentos, tiempo promedio y total) 
-    #para operaciones de inserción, búsqueda y eliminación de cada estructura.
+    return ', '.join(f"p{p:g} {valor / 1e6:.5f} ms" for p, valor in percentiles.items())
 
-    operations = ['Insercion', 'Busqueda', 'Eliminacion']
-    statistics = {}
-    
-    for op in operations:
-        op_data = data[data['Tipo de operacion'] == op]
-        if not op_data.empty:
-            top_10_fastest = op_data.nsmallest(10, 'Tiempo(ms)')
-            top_10_slowest = op_data.nlargest(10, 'Tiempo(ms)')
-            avg_time = op_data['Tiempo(ms)'].mean()
-            total_time = op_data['Tiempo(ms)'].sum()
-            statistics[op] = {
-                'Top_10_Rapidos': top_10_fastest,
-                'Top_10_Lentos': top_10_slowest,
-                'Tiempo_Promedio': avg_time,
-                'Tiempo_Total': total_time
-            }
-    
-    return statistics
+def print_percentiles_report(histogramas, file_path):
 
-def add_positions(df):
+    #Imprime y guarda los percentiles de latencia de cada estructura y operación a partir de sus histogramas.
 
-    #Añade una columna de posiciones al Dataframe del log en formato CSV, para facilitar la identificacion del Top 10.
-    
-    df = df.reset_index(drop=True)
-    df.index += 1
-    return df
+    with open(file_path, 'a') as fileStatistics:
+        encabezado = (f"{'Estructura':<19}{'Operacion':<14}{'Muestras':>12}"
+                      + ''.join(f"{f'p{p:g}(ms)':>13}" for p in PERCENTILES) + f"{'Max(ms)':>13}\n")
+        print(encabezado, end='')
+        fileStatistics.write(encabezado)
+        for (estructura, operacion), histograma in histogramas.items():
+            linea = (f"{estructura:<19}{operacion:<14}{histograma.total:>12}"
+                     + ''.join(f"{valor / 1e6:>13.5f}" for valor in histograma.percentiles().values())
+                     + f"{histograma.maximo / 1e6:>13.5f}\n")
+            print(linea, end='')
+            fileStatistics.write(linea)
+        print()
+        fileStatistics.write("\n\n")
 
 def print_statistics(tree_name, statistics, file_path):
 
@@ -107,6 +99,11 @@ def print_statistics(tree_name, statistics, file_path):
             # Imprime el tiempo promedio y el tiempo total
             print(f"\nTiempo Promedio: {stats['Tiempo_Promedio']:.5f} ms\n")
             print(f"Tiempo Total: {stats['Tiempo_Total']:.5f} ms\n")
+            print(f"Tiempo Minimo: {stats['Tiempo_Minimo']:.5f} ms, Tiempo Maximo: {stats['Tiempo_Maximo']:.5f} ms\n")
+            print(f"Percentiles: {formato_percentiles(stats['Percentiles'])}\n")
+            if 'Registros' in stats:
+                registros_por_s = stats['Registros'] / (stats['Tiempo_Total'] / 1000) if stats['Tiempo_Total'] else 0
+                print(f"Registros recorridos: {stats['Registros']} ({registros_por_s:.0f} registros/s)\n")
             print("\n\n")
 
             # Escribe los 10 tiempos más rápidos en el archivo
@@ -120,358 +117,594 @@ def print_statistics(tree_name, statistics, file_path):
             # Escribe el tiempo promedio y el tiempo total en el archivo
             fileStatistics.write(f"\nTiempo Promedio: {stats['Tiempo_Promedio']:.5f} ms\n")
             fileStatistics.write(f"Tiempo Total: {stats['Tiempo_Total']:.5f} ms\n")
+            fileStatistics.write(f"Tiempo Minimo: {stats['Tiempo_Minimo']:.5f} ms, Tiempo Maximo: {stats['Tiempo_Maximo']:.5f} ms\n")
+            fileStatistics.write(f"Percentiles: {formato_percentiles(stats['Percentiles'])}\n")
+            if 'Registros' in stats:
+                fileStatistics.write(f"Registros recorridos: {stats['Registros']} ({registros_por_s:.0f} registros/s)\n")
             fileStatistics.write("\n\n")
 
 
 
-def solicitar_grado():
-
-    # Solicita al usuario ingresar el grado del árbol y verifica que sea un entero mayor que 1.
-    while True:
-        try:
-            grado = int(input("Ingrese el grado del árbol (debe ser un entero mayor que 1): "))
-            if grado > 1:
-                return grado
-            else:
-                print("El grado debe ser mayor que 1. Por favor, intente de nuevo.")
-        except ValueError:
-            print("Entrada inválida. Por favor, ingrese un número entero.")
-    
-
-
-
-
-
-
-
-# Apertura de los archivos .txt para lectura y escritura
-
-# Solicita la ruta del archivo al usuario
-ruta_archivo_op = solicitar_ruta_archivo()
-
-
-# Abre el archivo proporcionado por el usuario
-with open(ruta_archivo_op, 'r') as file:
-    lines = file.readlines()
-
-
-
-# Crea la carpeta de logs y output si no existe
-os.makedirs('logs', exist_ok=True)
-os.makedirs('output', exist_ok=True)
-
-
-
-# Crea los archivos de log en la carpeta de logs
-fileAvl = open('logs/logAvl.txt', 'w')
-fileBtree = open('logs/logBtree.txt', 'w')
-fileBtreeplus = open('logs/logBtreeplus.txt', 'w')
-fileBtreestar = open('logs/logBtreestar.txt', 'w')
-
-# Diccionario para mapear tipos de árboles con sus archivos de log
-log_files = {
-    'AVL': 'logs/logAvl.txt',
-    'Arbol B': 'logs/logBtree.txt',
-    'Arbol B+': 'logs/logBtreeplus.txt',
-    'Arbol B*': 'logs/logBtreestar.txt'
-}
-
-#Formateo del archivo.txt recibido de las operaciones a realizar
-
-patternInsert = re.compile(r'Insert:\{id:(\d+),nombre:"([A-Za-z-]+)"\}')
-
-patternSearch = re.compile(r'Search:\{id:(\d+)\}')
-
-patternDelete = re.compile(r'Delete:\{id:(\d+)\}')
-
-# Solicitud del grado del árbol B al usuario
-degree = solicitar_grado()
-print("\n")
-
-
-# Instancia de los diferentes tipos de estructura de datos
-
-TreeAVL = AVL2()
-
-TreeBplus = BPlusTree(degree)
-
-BTree = TreeB(degree)
-
-starTree = BStarTree(degree)
- 
-
-#Formateo del encabezado de los archivos log de cada estructura
-header = "Tipo de operacion,Hora de inicio,Hora de fin,Tiempo(ms),Id,Encontrado(Busqueda/Eliminacion),Nombre\n"
-fileAvl.write(header)
-fileBtree.write(header)
-fileBtreeplus.write(header)
-fileBtreestar.write(header)
+def print_structure_report(estructuras, degree, file_path):
 
+    #Imprime y guarda la altura, cantidad de nodos y llenado promedio de los árboles B, B+ y B* para el grado dado.
+    #'estructuras' asocia cada árbol con el resultado de su structure_stats().
 
+    with open(file_path, 'a') as fileStatistics:
+        encabezado = f"Estructura de los arboles (grado {degree}):\n"
+        print(encabezado)
+        fileStatistics.write(encabezado)
+        for tree_name, stats in estructuras.items():
+            linea = (f"{tree_name}: Altura {stats['Altura']}, Nodos {stats['Nodos']}, "
+                     f"Llenado promedio {stats['Llenado_Promedio'] * 100:.1f}%, "
+                     f"Llenado de hojas {stats['Llenado_Hojas'] * 100:.1f}%\n")
+            print(linea)
+            fileStatistics.write(linea)
+        fileStatistics.write("\n\n")
 
 
-# Itera sobre cada línea en la lista de líneas
-for line in lines:
-    
-    # Busca coincidencias en la línea para las operaciones de inserción, búsqueda y eliminación
-    matchInsert = patternInsert.search(line)
-    matchSearch = patternSearch.search(line)
-    matchDelete = patternDelete.search(line)
-
-    if matchInsert:
-        # Extrae id y nombre para la inserción
-        id_value = int(matchInsert.group(1)) 
-        name_value = matchInsert.group(2)
-
-        # Inserción en el árbol AVL
-        Hora_Inicio = Tiempo_Actual() 
-        start_time = time.time() #Se guardan  los tiempos de inicio
-        time.sleep(0.0000005)  # Pausa para simular tiempo de procesamiento y obtener mejores resultados
-
-        TreeAVL.insert(id_value, name_value)
-
-        end_time = time.time()
-        elapsed_timer_ms_Insert = (end_time - start_time) * 1000
-        Hora_Final = Tiempo_Actual() #Se guardan los tiempos de finalizacion y el tiempo de la operacion
-
-        # Registra los resultados en el archivo de AVL
-        fileAvl.write(f"Insercion,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Insert:.5f},{id_value},NA,{name_value}\n")
-
-
-        # Inserción en el árbol B
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
-
-        BTree.insert(id_value, name_value)
-
-        end_time = time.time()
-        elapsed_timer_ms_Insert = (end_time - start_time) * 1000
-        Hora_Final = Tiempo_Actual()
-
-        # Registra los resultados en el archivo de B Tree
-        fileBtree.write(f"Insercion,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Insert:.5f},{id_value},NA,{name_value}\n")
-
-        # Inserción en el árbol B+
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
-
-        TreeBplus.insert(id_value, name_value)
-
-        end_time = time.time()
-        elapsed_timer_ms_Insert = (end_time - start_time) * 1000
-        Hora_Final = Tiempo_Actual()
-
-        # Registra los resultados en el archivo de B+ Tree
-        fileBtreeplus.write(f"Insercion,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Insert:.5f},{id_value},NA,{name_value}\n")
-
-        # Inserción en el árbol B*
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
-
-        starTree.insert(id_value, name_value)
-
-        end_time = time.time()
-        elapsed_timer_ms_Insert = (end_time - start_time) * 1000
-        Hora_Final = Tiempo_Actual()
-
-        # Registra los resultados en el archivo de B* Tree
-        fileBtreestar.write(f"Insercion,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Insert:.5f},{id_value},NA,{name_value}\n")
-
-    elif matchSearch:
-        # Extrae id para la búsqueda
-        id_value = int(matchSearch.group(1))
-
-        # Búsqueda en el árbol AVL
-        Hora_Inicio = Tiempo_Actual()
-        start_timeSearch = time.time()
-        time.sleep(0.0000005)
-
-        NodeR, found_AVL = TreeAVL.search(id_value)
-
-        end_timeSearch = time.time()
-        elapsed_timer_ms_Search = (end_timeSearch - start_timeSearch) * 1000
-        Hora_Final = Tiempo_Actual()
-
-        # Registra los resultados en el archivo de AVL, dependiendo si se encontró el elemento
-        if found_AVL:
-            fileAvl.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},Si,{NodeR.name}\n")
-        else:
-            fileAvl.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},No,NA\n")
-
-        # Búsqueda en el árbol B
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
-
-        found_Btree = BTree.search(id_value)
 
-        end_time = time.time()
-        elapsed_timer_ms_Search = (end_time - start_time) * 1000
-        Hora_Final = Tiempo_Actual()
+def print_rebuild_report(estructuras, file_path):
 
-        # Registra los resultados en el archivo de B Tree
-        if found_Btree is not None:
-            fileBtree.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},Si,{found_Btree}\n")
-        else:
-            fileBtree.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},No,NA\n")
+    #Imprime y guarda cuántas veces se reconstruyeron los arreglos de referencia para absorber las
+    #inserciones y eliminaciones, y los cambios que quedaron pendientes al terminar.
+    #'estructuras' asocia cada arreglo con el resultado de su rebuild_stats().
 
-        # Búsqueda en el árbol B+
-        Hora_Inicio = Tiempo_Actual()
-        start_timeSearch = time.time()
-        time.sleep(0.0000005)
+    with open(file_path, 'a') as fileStatistics:
+        for tree_name, stats in estructuras.items():
+            linea = (f"{tree_name}: {stats['Claves']} claves, base de {stats['Base']}, "
+                     f"{stats['Reconstrucciones']} reconstrucciones, "
+                     f"{stats['Pendientes']} inserciones y {stats['Borrados']} eliminaciones pendientes\n")
+            print(linea)
+            fileStatistics.write(linea)
+        fileStatistics.write("\n\n")
 
-        found_Bplus = TreeBplus.search(id_value)
 
-        end_timeSearch = time.time()
-        elapsed_timer_ms_Search = (end_timeSearch - start_timeSearch) * 1000
-        Hora_Final = Tiempo_Actual()
 
-        # Registra los resultados en el archivo de B+ Tree
-        if found_Bplus is not None:
-            fileBtreeplus.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},Si,{found_Bplus}\n")
-        else:
-            fileBtreeplus.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},No,NA\n")
+def print_page_report(estructuras, operaciones, file_path):
 
-        # Búsqueda en el árbol B*
-        Hora_Inicio = Tiempo_Actual()
-        start_timeSearch = time.time()
-        time.sleep(0.0000005)
+    #Imprime y guarda el costo de E/S de las estructuras paginadas: aciertos y fallos de su buffer pool
+    #y páginas leídas y escritas en el archivo, en total y por operación de la traza.
+    #'estructuras' asocia cada estructura con el resultado de su page_stats().
 
-        found_Bstar = starTree.search(id_value)
+    with open(file_path, 'a') as fileStatistics:
+        for tree_name, stats in estructuras.items():
+            linea = (f"{tree_name}: paginas de {stats['Tamano_Pagina']} bytes, {stats['Paginas']} en el archivo, "
+                     f"buffer pool de {stats['Capacidad']} paginas\n"
+                     f"  Aciertos {stats['Aciertos']}, Fallos {stats['Fallos']} "
+                     f"(tasa de aciertos {stats['Tasa_Aciertos'] * 100:.1f}%), Desalojos {stats['Desalojos']}\n"
+                     f"  Lecturas {stats['Lecturas']} ({stats['Lecturas'] / max(operaciones, 1):.3f} por operacion), "
+                     f"Escrituras {stats['Escrituras']} ({stats['Escrituras'] / max(operaciones, 1):.3f} por operacion), "
+                     f"Paginas sucias pendientes {stats['Sucias']}\n")
+            print(linea)
+            fileStatistics.write(linea)
+        fileStatistics.write("\n\n")
 
-        end_timeSearch = time.time()
-        elapsed_timer_ms_Search = (end_timeSearch - start_timeSearch) * 1000
-        Hora_Final = Tiempo_Actual()
 
-        # Registra los resultados en el archivo de B* Tree
-        if found_Bstar is not None:
-            fileBtreestar.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},Si,{found_Bstar}\n")
-        else:
-            fileBtreestar.write(f"Busqueda,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Search:.5f},{id_value},No,NA\n")
 
-    elif matchDelete:
+def print_counters_report(resumenes, file_path):
 
-        # Extrae id para la eliminación
-        id_value = int(matchDelete.group(1))
+    #Imprime y guarda los contadores estructurales de cada estructura por tipo de operación: nodos visitados
+    #y comparaciones de claves por operación, y el total de divisiones, fusiones, préstamos y rotaciones.
+    #'resumenes' asocia cada estructura con el resultado de resumen_contadores().
 
-        # Eliminación en el árbol AVL
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
+    with open(file_path, 'a') as fileStatistics:
+        encabezado = (f"Contadores estructurales:\n\n"
+                      f"{'Estructura':<19}{'Operacion':<14}{'Operaciones':>12}{'Nodos/op':>10}{'Comp/op':>10}"
+                      f"{'Divisiones':>12}{'Fusiones':>10}{'Prestamos':>11}{'Rotaciones':>12}\n")
+        print(encabezado, end='')
+        fileStatistics.write(encabezado)
+        for tree_name, filas in resumenes.items():
+            for fila in filas:
+                linea = (f"{tree_name:<19}{fila['Operacion']:<14}{fila['Operaciones']:>12}"
+                         f"{fila['Nodos_Por_Operacion']:>10.2f}{fila['Comparaciones_Por_Operacion']:>10.2f}"
+                         f"{fila['Divisiones']:>12}{fila['Fusiones']:>10}{fila['Prestamos']:>11}"
+                         f"{fila['Rotaciones']:>12}\n")
+                print(linea, end='')
+                fileStatistics.write(linea)
+        print()
+        fileStatistics.write("\n\n")
+
+
+
+def print_cache_report(resumenes, politica, capacidad, degree, file_path):
+
+    #Imprime y guarda la E/S estimada con la caché de páginas simulada (un nodo por página): páginas
+    #accedidas, aciertos y fallos por tipo de operación; cada fallo es una lectura de disco.
+    #'resumenes' asocia cada estructura con el resultado de resumen_contadores().
 
-        NodeE, found = TreeAVL.delete(id_value)
+    with open(file_path, 'a') as fileStatistics:
+        encabezado = (f"Cache de paginas simulada ({politica.upper()}, {capacidad} paginas, grado {degree}, "
+                      f"un nodo por pagina):\n\n"
+                      f"{'Estructura':<19}{'Operacion':<14}{'Operaciones':>12}{'Paginas/op':>12}"
+                      f"{'Aciertos':>12}{'Fallos':>10}{'Tasa':>8}{'E/S por op':>12}\n")
+        print(encabezado, end='')
+        fileStatistics.write(encabezado)
+        for tree_name, filas in resumenes.items():
+            total = {'Operacion': 'Total', 'Operaciones': 0, 'Nodos': 0, 'Aciertos': 0, 'Fallos': 0}
+            for fila in filas + [total]:
+                if fila is not total:
+                    for campo in ('Operaciones', 'Nodos', 'Aciertos', 'Fallos'):
+                        total[campo] += fila[campo]
+                operaciones = max(fila['Operaciones'], 1)
+                linea = (f"{tree_name:<19}{fila['Operacion']:<14}{fila['Operaciones']:>12}"
+                         f"{fila['Nodos'] / operaciones:>12.2f}{fila['Aciertos']:>12}{fila['Fallos']:>10}"
+                         f"{fila['Aciertos'] / max(fila['Nodos'], 1) * 100:>7.1f}%"
+                         f"{fila['Fallos'] / operaciones:>12.3f}\n")
+                print(linea, end='')
+                fileStatistics.write(linea)
+        print()
+        fileStatistics.write("\n\n")
+
+
+
+def print_snapshot_report(accion, directorio, segundos, file_path):
+
+    #Imprime y guarda el tiempo de carga o de guardado de las instantáneas de las estructuras.
+
+    linea = f"Instantaneas {accion} {directorio} en {segundos:.3f} s\n\n"
+    print(linea)
+    with open(file_path, 'a') as fileStatistics:
+        fileStatistics.write(linea)
 
-        end_time = time.time()
-        elapsed_timer_msDelete = (end_time - start_time) * 1000
-        Hora_Final = Tiempo_Actual()
 
-        # Registra los resultados en el archivo de AVL, dependiendo si se eliminó el elemento
-        if found:
-            fileAvl.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_msDelete:.5f},{id_value},Si,{NodeE.name}\n")
-        else:
-            fileAvl.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_msDelete:.5f},{id_value},No,NA\n")
 
-        # Eliminación en el árbol B
-        found_Btree = BTree.search(id_value)
+def print_parse_report(resumen, file_path):
 
-        Hora_Inicio = Tiempo_Actual()
-        start_timeSearch = time.time()
-        time.sleep(0.0000005)
+    #Imprime y guarda el throughput del parseo del archivo de operaciones, separado del tiempo de los árboles.
+    #'resumen' es el resultado de resumen() del lector de la traza.
 
-        BTree.delete(id_value)
+    linea = (f"Parseo: {resumen['Operaciones']} operaciones en {resumen['Lineas']} lineas "
+             f"({resumen['MB']:.2f} MB) en {resumen['Tiempo(s)']:.3f} s: "
+             f"{resumen['Operaciones_Por_Segundo']:.0f} operaciones/s, {resumen['MB_Por_Segundo']:.2f} MB/s\n\n")
+    print(linea)
+    with open(file_path, 'a') as fileStatistics:
+        fileStatistics.write(linea)
 
-        end_timeSearch = time.time()
-        elapsed_timer_ms_Delete = (end_timeSearch - start_timeSearch) * 1000
-        Hora_Final = Tiempo_Actual()
-        confirm_found_Btree = BTree.search(id_value)
 
-        # Registra los resultados en el archivo de B Tree
-        if found_Btree != confirm_found_Btree:
-            fileBtree.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Delete:.5f},{id_value},Si,{found_Btree}\n")
-        else:
-            fileBtree.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_ms_Delete:.5f},{id_value},No,NA\n")
 
-        # Eliminación en el árbol B+
-        found_Bplus = TreeBplus.search(id_value)
+def print_throughput_report(medicion, file_path):
 
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
+    #Imprime y guarda las operaciones por segundo y el tiempo amortizado por operación de cada estructura.
 
-        TreeBplus.delete(id_value)
+    with open(file_path, 'a') as fileStatistics:
+        encabezado = (f"Throughput ({medicion.lotes} lotes de operaciones consecutivas del mismo tipo):\n\n"
+                      f"{'Estructura':<19}{'Operacion':<14}{'Operaciones':>12}{'Tiempo(s)':>12}"
+                      f"{'Ops/s':>14}{'ns/op':>10}\n")
+        print(encabezado, end='')
+        fileStatistics.write(encabezado)
+        for fila in medicion.resumen():
+            linea = (f"{fila['Estructura']:<19}{fila['Operacion']:<14}{fila['Operaciones']:>12}"
+                     f"{fila['Tiempo(s)']:>12.4f}{fila['Operaciones_Por_Segundo']:>14.0f}"
+                     f"{fila['Ns_Por_Operacion']:>10.0f}\n")
+            print(linea, end='')
+            fileStatistics.write(linea)
+        print()
+        fileStatistics.write("\n\n")
 
-        end_time = time.time()
-        Hora_Final = Tiempo_Actual()
-        elapsed_timer_msDelete = (end_time - start_time) * 1000
 
-        confirm_found_Bplus = TreeBplus.search(id_value)
 
-        # Registra los resultados en el archivo de B+ Tree
-        if found_Bplus == confirm_found_Bplus:
-            fileBtreeplus.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_msDelete:.5f},{id_value},No,NA\n")
-        else:
-            fileBtreeplus.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_msDelete:.5f},{id_value},Si,{found_Bplus}\n")
+def print_batch_report(individual, en_lote, file_path):
 
-        # Eliminación en el árbol B*
-        found_Bstar = starTree.search(id_value)
+    #Imprime y guarda el tiempo por operación de cada estructura ejecutando los lotes operación por
+    #operación y con su API en lote (insert_many, search_many, delete_many), y la aceleración obtenida.
 
-        Hora_Inicio = Tiempo_Actual()
-        start_time = time.time()
-        time.sleep(0.0000005)
+    filas_lote = {(fila['Estructura'], fila['Operacion']): fila for fila in en_lote.resumen()}
+    with open(file_path, 'a') as fileStatistics:
+        encabezado = (f"API en lote ({individual.lotes} lotes de operaciones consecutivas del mismo tipo):\n\n"
+                      f"{'Estructura':<19}{'Operacion':<14}{'Operaciones':>12}"
+                      f"{'ns/op':>10}{'ns/op lote':>12}{'Aceleracion':>13}\n")
+        print(encabezado, end='')
+        fileStatistics.write(encabezado)
+        for fila in individual.resumen():
+            lote = filas_lote[(fila['Estructura'], fila['Operacion'])]
+            aceleracion = fila['Ns_Por_Operacion'] / lote['Ns_Por_Operacion'] if lote['Ns_Por_Operacion'] else 0.0
+            linea = (f"{fila['Estructura']:<19}{fila['Operacion']:<14}{fila['Operaciones']:>12}"
+                     f"{fila['Ns_Por_Operacion']:>10.0f}{lote['Ns_Por_Operacion']:>12.0f}"
+                     f"{aceleracion:>12.2f}x\n")
+            print(linea, end='')
+            fileStatistics.write(linea)
+        print()
+        fileStatistics.write("\n\n")
+
+
+
+def print_timer_report(temporizador, file_path):
+
+    #Imprime y guarda el overhead calibrado del reloj que se descuenta de cada operación medida.
+
+    linea = (f"Reloj: perf_counter_ns, resolucion {temporizador.resolucion_ns:.0f} ns, "
+             f"overhead calibrado {temporizador.overhead_ns} ns por medicion (descontado)\n\n")
+    print(linea)
+    with open(file_path, 'a') as fileStatistics:
+        fileStatistics.write(linea)
 
-        starTree.delete(id_value)
 
-        end_time = time.time()
-        Hora_Final = Tiempo_Actual()
-        elapsed_timer_msDelete = (end_time - start_time) * 1000
 
-        confirm_found_Bstar = starTree.search(id_value)
+def print_avl_audit(audit, file_path):
 
-        # Registra los resultados en el archivo de B* Tree
-        if found_Bstar != confirm_found_Bstar:
-            fileBtreestar.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_msDelete:.5f},{id_value},Si,{found_Bstar}\n")
-        else:
-            fileBtreestar.write(f"Eliminacion,{Hora_Inicio},{Hora_Final},{elapsed_timer_msDelete:.5f},{id_value},No,NA\n")
+    #Imprime y guarda la auditoría de altura y balance del árbol AVL (resultado de audit()),
+    #para confirmar que la altura se mantiene logarítmica.
 
+    linea = (f"Auditoria AVL: Nodos {audit['Nodos']}, Altura {audit['Altura']} "
+             f"(minima {audit['Altura_Minima']}, limite AVL {audit['Altura_Limite']:.1f}), "
+             f"Balance maximo {audit['Balance_Maximo']}, "
+             f"Alturas correctas {'Si' if audit['Alturas_Correctas'] else 'No'}, "
+             f"Valido {'Si' if audit['Valido'] else 'No'}\n")
+    print(linea)
+    with open(file_path, 'a') as fileStatistics:
+        fileStatistics.write(linea)
 
-fileAvl.close()
-fileBtree.close()
-fileBtreeplus.close()
-fileBtreestar.close()
 
-# Crear un archivo de salida en la carpeta output
-output_file_path = 'output/output_statistics.txt'
 
-# Leer los archivos de log y calcular las estadísticas
-for tree_name, log_file_path in log_files.items():
-    data = read_log(log_file_path)
-    statistics = TopStatistics(data)
-    print_statistics(tree_name, statistics, output_file_path)
+def solicitar_grado():
 
+    # Solicita al usuario ingresar el grado del árbol y verifica que sea un entero mayor que 1.
+    while True:
+        try:
+            grado = int(input("Ingrese el grado del árbol (debe ser un entero mayor que 1): "))
+            if grado > 1:
+                return grado
+            else:
+                print("El grado debe ser mayor que 1. Por favor, intente de nuevo.")
+        except ValueError:
+            print("Entrada inválida. Por favor, ingrese un número entero.")
+    
 
 
+def memory_report(degree, claves, file_path):
 
+    #Construye cada estructura con la cantidad de claves indicada y reporta la memoria
+    #pico y retenida (tracemalloc) y el crecimiento del RSS del proceso.
 
+    estructuras = {
+        'AVL': AVL2,
+        'Arbol B': lambda: TreeB(degree),
+        'Arbol B (compacto)': lambda: TreeBCompacto(degree),
+        'Arbol B+': lambda: BPlusTree(degree),
+        'Arbol B+ (compacto)': lambda: BPlusTreeCompacto(degree),
+        'Arbol B*': lambda: BStarTree(degree),
+        'Arbol B* (compacto)': lambda: BStarTreeCompacto(degree),
+    }
 
+    with open(file_path, 'w') as fileMemory:
+        encabezado = (f"Reporte de memoria ({claves} claves, grado {degree}):\n\n"
+                      f"{'Estructura':<22}{'Pico(MB)':>12}{'Retenida(MB)':>14}{'Bytes/clave':>13}{'RSS(MB)':>10}\n")
+        print(encabezado, end='')
+        fileMemory.write(encabezado)
+        for tree_name, fabrica in estructuras.items():
+            stats = medir_construccion(fabrica, claves)
+            rss = f"{stats['RSS'] / 2**20:.1f}" if stats['RSS'] is not None else "NA"
+            linea = (f"{tree_name:<22}{stats['Pico'] / 2**20:>12.1f}{stats['Retenida'] / 2**20:>14.1f}"
+                     f"{stats['Bytes_Por_Clave']:>13.1f}{rss:>10}\n")
+            print(linea, end='')
+            fileMemory.write(linea)
+        pico = rss_pico()
+        if pico is not None:
+            linea = f"\nRSS pico del proceso: {pico / 2**20:.1f} MB\n"
+            print(linea)
+            fileMemory.write(linea)
 
 
 
+def replay_latencia(lector, estructuras, log_files, temporizador):
 
+    #Ejecuta cada operación sobre todas las estructuras, una tras otra en el mismo proceso,
+    #midiendo y registrando cada una por separado. Retorna las estadísticas en línea de cada estructura.
 
+    # Estadísticas en línea de cada estructura, alimentadas por su registro en cada vaciado,
+    # y la línea de progreso con las operaciones por segundo de cada árbol
+    progreso = Progreso()
+    agregadores = {tree_name: AgregadorOnline(tree_name, progreso) for tree_name in estructuras}
 
+    # Registros columnares en memoria de cada estructura; las columnas se escriben en
+    # binario al llenarse cada buffer o al terminar, fuera de la medición
+    registros = {tree_name: RegistroColumnar(log_files[tree_name], temporizador, agregador=agregadores[tree_name])
+                 for tree_name in estructuras}
 
+    # Cada operación se mide solo con dos lecturas de perf_counter_ns y se registra como
+    # muestras numéricas; el overhead del reloj se descuenta al escribir el log.
+    reproducir(estructuras, registros, lector)
 
+    # Escribe las muestras pendientes y cierra los logs
+    for registro in registros.values():
+        registro.close()
+    progreso.terminar()
 
+    return agregadores
 
 
 
+def print_latency_reports(agregadores, log_files, exportar, file_path):
 
+    #Imprime y guarda las estadísticas en línea y los percentiles de cada estructura, guarda el
+    #volcado de sus histogramas y, si se pide, exporta los logs binarios a CSV.
 
+    histogramas = {}
+    for tree_name, log_dir in log_files.items():
+        print_statistics(tree_name, agregadores[tree_name].statistics(), file_path)
+        histogramas.update(agregadores[tree_name].histogramas())
+        if exportar:
+            exportar_csv(LogColumnar(log_dir), log_dir + '.txt')
 
+    # Percentiles de latencia de todas las estructuras; el volcado de los histogramas se puede
+    # combinar con el de otras corridas usando --combinar-histogramas
+    print_percentiles_report(histogramas, file_path)
+    guardar_histogramas(histogramas, 'output/histogramas.npz')
 
 
+def print_parallel_report(resultados, tiempo_total, file_path):
 
+    #Imprime y guarda el tiempo de pared de cada proceso trabajador y del replay paralelo completo.
 
+    with open(file_path, 'a') as fileStatistics:
+        linea = f"Replay paralelo: {len(resultados)} procesos, tiempo total {tiempo_total:.3f} s\n"
+        print(linea, end='')
+        fileStatistics.write(linea)
+        for tree_name, resultado in resultados.items():
+            linea = (f"{tree_name}: {resultado['Tiempo(s)']:.3f} s "
+                     f"(overhead del reloj {resultado['Overhead_ns']} ns, descontado)\n")
+            print(linea, end='')
+            fileStatistics.write(linea)
+        print()
+        fileStatistics.write("\n\n")
+
+
+
+def print_sweep_report(filas, file_path):
+
+    #Imprime y guarda la tabla comparativa del barrido de grados: throughput, ns por operación,
+    #altura, llenado, memoria por clave y, con la caché simulada, E/S por operación de cada estructura para cada grado.
+
+    with open(file_path, 'w') as fileSweep:
+        # Con --cache-paginas se agrega la E/S estimada por operación con la caché simulada
+        con_cache = any('ES_Por_Operacion' in fila for fila in filas)
+        encabezado = (f"{'Grado':>6}  {'Estructura':<10}{'Ops/s':>12}{'Ins ns/op':>11}{'Bus ns/op':>11}"
+                      f"{'Eli ns/op':>11}{'Altura':>8}{'Llenado':>9}{'Bytes/clave':>13}")
+        encabezado += f"{'E/S por op':>12}\n" if con_cache else "\n"
+        print(encabezado, end='')
+        fileSweep.write(encabezado)
+        for fila in filas:
+            ns = fila['Ns_Por_Operacion']
+            columnas_ns = ''.join(f"{ns[op]:>11.0f}" if op in ns else f"{'NA':>11}"
+                                  for op in ('Insercion', 'Busqueda', 'Eliminacion'))
+            linea = (f"{fila['Grado']:>6}  {fila['Estructura']:<10}{fila['Operaciones_Por_Segundo']:>12.0f}"
+                     f"{columnas_ns}{fila['Altura']:>8}{fila['Llenado_Promedio'] * 100:>8.1f}%"
+                     f"{fila['Bytes_Por_Clave']:>13.1f}")
+            linea += f"{fila['ES_Por_Operacion']:>12.3f}\n" if con_cache else "\n"
+            print(linea, end='')
+            fileSweep.write(linea)
+
+
+
+# Opciones de línea de comandos
+parser = argparse.ArgumentParser(description="Benchmark de estructuras arbóreas")
+parser.add_argument('--traza', metavar='RUTA',
+                    help="Archivo de operaciones (texto o compilado); evita la pregunta interactiva")
+parser.add_argument('--memory-report', action='store_true',
+                    help="Mide la memoria de cada estructura con N claves en lugar de ejecutar las operaciones")
+parser.add_argument('--claves', type=int, default=1000000,
+                    help="Cantidad de claves del reporte de memoria")
+parser.add_argument('--grado', type=int, help="Grado de los árboles B, B+ y B*")
+parser.add_argument('--compilar', metavar='SALIDA',
+                    help="Compila el archivo de operaciones a una traza binaria y termina")
+parser.add_argument('--modo', choices=('latencia', 'throughput', 'lotes'), default='latencia',
+                    help="latencia: mide y registra cada operación; throughput: mide lotes de operaciones del mismo tipo; "
+                         "lotes: compara esos lotes ejecutados operación por operación y con la API en lote")
+parser.add_argument('--grados', '--degrees', metavar='LISTA',
+                    help="Barrido de grados para B, B+ y B*, p. ej. 2,4,8,16,64,256 o 2-32:2 (modo throughput, en paralelo)")
+parser.add_argument('--procesos', type=int,
+                    help="Procesos del pool en el barrido de grados (por defecto, uno por CPU)")
+parser.add_argument('--paralelo', action='store_true',
+                    help="Ejecuta cada estructura en su propio proceso sobre la traza compilada (modo latencia)")
+parser.add_argument('--combinar-histogramas', nargs='+', metavar='NPZ',
+                    help="Combina los histogramas de latencia de varias corridas o procesos y reporta sus percentiles")
+parser.add_argument('--csv', action='store_true',
+                    help="Exporta además cada log binario a CSV de texto (logs/log*.txt)")
+parser.add_argument('--instantanea', metavar='DIRECTORIO',
+                    help="Restaura las estructuras de sus instantáneas en lugar de partir de árboles vacíos "
+                         "(el grado es el de las instantáneas)")
+parser.add_argument('--guardar-instantanea', metavar='DIRECTORIO',
+                    help="Guarda una instantánea de cada estructura al terminar la corrida")
+parser.add_argument('--contadores', action='store_true',
+                    help="Cuenta nodos visitados, comparaciones, divisiones, fusiones, préstamos y rotaciones "
+                         "por tipo de operación (los tiempos incluyen el costo de contarlos)")
+parser.add_argument('--cache-paginas', type=int, metavar='K',
+                    help="Simula una caché de K páginas con un nodo por página y estima la E/S por operación "
+                         "de las estructuras en memoria (también en el barrido de grados)")
+parser.add_argument('--cache-politica', choices=sorted(POLITICAS), default='lru',
+                    help="Política de reemplazo de la caché simulada")
+
+
+def main():
+    args = parser.parse_args()
+    if args.paralelo and args.modo != 'latencia':
+        parser.error("--paralelo solo está disponible en el modo latencia")
+    if args.grado is not None and args.grado < 2:
+        parser.error("El grado debe ser un entero mayor que 1")
+    if args.cache_paginas is not None and args.cache_paginas < 1:
+        parser.error("La caché simulada necesita al menos una página")
+    cache = (args.cache_politica, args.cache_paginas) if args.cache_paginas else None
+
+    if args.memory_report:
+        os.makedirs('output', exist_ok=True)
+        memory_report(args.grado or solicitar_grado(), args.claves, 'output/memory_report.txt')
+        return
+
+    if args.combinar_histogramas:
+        os.makedirs('output', exist_ok=True)
+        combinados = combinar_archivos(args.combinar_histogramas)
+        print_percentiles_report(combinados, 'output/percentiles_combinados.txt')
+        guardar_histogramas(combinados, 'output/histogramas_combinados.npz')
+        return
+
+    if args.compilar:
+        operaciones, nombres = compilar(args.traza or solicitar_ruta_archivo(), args.compilar)
+        print(f"Traza compilada en {args.compilar}: {operaciones} operaciones, {nombres} nombres distintos")
+        return
+
+
+
+    # Solicita la ruta del archivo al usuario, salvo que se indique con --traza
+    ruta_archivo_op = args.traza or solicitar_ruta_archivo()
+    if not os.path.isfile(ruta_archivo_op):
+        parser.error(f"El archivo de operaciones {ruta_archivo_op} no existe")
+
+    # Barrido de grados sin interacción: una tabla comparativa de todos los grados
+    if args.grados:
+        try:
+            grados = parsear_grados(args.grados)
+        except ValueError as error:
+            parser.error(str(error))
+        os.makedirs('output', exist_ok=True)
+        print_sweep_report(barrido_grados(ruta_archivo_op, grados, args.procesos, cache), 'output/barrido_grados.txt')
+        return
+
+    # Solicitud del grado del árbol B al usuario, salvo que se indique con --grado o se
+    # restauren árboles ya construidos
+    if args.instantanea:
+        if not os.path.isdir(args.instantanea):
+            parser.error(f"El directorio de instantáneas {args.instantanea} no existe")
+        degree = grado_instantaneas(args.instantanea) or args.grado
+    else:
+        degree = args.grado or solicitar_grado()
+    print("\n")
+
+    # Crea la carpeta de logs y output si no existe
+    os.makedirs('logs', exist_ok=True)
+    os.makedirs('output', exist_ok=True)
+
+    # Crear un archivo de salida en la carpeta output
+    output_file_path = 'output/output_statistics.txt'
+
+    # Diccionario para mapear tipos de árboles con el directorio de su log binario
+    log_files = directorios_log()
+
+
+
+    # Modo paralelo: un proceso por estructura sobre la traza compilada; cada proceso
+    # construye, mide y registra su árbol y retorna sus estadísticas
+    if args.paralelo:
+        resultados, tiempo_total = replay_paralelo(ruta_archivo_op, degree, log_files,
+                                                   instantanea=args.instantanea, guardar_en=args.guardar_instantanea,
+                                                   contadores=args.contadores, cache=cache)
+        # Todas las estructuras leen la misma traza: el parseo de cualquiera sirve para el reporte
+        parseo = next(iter(resultados.values()))['Parseo']
+        print_parse_report(parseo, output_file_path)
+        print_parallel_report(resultados, tiempo_total, output_file_path)
+        agregadores = {tree_name: resultado['Agregador'] for tree_name, resultado in resultados.items()}
+        print_latency_reports(agregadores, log_files, args.csv, output_file_path)
+        print_structure_report({tree_name: resultado['Estructura'] for tree_name, resultado in resultados.items()
+                                if resultado['Estructura'] is not None}, degree, output_file_path)
+        for resultado in resultados.values():
+            if resultado['Auditoria'] is not None:
+                print_avl_audit(resultado['Auditoria'], output_file_path)
+        print_page_report({tree_name: resultado['Paginas'] for tree_name, resultado in resultados.items()
+                           if resultado['Paginas'] is not None},
+                          parseo['Operaciones'], output_file_path)
+        print_rebuild_report({tree_name: resultado['Reconstrucciones'] for tree_name, resultado in resultados.items()
+                              if resultado['Reconstrucciones'] is not None}, output_file_path)
+        if args.contadores:
+            print_counters_report({tree_name: resultado['Contadores'] for tree_name, resultado in resultados.items()
+                                   if resultado['Contadores'] is not None}, output_file_path)
+        if cache:
+            print_cache_report({tree_name: resultado['Contadores'] for tree_name, resultado in resultados.items()
+                                if resultado['Contadores'] is not None and resultado['Paginas'] is None},
+                               *cache, degree, output_file_path)
+        return
+
+
+
+    # Lector en streaming del archivo proporcionado por el usuario: las operaciones se
+    # parsean por bloques a medida que se ejecutan, sin cargar el archivo completo.
+    # Si es una traza compilada con --compilar se reproduce directamente desde mmap
+    lector = abrir_traza(ruta_archivo_op)
+
+    # Instancia de los diferentes tipos de estructura de datos registrados (ver estructuras),
+    # vacías o restauradas de sus instantáneas para medir solo las búsquedas y eliminaciones
+    if args.instantanea:
+        inicio = reloj()
+        try:
+            estructuras = cargar_estructuras(args.instantanea)
+        except (OSError, ValueError) as error:
+            parser.error(f"No se pudieron restaurar las instantáneas: {error}")
+        print_snapshot_report('cargadas desde', args.instantanea, (reloj() - inicio) / 1e9, output_file_path)
+    else:
+        estructuras = crear_estructuras(degree)
+
+    # Contadores estructurales: cambia la clase de cada árbol por su versión instrumentada.
+    # En el modo lotes solo se instrumenta la copia que ejecuta operación por operación.
+    # Solo se instrumentan las estructuras con nodos (no los arreglos de referencia), y la caché
+    # simulada se aplica a las que viven en memoria; las paginadas ya miden su E/S
+    instrumentadas = [tree_name for tree_name, tree in estructuras.items() if instrumentable(tree)]
+    simuladas = [tree_name for tree_name in instrumentadas if not hasattr(estructuras[tree_name], 'page_stats')]
+    if args.contadores or cache:
+        for tree_name in instrumentadas:
+            instrumentar(estructuras[tree_name], crear_cache(*cache) if cache and tree_name in simuladas else None)
+
+    # Calibra el overhead del reloj de alta precisión antes de medir
+    temporizador = Temporizador()
+
+    if args.modo == 'throughput':
+        # Modo throughput: lotes de operaciones consecutivas del mismo tipo, medidos como un todo
+        medicion = MedicionThroughput(estructuras, temporizador)
+        medicion.ejecutar(lector)
+        print_parse_report(lector.resumen(), output_file_path)
+        print_throughput_report(medicion, output_file_path)
+    elif args.modo == 'lotes':
+        # Modo lotes: los mismos lotes sobre una segunda copia de cada estructura, con su API en lote
+        agrupadas = cargar_estructuras(args.instantanea) if args.instantanea else crear_estructuras(degree)
+        individual, en_lote = comparar_lotes(lector, estructuras, agrupadas, temporizador)
+        print_parse_report(lector.resumen(), output_file_path)
+        print_batch_report(individual, en_lote, output_file_path)
+    else:
+        # Modo latencia: cada operación se mide y registra por separado en los logs
+        agregadores = replay_latencia(lector, estructuras, log_files, temporizador)
+
+        # Throughput del parseo, medido aparte del tiempo de los árboles
+        print_parse_report(lector.resumen(), output_file_path)
+
+        # Overhead del reloj descontado de cada medición
+        print_timer_report(temporizador, output_file_path)
+
+        # Las estadísticas ya se acumularon durante la corrida; no se releen los logs
+        print_latency_reports(agregadores, log_files, args.csv, output_file_path)
+
+    # Compara la altura y el llenado de los nodos de los árboles de la familia B
+    print_structure_report({tree_name: tree.structure_stats() for tree_name, tree in estructuras.items()
+                            if hasattr(tree, 'structure_stats')}, degree, output_file_path)
+
+    # Verifica que la altura del AVL se mantenga logarítmica
+    for tree in estructuras.values():
+        if hasattr(tree, 'audit'):
+            print_avl_audit(tree.audit(), output_file_path)
+
+    # Costo de E/S por operación de las estructuras paginadas, junto a las que viven en memoria
+    print_page_report({tree_name: tree.page_stats() for tree_name, tree in estructuras.items()
+                       if hasattr(tree, 'page_stats')}, lector.resumen()['Operaciones'], output_file_path)
+
+    # Reconstrucciones de los arreglos de referencia
+    print_rebuild_report({tree_name: tree.rebuild_stats() for tree_name, tree in estructuras.items()
+                          if hasattr(tree, 'rebuild_stats')}, output_file_path)
+
+    # Trabajo estructural por tipo de operación, junto a los tiempos
+    if args.contadores:
+        print_counters_report({tree_name: resumen_contadores(estructuras[tree_name]) for tree_name in instrumentadas},
+                              output_file_path)
+
+    # E/S estimada por operación con la caché de páginas simulada
+    if cache:
+        print_cache_report({tree_name: resumen_contadores(estructuras[tree_name]) for tree_name in simuladas},
+                           *cache, degree, output_file_path)
+
+    # Instantáneas de los árboles construidos, para restaurarlos con --instantanea
+    if args.guardar_instantanea:
+        inicio = reloj()
+        guardar_instantaneas(estructuras, args.guardar_instantanea)
+        print_snapshot_report('guardadas en', args.guardar_instantanea, (reloj() - inicio) / 1e9, output_file_path)
+
+
+if __name__ == "__main__":
+    # Necesario para los procesos trabajadores cuando main se empaqueta con PyInstaller (main.spec)
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,58 @@
+import gc
+import os
+import random
+import tracemalloc
+
+try:
+    import resource  # No existe en Windows
+except ImportError:
+    resource = None
+
+
+# Medición de la memoria que ocupa cada estructura al construirla con N claves,
+# usando tracemalloc (pico y memoria retenida) y el RSS del proceso.
+
+
+def rss_actual():
+    # RSS actual del proceso en bytes, o None si el sistema no lo expone
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def rss_pico():
+    # RSS máximo alcanzado por el proceso en bytes, o None si no está disponible
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # ru_maxrss está en KiB en Linux
+
+
+def medir_construccion(fabrica, claves, semilla=42):
+    # Construye una estructura con 'claves' inserciones en orden aleatorio y mide su memoria.
+    # fabrica() retorna la estructura vacía; los nombres se crean dentro de la medición
+    # porque el árbol los retiene igual que en una corrida real.
+    ids = list(range(claves))
+    random.Random(semilla).shuffle(ids)
+    gc.collect()
+
+    rss_inicial = rss_actual()
+    tracemalloc.start()
+    tree = fabrica()
+    insert = tree.insert
+    for id in ids:
+        insert(id, f"N{id}")
+    retenida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_final = rss_actual()
+
+    resultado = {
+        'Pico': pico,
+        'Retenida': retenida,
+        'Bytes_Por_Clave': retenida / claves if claves else 0.0,
+        'RSS': rss_final - rss_inicial if rss_inicial is not None and rss_final is not None else None,
+    }
+    del tree, insert
+    gc.collect()
+    return resultado
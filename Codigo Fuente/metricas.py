@@ -0,0 +1,65 @@
+# Métricas estructurales compartidas por los árboles B, B+ y B*.
+# Todos sus nodos exponen 'ids' (claves del nodo) y 'children' (vacío en las hojas).
+
+import sys
+
+
+def estadisticas_nodos(root, max_claves):
+    # Recorre el árbol por niveles y calcula altura, cantidad de nodos y llenado promedio
+    altura = 0
+    nodos = 0
+    claves = 0
+    hojas = 0
+    claves_hojas = 0
+    nivel = [root]
+    while nivel:
+        altura += 1
+        siguiente = []
+        for node in nivel:
+            nodos += 1
+            claves += len(node.ids)
+            if node.children:
+                siguiente.extend(node.children)
+            else:
+                hojas += 1
+                claves_hojas += len(node.ids)
+        nivel = siguiente
+    return {
+        'Altura': altura,
+        'Nodos': nodos,
+        'Hojas': hojas,
+        'Claves': claves,
+        'Llenado_Promedio': claves / (nodos * max_claves),
+        'Llenado_Hojas': claves_hojas / (hojas * max_claves),
+    }
+
+
+def tamano_profundo(raiz):
+    # Suma sys.getsizeof de todos los objetos alcanzables desde raiz (nodos, listas,
+    # arrays, registros y nombres), contando cada objeto una sola vez
+    visitados = set()
+    pendientes = [raiz]
+    total = 0
+    while pendientes:
+        obj = pendientes.pop()
+        if obj is None or id(obj) in visitados:
+            continue
+        visitados.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (list, tuple)):
+            pendientes.extend(obj)
+        elif isinstance(obj, dict):
+            pendientes.extend(obj.values())
+        else:
+            if hasattr(obj, '__dict__'):
+                pendientes.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                # Los atributos de las clases con __slots__ no están en __dict__
+                for nombre in cls.__dict__.get('__slots__', ()):
+                    pendientes.append(getattr(obj, nombre, None))
+    return total
+
+
+def bytes_por_clave(tree, claves):
+    # Memoria promedio ocupada por cada clave almacenada en el árbol
+    return tamano_profundo(tree.root) / claves if claves else 0.0
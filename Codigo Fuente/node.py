@@ -1,4 +1,6 @@
 class Node:
+    __slots__ = ('id', 'name')  # Sin __dict__ por instancia
+
     def __init__(self, id, name):
         self.id = id
         self.name = name
@@ -0,0 +1,20 @@
+# Utilidades compartidas por las operaciones en lote (insert_many, search_many, delete_many).
+# El lote se ordena una sola vez y cada nodo visitado reparte entre sus hijos el tramo
+# contiguo de ids ordenados que les corresponde, así que cada nodo se recorre una vez por lote.
+
+from bisect import bisect_left
+
+# Los lotes más chicos se ejecutan operación por operación: ordenarlos y repartirlos
+# cuesta más que los descensos que se ahorran
+LOTE_MINIMO = 8
+
+
+def ordenar_lote(ids):
+    # Retorna las posiciones del lote ordenadas por id y los ids en ese orden.
+    # Las posiciones permiten devolver los resultados en el orden original del lote.
+    orden = sorted(range(len(ids)), key=ids.__getitem__)
+    return orden, [ids[p] for p in orden]
+
+
+# Fin del tramo de ids[inicio:fin] menores que el separador dado
+fin_tramo = bisect_left
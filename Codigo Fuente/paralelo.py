@@ -0,0 +1,78 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from estadisticas_online import AgregadorOnline
+from cache_simulado import crear_cache
+from estructuras import crear_estructura, cargar_estructura, guardar_instantaneas, reproducir
+from instrumentacion import instrumentable, instrumentar, resumen_contadores
+from registrador import RegistroColumnar
+from temporizador import Temporizador, reloj
+from traza_binaria import abrir_traza, compilar, es_traza_binaria
+
+
+# Replay en paralelo: un proceso por estructura. Cada proceso abre la misma traza compilada
+# (mapeada en memoria, compartida a través del caché de páginas del sistema), construye y mide
+# solo su árbol, escribe su log y retorna sus estadísticas al proceso principal.
+
+
+def ejecutar_estructura(tree_name, ruta_traza, degree, log_dir, instantanea=None, guardar_en=None, contadores=False,
+                        cache=None):
+    # Proceso trabajador: construye (o restaura de su instantánea) y mide una estructura
+    # sobre la traza completa; si se indica, la guarda al terminar. cache es (politica, paginas)
+    # de la caché simulada, que se aplica solo a las estructuras en memoria
+    inicio = reloj()
+    lector = abrir_traza(ruta_traza)
+    tree = cargar_estructura(tree_name, instantanea) if instantanea else crear_estructura(tree_name, degree)
+    simulada = cache is not None and not hasattr(tree, 'page_stats')
+    instrumentada = (contadores or simulada) and instrumentable(tree)
+    if instrumentada:
+        instrumentar(tree, crear_cache(*cache) if simulada else None)
+    temporizador = Temporizador()
+    agregador = AgregadorOnline(tree_name)
+    registro = RegistroColumnar(log_dir, temporizador, agregador=agregador)
+    reproducir({tree_name: tree}, {tree_name: registro}, lector)
+    registro.close()
+    if guardar_en:
+        guardar_instantaneas({tree_name: tree}, guardar_en)
+    return {
+        'Agregador': agregador,
+        'Estructura': tree.structure_stats() if hasattr(tree, 'structure_stats') else None,
+        'Auditoria': tree.audit() if hasattr(tree, 'audit') else None,
+        'Paginas': tree.page_stats() if hasattr(tree, 'page_stats') else None,
+        'Contadores': resumen_contadores(tree) if instrumentada else None,
+        'Reconstrucciones': tree.rebuild_stats() if hasattr(tree, 'rebuild_stats') else None,
+        'Parseo': lector.resumen(),
+        'Overhead_ns': temporizador.overhead_ns,
+        'Tiempo(s)': (reloj() - inicio) / 1e9,
+    }
+
+
+@contextmanager
+def traza_compilada(ruta_archivo_op):
+    # Entrega la ruta de una traza compilada. Una traza de texto se compila antes a un archivo
+    # temporal, que se borra al salir, para no parsearla en cada proceso.
+    if es_traza_binaria(ruta_archivo_op):
+        yield ruta_archivo_op
+        return
+    descriptor, temporal = tempfile.mkstemp(suffix='.bin')
+    os.close(descriptor)
+    try:
+        compilar(ruta_archivo_op, temporal)
+        yield temporal
+    finally:
+        os.remove(temporal)
+
+
+def replay_paralelo(ruta_archivo_op, degree, log_files, procesos=None, instantanea=None, guardar_en=None,
+                    contadores=False, cache=None):
+    # Ejecuta un proceso por estructura y retorna sus resultados y el tiempo total de pared
+    inicio = reloj()
+    with traza_compilada(ruta_archivo_op) as ruta_traza:
+        with ProcessPoolExecutor(max_workers=procesos or len(log_files)) as pool:
+            futuros = {tree_name: pool.submit(ejecutar_estructura, tree_name, ruta_traza, degree, log_dir,
+                                              instantanea, guardar_en, contadores, cache)
+                       for tree_name, log_dir in log_files.items()}
+            resultados = {tree_name: futuro.result() for tree_name, futuro in futuros.items()}
+    return resultados, (reloj() - inicio) / 1e9
@@ -0,0 +1,110 @@
+import re
+import time
+
+
+# Lector en streaming del archivo de operaciones. Lee el archivo por bloques,
+# decide el tipo de operación por el prefijo de cada línea y aplica una sola
+# expresión regular por línea. Genera tuplas (op, id, dato) donde:
+#   INSERTAR -> dato es el nombre
+#   RANGO    -> dato es el límite superior del rango (id es el inferior)
+#   BUSCAR / ELIMINAR -> dato es None
+
+INSERTAR = 0
+BUSCAR = 1
+ELIMINAR = 2
+RANGO = 3
+
+# Nombre de cada operación tal como aparece en los logs y estadísticas
+NOMBRES_OPERACION = {
+    INSERTAR: 'Insercion',
+    BUSCAR: 'Busqueda',
+    ELIMINAR: 'Eliminacion',
+    RANGO: 'Rango',
+}
+
+patternInsert = re.compile(r'Insert:\{id:(\d+),nombre:"([A-Za-z-]+)"\}')
+patternSearch = re.compile(r'Search:\{id:(\d+)\}')
+patternDelete = re.compile(r'Delete:\{id:(\d+)\}')
+patternRange = re.compile(r'Range:\{from:(\d+),to:(\d+)\}')
+
+TAMANO_BLOQUE = 1 << 20  # 1 MiB por lectura
+
+
+def parsear_linea(linea):
+    # Convierte una línea en una tupla (op, id, dato), o None si no es una operación válida
+    linea = linea.strip()
+    if not linea:
+        return None
+    prefijo = linea[0]
+    if prefijo == 'I':
+        match = patternInsert.match(linea)
+        if match:
+            return INSERTAR, int(match.group(1)), match.group(2)
+    elif prefijo == 'S':
+        match = patternSearch.match(linea)
+        if match:
+            return BUSCAR, int(match.group(1)), None
+    elif prefijo == 'D':
+        match = patternDelete.match(linea)
+        if match:
+            return ELIMINAR, int(match.group(1)), None
+    elif prefijo == 'R':
+        match = patternRange.match(linea)
+        if match:
+            return RANGO, int(match.group(1)), int(match.group(2))
+    return None
+
+
+class LectorOperaciones:
+    # Itera las operaciones de un archivo sin cargarlo completo en memoria y
+    # acumula el tiempo dedicado solo al parseo, separado del tiempo de los árboles.
+
+    def __init__(self, ruta, tamano_bloque=TAMANO_BLOQUE):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        self.lineas = 0  # Líneas leídas
+        self.operaciones = 0  # Operaciones válidas generadas
+        self.bytes = 0  # Caracteres leídos del archivo
+        self.tiempo_ns = 0  # Tiempo de lectura y parseo
+
+    def __iter__(self):
+        reloj = time.perf_counter_ns
+        pendiente = ''
+        with open(self.ruta, 'r') as file:
+            while True:
+                inicio = reloj()
+                bloque = file.read(self.tamano_bloque)
+                if not bloque:
+                    # La última línea puede no terminar en salto de línea
+                    operaciones = self._parsear([pendiente]) if pendiente else []
+                    self.tiempo_ns += reloj() - inicio
+                    yield from operaciones
+                    return
+                self.bytes += len(bloque)
+                lineas = (pendiente + bloque).split('\n')
+                pendiente = lineas.pop()  # Línea incompleta que continúa en el siguiente bloque
+                operaciones = self._parsear(lineas)
+                self.tiempo_ns += reloj() - inicio
+                yield from operaciones
+
+    def _parsear(self, lineas):
+        self.lineas += len(lineas)
+        operaciones = []
+        for linea in lineas:
+            operacion = parsear_linea(linea)
+            if operacion is not None:
+                operaciones.append(operacion)
+        self.operaciones += len(operaciones)
+        return operaciones
+
+    def resumen(self):
+        # Throughput del parseo: operaciones/s y MB/s
+        segundos = self.tiempo_ns / 1e9
+        return {
+            'Lineas': self.lineas,
+            'Operaciones': self.operaciones,
+            'MB': self.bytes / 2**20,
+            'Tiempo(s)': segundos,
+            'Operaciones_Por_Segundo': self.operaciones / segundos if segundos else 0.0,
+            'MB_Por_Segundo': self.bytes / 2**20 / segundos if segundos else 0.0,
+        }
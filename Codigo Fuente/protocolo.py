@@ -0,0 +1,40 @@
+from operator import itemgetter
+from typing import Iterator, Optional, Protocol, Tuple
+
+
+# Interfaz común de las estructuras del benchmark. insert, search y delete retornan
+# siempre un Resultado, de modo que el replay no depende de las convenciones de cada árbol
+# (ni necesita búsquedas extra para saber si una eliminación encontró la clave).
+
+
+class Resultado(tuple):
+    # Par (encontrado, nombre) con acceso por nombre, creado como Resultado((encontrado, nombre)).
+    # Es una subclase directa de tuple: construirla cuesta la cuarta parte que un NamedTuple,
+    # cuyo __new__ es una función de Python, y se crea una por operación.
+    __slots__ = ()
+
+    encontrado: bool = property(itemgetter(0))  # La clave existía (búsqueda y eliminación); siempre True en la inserción
+    nombre: Optional[str] = property(itemgetter(1))  # Nombre insertado, encontrado o eliminado; None si no se encontró
+
+    def __repr__(self):
+        return f"Resultado(encontrado={self[0]!r}, nombre={self[1]!r})"
+
+
+# Resultado compartido de las operaciones que no encuentran la clave (evita crear una tupla)
+NO_ENCONTRADO = Resultado((False, None))
+
+
+class EstructuraOrdenada(Protocol):
+    # Operaciones que el benchmark ejecuta sobre cada estructura. El recorrido por rango es
+    # opcional: solo se ejecuta en las estructuras que definen range(lo, hi).
+
+    def insert(self, id: int, nombre: str) -> Resultado: ...
+
+    def search(self, id: int) -> Resultado: ...
+
+    def delete(self, id: int) -> Resultado: ...
+
+
+class EstructuraConRango(EstructuraOrdenada, Protocol):
+
+    def range(self, lo: int, hi: int) -> Iterator[Tuple[int, str]]: ...
@@ -0,0 +1,188 @@
+import os
+import struct
+import time
+from array import array
+from itertools import accumulate
+
+import numpy as np
+
+from parser_operaciones import NOMBRES_OPERACION
+
+
+# Registro en memoria de las muestras de cada operación, en columnas numéricas
+# preasignadas (código de operación, id, encontrado, tiempo en ns). Durante la medición
+# solo se asignan valores en los buffers; al llenarse o al terminar la corrida, cada
+# columna se agrega en binario a su archivo .npy dentro del directorio del log:
+#   op.npy, id.npy, encontrado.npy (int8/int64), tiempo_ns.npy (ya sin el overhead del reloj)
+#   nombre_fin.npy + nombres.bin: posición final de cada nombre y los nombres en UTF-8
+#   lotes.npy: (fila inicial, hora de inicio, hora de fin) de cada lote, en segundos epoch
+# Los archivos se leen con np.load(mmap_mode='r'), sin volver a parsear texto.
+
+CAPACIDAD = 65536  # Muestras por buffer antes de escribir al log
+NA = -1  # Valor de 'encontrado' para las operaciones que no buscan (inserción)
+
+ENCABEZADO = "Tipo de operacion,Hora de inicio,Hora de fin,Tiempo(ms),Id,Encontrado(Busqueda/Eliminacion),Nombre\n"
+_ENCONTRADO = {NA: 'NA', 0: 'No', 1: 'Si'}
+
+TAMANO_CABECERA_NPY = 128  # Cabecera .npy de tamaño fijo, reescrita al cerrar con la forma final
+
+
+def cabecera_npy(descr, forma):
+    # Cabecera del formato .npy versión 1.0 rellenada hasta TAMANO_CABECERA_NPY bytes
+    texto = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (descr, forma)
+    texto = texto.ljust(TAMANO_CABECERA_NPY - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(texto)) + texto.encode('latin1')
+
+
+class ColumnaNpy:
+    # Archivo .npy que crece agregando bloques; la forma se completa al cerrarlo
+
+    def __init__(self, ruta, dtype, ancho=None):
+        self.file = open(ruta, 'wb')
+        self.dtype = np.dtype(dtype)
+        self.ancho = ancho  # Columnas por fila en arreglos 2D, None en columnas simples
+        self.filas = 0
+        self.file.write(cabecera_npy(self.dtype.str, self._forma()))
+
+    def _forma(self):
+        return (self.filas,) if self.ancho is None else (self.filas, self.ancho)
+
+    def escribir(self, datos):
+        datos = np.ascontiguousarray(datos, dtype=self.dtype)
+        self.file.write(datos.tobytes())
+        self.filas += len(datos)
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(cabecera_npy(self.dtype.str, self._forma()))
+        self.file.close()
+
+
+class RegistroColumnar:
+
+    def __init__(self, directorio, temporizador, capacidad=CAPACIDAD, agregador=None):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.temporizador = temporizador
+        self.agregador = agregador  # Recibe cada bloque de muestras al vaciarse (estadísticas en línea)
+        self.capacidad = capacidad
+        self.ops = array('b', bytes(capacidad))
+        self.ids = array('q', bytes(8 * capacidad))
+        self.encontrado = array('b', bytes(capacidad))
+        self.tiempo_ns = array('q', bytes(8 * capacidad))
+        self.nombres = [None] * capacidad  # Solo referencias; el nombre se codifica al vaciar
+        self.cantidad = 0
+        self.total = 0
+        self.inicio_lote = 0
+
+        ruta = lambda nombre: os.path.join(directorio, nombre)
+        self.columnas = {
+            'op': ColumnaNpy(ruta('op.npy'), np.int8),
+            'id': ColumnaNpy(ruta('id.npy'), np.int64),
+            'encontrado': ColumnaNpy(ruta('encontrado.npy'), np.int8),
+            'tiempo_ns': ColumnaNpy(ruta('tiempo_ns.npy'), np.int64),
+            'nombre_fin': ColumnaNpy(ruta('nombre_fin.npy'), np.int64),
+        }
+        self.lotes = ColumnaNpy(ruta('lotes.npy'), np.int64, ancho=3)
+        self.file_nombres = open(ruta('nombres.bin'), 'wb')
+        self.bytes_nombres = 0
+
+    def agregar(self, op, id, encontrado, transcurrido_ns, nombre):
+        # encontrado: True/False, o NA en las inserciones. nombre None se registra como NA
+        i = self.cantidad
+        if i == 0:
+            self.inicio_lote = int(time.time())  # Hora de inicio del lote
+        self.ops[i] = op
+        self.ids[i] = id
+        self.encontrado[i] = encontrado
+        self.tiempo_ns[i] = transcurrido_ns
+        self.nombres[i] = nombre
+        self.cantidad = i + 1
+        if self.cantidad == self.capacidad:
+            self.vaciar()
+
+    def vaciar(self):
+        # Agrega las muestras pendientes a los archivos de cada columna
+        cantidad = self.cantidad
+        if not cantidad:
+            return
+        fin_lote = int(time.time())
+        columnas = self.columnas
+        columnas['op'].escribir(np.frombuffer(self.ops, np.int8, cantidad))
+        columnas['id'].escribir(np.frombuffer(self.ids, np.int64, cantidad))
+        columnas['encontrado'].escribir(np.frombuffer(self.encontrado, np.int8, cantidad))
+        tiempos = np.maximum(np.frombuffer(self.tiempo_ns, np.int64, cantidad) - self.temporizador.overhead_ns, 0)
+        columnas['tiempo_ns'].escribir(tiempos)
+        if self.agregador is not None:
+            self.agregador.agregar_bloque(np.frombuffer(self.ops, np.int8, cantidad),
+                                          np.frombuffer(self.ids, np.int64, cantidad),
+                                          tiempos, self.nombres[:cantidad], self.total)
+
+        codificados = [('NA' if nombre is None else str(nombre)).encode('utf-8')
+                       for nombre in self.nombres[:cantidad]]
+        fines = np.fromiter(accumulate(map(len, codificados), initial=self.bytes_nombres),
+                            np.int64, cantidad + 1)[1:]
+        columnas['nombre_fin'].escribir(fines)
+        self.file_nombres.write(b''.join(codificados))
+        self.bytes_nombres = int(fines[-1])
+
+        self.lotes.escribir([[self.total, self.inicio_lote, fin_lote]])
+        self.nombres[:cantidad] = [None] * cantidad  # Libera las referencias a los nombres
+        self.total += cantidad
+        self.cantidad = 0
+
+    def close(self):
+        self.vaciar()
+        for columna in self.columnas.values():
+            columna.close()
+        self.lotes.close()
+        self.file_nombres.close()
+
+
+def cargar_columna(ruta):
+    # Mapea la columna en memoria; un archivo sin filas no se puede mapear
+    columna = np.load(ruta, mmap_mode='r')
+    return columna if columna.size else np.load(ruta)
+
+
+class LogColumnar:
+    # Lectura de un log binario escrito por RegistroColumnar, con las columnas mapeadas en memoria
+
+    def __init__(self, directorio):
+        ruta = lambda nombre: os.path.join(directorio, nombre)
+        self.op = cargar_columna(ruta('op.npy'))
+        self.id = cargar_columna(ruta('id.npy'))
+        self.encontrado = cargar_columna(ruta('encontrado.npy'))
+        self.tiempo_ns = cargar_columna(ruta('tiempo_ns.npy'))
+        self.nombre_fin = cargar_columna(ruta('nombre_fin.npy'))
+        self.lotes = cargar_columna(ruta('lotes.npy'))
+        if os.path.getsize(ruta('nombres.bin')):
+            self.nombres = np.memmap(ruta('nombres.bin'), dtype=np.uint8, mode='r')
+        else:
+            self.nombres = np.empty(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.op)
+
+    def nombre(self, i):
+        inicio = int(self.nombre_fin[i - 1]) if i else 0
+        return self.nombres[inicio:int(self.nombre_fin[i])].tobytes().decode('utf-8')
+
+
+def exportar_csv(log, ruta_csv, filas_por_bloque=CAPACIDAD):
+    # Escribe el log binario con el formato CSV de texto original, un lote a la vez
+    hora = lambda segundos: time.strftime("%H:%M:%S", time.localtime(segundos))
+    with open(ruta_csv, 'w') as file:
+        file.write(ENCABEZADO)
+        lotes = log.lotes.tolist()
+        for n, (fila_inicial, inicio, fin) in enumerate(lotes):
+            fila_final = lotes[n + 1][0] if n + 1 < len(lotes) else len(log)
+            hora_inicio, hora_final = hora(inicio), hora(fin)
+            for base in range(fila_inicial, fila_final, filas_por_bloque):
+                tope = min(base + filas_por_bloque, fila_final)
+                file.write(''.join(
+                    f"{NOMBRES_OPERACION[op]},{hora_inicio},{hora_final},{ns / 1e6:.6f},{id},"
+                    f"{_ENCONTRADO[encontrado]},{log.nombre(i)}\n"
+                    for i, op, id, encontrado, ns in zip(
+                        range(base, tope), log.op[base:tope].tolist(), log.id[base:tope].tolist(),
+                        log.encontrado[base:tope].tolist(), log.tiempo_ns[base:tope].tolist())))
@@ -0,0 +1,152 @@
+import gc
+from contextlib import contextmanager
+
+from parser_operaciones import INSERTAR, BUSCAR, ELIMINAR, RANGO, NOMBRES_OPERACION
+from temporizador import reloj
+
+
+# Modo throughput: las operaciones consecutivas del mismo tipo se agrupan en lotes y
+# cada lote se ejecuta completo sobre una estructura con una sola medición. El costo
+# del reloj se reparte entre todas las operaciones del lote en lugar de sumarse a cada una.
+
+TAMANO_MAXIMO_LOTE = 65536  # Limita la memoria de un lote en trazas con corridas muy largas
+
+
+def lotes_consecutivos(operaciones, tamano_maximo=TAMANO_MAXIMO_LOTE):
+    # Agrupa las operaciones consecutivas del mismo tipo en lotes (op, [(id, dato), ...])
+    actual = None
+    lote = []
+    for op, id, dato in operaciones:
+        if op != actual or len(lote) >= tamano_maximo:
+            if lote:
+                yield actual, lote
+            actual = op
+            lote = []
+        lote.append((id, dato))
+    if lote:
+        yield actual, lote
+
+
+def ejecutar_lote(tree, op, lote):
+    # Ejecuta el lote completo sobre una estructura y retorna el tiempo total en ns
+    if op == INSERTAR:
+        insert = tree.insert
+        inicio = reloj()
+        for id, nombre in lote:
+            insert(id, nombre)
+        return reloj() - inicio
+    if op == BUSCAR:
+        search = tree.search
+        inicio = reloj()
+        for id, _ in lote:
+            search(id)
+        return reloj() - inicio
+    if op == ELIMINAR:
+        delete = tree.delete
+        inicio = reloj()
+        for id, _ in lote:
+            delete(id)
+        return reloj() - inicio
+    # RANGO: se recorre cada rango completo sin materializarlo
+    rango = tree.range
+    inicio = reloj()
+    for lo, hi in lote:
+        for _ in rango(lo, hi):
+            pass
+    return reloj() - inicio
+
+
+def ejecutar_lote_agrupado(tree, op, lote):
+    # Ejecuta el lote con una sola llamada a la API en lote de la estructura (insert_many,
+    # search_many, delete_many) y retorna el tiempo en ns. Los ids se extraen antes de medir.
+    # Los rangos y las estructuras sin API en lote se ejecutan operación por operación.
+    if op == INSERTAR and hasattr(tree, 'insert_many'):
+        insert_many = tree.insert_many
+        inicio = reloj()
+        insert_many(lote)
+        return reloj() - inicio
+    if op in (BUSCAR, ELIMINAR) and hasattr(tree, 'search_many'):
+        ids = [id for id, _ in lote]
+        operacion = tree.search_many if op == BUSCAR else tree.delete_many
+        inicio = reloj()
+        operacion(ids)
+        return reloj() - inicio
+    return ejecutar_lote(tree, op, lote)
+
+
+@contextmanager
+def gc_pausado():
+    # Desactiva el recolector cíclico mientras se mide un lote. Las API en lote mantienen
+    # vivos sus resultados hasta el final y, con árboles grandes en memoria, las colecciones
+    # de generación 2 que eso provoca dominarían la medición.
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if activo:
+            gc.enable()
+
+
+class MedicionThroughput:
+    # Acumula operaciones y tiempo por estructura y tipo de operación
+
+    def __init__(self, estructuras, temporizador, en_lote=False, pausar_gc=False):
+        self.estructuras = estructuras  # Nombre -> árbol
+        self.temporizador = temporizador
+        self.ejecutar_lote = ejecutar_lote_agrupado if en_lote else ejecutar_lote
+        self.pausar_gc = pausar_gc
+        self.operaciones = {}  # (estructura, op) -> cantidad de operaciones
+        self.tiempo_ns = {}  # (estructura, op) -> tiempo total en ns
+        self.lotes = 0
+
+    def ejecutar(self, operaciones):
+        for op, lote in lotes_consecutivos(operaciones):
+            self.medir(op, lote)
+
+    def medir(self, op, lote):
+        # Ejecuta un lote sobre cada estructura y acumula su tiempo
+        self.lotes += 1
+        for nombre, tree in self.estructuras.items():
+            if op == RANGO and not hasattr(tree, 'range'):
+                continue  # Solo las estructuras con recorrido por rango
+            if self.pausar_gc:
+                with gc_pausado():
+                    transcurrido = self.ejecutar_lote(tree, op, lote)
+            else:
+                transcurrido = self.ejecutar_lote(tree, op, lote)
+            transcurrido = self.temporizador.neto(transcurrido)
+            clave = (nombre, op)
+            self.operaciones[clave] = self.operaciones.get(clave, 0) + len(lote)
+            self.tiempo_ns[clave] = self.tiempo_ns.get(clave, 0) + transcurrido
+
+    def resumen(self):
+        # Una fila por estructura y tipo de operación, en el orden de las estructuras
+        filas = []
+        for nombre in self.estructuras:
+            for op in (INSERTAR, BUSCAR, ELIMINAR, RANGO):
+                cantidad = self.operaciones.get((nombre, op))
+                if not cantidad:
+                    continue
+                tiempo_ns = self.tiempo_ns[(nombre, op)]
+                filas.append({
+                    'Estructura': nombre,
+                    'Operacion': NOMBRES_OPERACION[op],
+                    'Operaciones': cantidad,
+                    'Tiempo(s)': tiempo_ns / 1e9,
+                    'Operaciones_Por_Segundo': cantidad / (tiempo_ns / 1e9) if tiempo_ns else 0.0,
+                    'Ns_Por_Operacion': tiempo_ns / cantidad,
+                })
+        return filas
+
+
+def comparar_lotes(operaciones, individuales, agrupadas, temporizador):
+    # Mide cada lote de la traza dos veces, sobre estructuras independientes: operación por
+    # operación y con la API en lote. Ambas mediciones pausan el recolector para compararse
+    # en las mismas condiciones. Retorna las dos mediciones (individual, en lote).
+    individual = MedicionThroughput(individuales, temporizador, pausar_gc=True)
+    en_lote = MedicionThroughput(agrupadas, temporizador, en_lote=True, pausar_gc=True)
+    for op, lote in lotes_consecutivos(operaciones):
+        individual.medir(op, lote)
+        en_lote.medir(op, lote)
+    return individual, en_lote
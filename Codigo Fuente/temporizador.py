@@ -0,0 +1,36 @@
+import time
+
+
+# Medición de tiempos con time.perf_counter_ns. El costo de leer el reloj se mide
+# al inicio (calibración) y se descuenta de cada operación, para que el tiempo
+# registrado corresponda al árbol y no al arnés de medición.
+
+reloj = time.perf_counter_ns
+
+MUESTRAS_CALIBRACION = 20000
+
+
+def calibrar_overhead(muestras=MUESTRAS_CALIBRACION):
+    # Mediana del tiempo entre dos lecturas consecutivas del reloj, con el mismo
+    # patrón que rodea a cada operación medida (inicio = reloj(); ...; fin = reloj())
+    deltas = []
+    for _ in range(muestras):
+        inicio = reloj()
+        fin = reloj()
+        deltas.append(fin - inicio)
+    deltas.sort()
+    return deltas[len(deltas) // 2]
+
+
+class Temporizador:
+    # Guarda el overhead calibrado y la resolución del reloj de alta precisión
+
+    def __init__(self, muestras=MUESTRAS_CALIBRACION):
+        self.overhead_ns = calibrar_overhead(muestras)
+        self.resolucion_ns = time.get_clock_info('perf_counter').resolution * 1e9
+
+    def neto(self, transcurrido_ns):
+        # Tiempo de la operación sin el costo del reloj (nunca negativo)
+        neto = transcurrido_ns - self.overhead_ns
+        return neto if neto > 0 else 0
+
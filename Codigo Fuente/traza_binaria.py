@@ -0,0 +1,184 @@
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from itertools import accumulate
+
+from parser_operaciones import LectorOperaciones, INSERTAR, RANGO
+
+
+# Formato binario compilado de la traza de operaciones (little-endian):
+#   Cabecera: magic, versión, cantidad de operaciones, cantidad de nombres,
+#             posición de la tabla de nombres
+#   Registros: 3 enteros int64 por operación -> (op, id, dato)
+#             dato es el índice del nombre en INSERTAR, el límite superior en RANGO y -1 en el resto
+#   Tabla de nombres: cantidad_nombres + 1 posiciones int64 seguidas de los nombres en UTF-8
+# Los nombres repetidos se guardan una sola vez.
+
+MAGIC = b'TRZB'
+VERSION = 1
+CABECERA = struct.Struct('<4sIQQQ')
+CAMPOS_POR_REGISTRO = 3
+TAMANO_REGISTRO = CAMPOS_POR_REGISTRO * 8
+OPERACIONES_POR_BLOQUE = 65536  # Registros decodificados por bloque durante la reproducción
+
+
+def es_traza_binaria(ruta):
+    # Indica si el archivo empieza con la firma de una traza compilada
+    with open(ruta, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class EscritorTraza:
+    # Escribe una traza compilada en streaming. Los registros van directo al archivo; los
+    # nombres y sus posiciones se acumulan en archivos temporales y se copian detrás de los
+    # registros al cerrar, de modo que la memoria no crece con el tamaño de la traza.
+
+    def __init__(self, ruta):
+        self.file = open(ruta, 'wb')
+        self.file.write(CABECERA.pack(MAGIC, VERSION, 0, 0, 0))  # Se completa al cerrar
+        self.operaciones = 0
+        self.nombres = 0
+        self._posiciones = tempfile.TemporaryFile()
+        self._datos = tempfile.TemporaryFile()
+        self._bytes_nombres = 0
+
+    def escribir_registros(self, registros):
+        # registros: bytes con enteros int64 little-endian (op, id, dato) consecutivos,
+        # o un arreglo que exponga tobytes() con ese mismo contenido
+        datos = registros if isinstance(registros, (bytes, bytearray)) else registros.tobytes()
+        self.file.write(datos)
+        self.operaciones += len(datos) // TAMANO_REGISTRO
+
+    def agregar_nombres(self, nombres):
+        # Agrega nombres a la tabla y retorna el índice del primero
+        primero = self.nombres
+        codificados = [nombre.encode('utf-8') for nombre in nombres]
+        fines = list(accumulate(map(len, codificados), initial=self._bytes_nombres))[1:]
+        self._posiciones.write(struct.pack(f'<{len(fines)}q', *fines))
+        self._datos.write(b''.join(codificados))
+        if fines:
+            self._bytes_nombres = fines[-1]
+        self.nombres += len(codificados)
+        return primero
+
+    def close(self):
+        # Tabla de nombres: posiciones acumuladas y luego los bytes de cada nombre
+        posicion_tabla = self.file.tell()
+        self.file.write(struct.pack('<q', 0))
+        for temporal in (self._posiciones, self._datos):
+            temporal.seek(0)
+            shutil.copyfileobj(temporal, self.file)
+            temporal.close()
+        self.file.seek(0)
+        self.file.write(CABECERA.pack(MAGIC, VERSION, self.operaciones, self.nombres, posicion_tabla))
+        self.file.close()
+
+
+def compilar(ruta_texto, ruta_binaria):
+    # Convierte la traza de texto en el formato binario en una sola pasada.
+    # Retorna la cantidad de operaciones y de nombres distintos escritos.
+    indices = {}
+    registro = struct.Struct('<qqq')
+    escritor = EscritorTraza(ruta_binaria)
+    buffer = bytearray()
+    for op, id, dato in LectorOperaciones(ruta_texto):
+        if op == INSERTAR:
+            indice = indices.get(dato)
+            if indice is None:
+                indice = indices[dato] = escritor.agregar_nombres([dato])
+            dato = indice
+        elif op != RANGO:
+            dato = -1
+        buffer += registro.pack(op, id, dato)
+        if len(buffer) >= TAMANO_REGISTRO * OPERACIONES_POR_BLOQUE:
+            escritor.escribir_registros(buffer)
+            buffer.clear()
+    escritor.escribir_registros(buffer)
+    escritor.close()
+    return escritor.operaciones, escritor.nombres
+
+
+class ReproductorTraza:
+    # Itera una traza compilada a través de mmap y memoryview, generando las mismas
+    # tuplas (op, id, dato) que LectorOperaciones. Los nombres se decodifican una sola
+    # vez al abrir la traza; cada operación solo arma su tupla.
+
+    def __init__(self, ruta):
+        if sys.byteorder != 'little':
+            raise ValueError("La reproducción con memoryview requiere una arquitectura little-endian")
+        self.ruta = ruta
+        self.lineas = 0
+        self.operaciones = 0
+        self.bytes = os.path.getsize(ruta)
+        self.tiempo_ns = 0
+
+    def _cargar_nombres(self, mv, cantidad, posicion):
+        fin_posiciones = posicion + (cantidad + 1) * 8
+        posiciones = mv[posicion:fin_posiciones].cast('q')
+        datos = mv[fin_posiciones:]
+        nombres = [str(datos[posiciones[i]:posiciones[i + 1]], 'utf-8') for i in range(cantidad)]
+        posiciones.release()
+        datos.release()
+        return nombres
+
+    def __iter__(self):
+        reloj = time.perf_counter_ns
+        inicio = reloj()
+        with open(self.ruta, 'rb') as file:
+            mapa = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(mapa)
+        registros = None
+        try:
+            magic, version, total, cantidad_nombres, posicion_tabla = CABECERA.unpack_from(mv)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.ruta} no es una traza compilada compatible")
+            nombres = self._cargar_nombres(mv, cantidad_nombres, posicion_tabla)
+            registros = mv[CABECERA.size:CABECERA.size + total * TAMANO_REGISTRO].cast('q')
+            self.tiempo_ns += reloj() - inicio
+
+            paso = OPERACIONES_POR_BLOQUE * CAMPOS_POR_REGISTRO
+            for base in range(0, total * CAMPOS_POR_REGISTRO, paso):
+                inicio = reloj()
+                bloque = registros[base:base + paso]
+                operaciones = []
+                for op, id, dato in zip(bloque[0::3], bloque[1::3], bloque[2::3]):
+                    if op == INSERTAR:
+                        operaciones.append((op, id, nombres[dato]))
+                    elif op == RANGO:
+                        operaciones.append((op, id, dato))
+                    else:
+                        operaciones.append((op, id, None))
+                bloque.release()
+                self.operaciones += len(operaciones)
+                self.lineas += len(operaciones)
+                self.tiempo_ns += reloj() - inicio
+                yield from operaciones
+        finally:
+            # Las vistas derivadas se liberan antes que la vista del mmap
+            if registros is not None:
+                registros.release()
+            mv.release()
+            mapa.close()
+
+    def resumen(self):
+        # Throughput de la reproducción, con las mismas claves que LectorOperaciones.resumen
+        segundos = self.tiempo_ns / 1e9
+        return {
+            'Lineas': self.lineas,
+            'Operaciones': self.operaciones,
+            'MB': self.bytes / 2**20,
+            'Tiempo(s)': segundos,
+            'Operaciones_Por_Segundo': self.operaciones / segundos if segundos else 0.0,
+            'MB_Por_Segundo': self.bytes / 2**20 / segundos if segundos else 0.0,
+        }
+
+
+def abrir_traza(ruta):
+    # Retorna el lector adecuado según el archivo sea una traza compilada o de texto
+    if es_traza_binaria(ruta):
+        return ReproductorTraza(ruta)
+    return LectorOperaciones(ruta)